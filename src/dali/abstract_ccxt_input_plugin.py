@@ -19,10 +19,12 @@
 
 import json
 import logging
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from itertools import chain
 from multiprocessing.pool import ThreadPool
 from time import sleep
-from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Union
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
 
 from ccxt import (
     DDoSProtection,
@@ -39,11 +41,13 @@ from rp2.rp2_error import RP2RuntimeError
 
 from dali.abstract_input_plugin import AbstractInputPlugin
 from dali.abstract_transaction import AbstractTransaction
+from dali.cache import load_from_cache, save_to_cache
 from dali.ccxt_pagination import (
     AbstractPaginationDetailSet,
     AbstractPaginationDetailsIterator,
     PaginationDetails,
 )
+from dali.ccxt_throttle import serialize_throttle
 from dali.configuration import Keyword
 from dali.in_transaction import InTransaction
 from dali.intra_transaction import IntraTransaction
@@ -51,6 +55,7 @@ from dali.out_transaction import OutTransaction
 
 # Native format keywords
 _AMOUNT: str = "amount"
+_BASE: str = "base"
 _BUY: str = "buy"
 _COST: str = "cost"
 _CURRENCY: str = "currency"
@@ -62,6 +67,7 @@ _FETCH_MY_TRADES: str = "fetchMyTrades"
 _FETCH_WITHDRAWALS: str = "fetchWithdrawals"
 _ID: str = "id"
 _PRICE: str = "price"
+_QUOTE: str = "quote"
 _SELL: str = "sell"
 _SIDE: str = "side"
 _STATUS: str = "status"
@@ -72,6 +78,23 @@ _TX_ID: str = "txid"  # CCXT doesn't capitalize I
 _WITHDRAWAL: str = "withdrawal"
 
 _MS_IN_SECOND: int = 1000
+_EPOCH: datetime = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_ONE_MILLISECOND: timedelta = timedelta(milliseconds=1)
+
+# Fee costs some exchanges report as strings, meaning no fee
+_ZERO_FEE_STRINGS: Tuple[str, ...] = ("0", "0.0")
+
+# Retry policy for throttled or unavailable servers: exponential backoff, capped
+_MAX_API_CALL_ATTEMPTS: int = 10
+_RETRY_INITIAL_DELAY: float = 0.5
+_RETRY_MAX_DELAY: float = 30.0
+
+# Length of the ISO8601 datetime string CCXT generates from the millisecond timestamp (e.g. '2020-09-09T03:26:37.000Z')
+_CCXT_DATETIME_LENGTH: int = 24
+
+
+# Trade side -> whether the base asset is bought
+_IS_BUY_SIDE: Dict[str, bool] = {_BUY: True, _SELL: False}
 
 
 class Trade(NamedTuple):
@@ -81,6 +104,56 @@ class Trade(NamedTuple):
     quote_info: str
 
 
+# CCXT structures are plain trees of dicts and lists, so the circular reference check json.dumps()
+# performs by default is pure overhead.
+_JSON_ENCODER: json.JSONEncoder = json.JSONEncoder(check_circular=False)
+
+
+# Serialize a CCXT structure into the raw_data field of a transaction
+def _raw_data(transaction: Any) -> str:
+    return _JSON_ENCODER.encode(transaction)
+
+
+# CCXT reports amounts, costs, prices and fees as numbers (strings, see the client setup in the plugin constructor):
+# trades often repeat the same values, so the string to decimal parsing is memoized.
+@lru_cache(maxsize=8192)
+def _rp2_decimal_from_string(value: str) -> RP2Decimal:
+    return RP2Decimal(value)
+
+
+def _to_rp2_decimal(value: Any) -> RP2Decimal:
+    # Keyed by the string form, so that e.g. 1 and 1.0 keep their own representation
+    return _rp2_decimal_from_string(str(value))
+
+
+# Fills executed together share the same timestamp (and RP2 only keeps second resolution), so
+# the formatted string is memoized by epoch second.
+@lru_cache(maxsize=65536)
+def _rp2_timestamp_from_whole_seconds_epoch(epoch_in_seconds: int) -> str:
+    rp2_time: datetime = datetime.fromtimestamp(epoch_in_seconds, timezone.utc)
+    return (
+        f"{rp2_time.year:04d}-{rp2_time.month:02d}-{rp2_time.day:02d} "
+        f"{rp2_time.hour:02d}:{rp2_time.minute:02d}:{rp2_time.second:02d}+0000"
+    )
+
+
+# Wrapper that defers JSON serialization to the moment the log record is actually formatted,
+# so filtered-out records don't pay for json.dumps().
+class _LazyJson:
+    __slots__ = ("__data",)
+
+    def __init__(self, data: Any) -> None:
+        self.__data: Any = data
+
+    def __str__(self) -> str:
+        return _raw_data(self.__data)
+
+
+class _CachedMarkets(NamedTuple):
+    markets: List[str]
+    market_assets: Dict[str, Tuple[str, str]]
+
+
 class ProcessOperationResult(NamedTuple):
     in_transactions: List[InTransaction]
     out_transactions: List[OutTransaction]
@@ -89,6 +162,8 @@ class ProcessOperationResult(NamedTuple):
 
 class AbstractCcxtInputPlugin(AbstractInputPlugin):
     __DEFAULT_THREAD_COUNT: int = 1
+    # Markets rarely change: the result of fetch_markets() is reused across runs for this long
+    _MARKETS_CACHE_TTL: timedelta = timedelta(hours=24)
 
     def __init__(
         self,
@@ -98,13 +173,30 @@ class AbstractCcxtInputPlugin(AbstractInputPlugin):
         thread_count: Optional[int],
     ) -> None:
         super().__init__(account_holder, native_fiat)
-        self.__logger: logging.Logger = create_logger(f"{self.exchange_name()}/{self.account_holder}")
-        self.__cache_key: str = f"{str(self.exchange_name()).lower()}-{account_holder}"
+        # Plugin and exchange names are fixed per plugin: resolve them once instead of once per generated transaction
+        self.__plugin_name: str = self.plugin_name()
+        self.__exchange_name: str = self.exchange_name()
+        self.__account_holder: str = account_holder
+        self.__logger: logging.Logger = create_logger(f"{self.__exchange_name}/{self.account_holder}")
+        self.__cache_key: str = f"{str(self.__exchange_name).lower()}-{account_holder}"
         self.__client: Exchange = self._initialize_client()
+        # Let CCXT pace requests according to the exchange's documented rate limit, rather than reacting to throttling errors.
+        # Markets are fetched by up to thread_count threads sharing the client, whose throttler alone would let their requests
+        # through in bursts: serialize it.
+        self.__client.enableRateLimit = True
+        serialize_throttle(self.__client)
+        # Have CCXT return numbers as the strings the exchange sent, instead of floats: this avoids the lossy
+        # float -> str round trip before building RP2Decimals
+        self.__client.number = str
         self.__thread_count = thread_count if thread_count else self.__DEFAULT_THREAD_COUNT
         self.__markets: List[str] = []
+        # key: market symbol (e.g. 'BTC/USD'), value: base and quote assets of the market
+        self.__market_assets: Dict[str, Tuple[str, str]] = {}
         self.__start_time: datetime = exchange_start_time
-        self.__start_time_ms: int = int(self.__start_time.timestamp()) * _MS_IN_SECOND
+        # Naive start times are interpreted as local time (like datetime.timestamp() does), then converted with
+        # integer arithmetic to keep millisecond precision
+        aware_start_time: datetime = self.__start_time if self.__start_time.tzinfo else self.__start_time.astimezone()
+        self.__start_time_ms: int = (aware_start_time - _EPOCH) // _ONE_MILLISECOND
 
     def plugin_name(self) -> str:
         raise NotImplementedError("Abstract method")
@@ -132,36 +224,71 @@ class AbstractCcxtInputPlugin(AbstractInputPlugin):
         if self.__markets:
             return self.__markets
 
+        markets_cache_key: str = f"{self.__cache_key}-markets"
+        cached_markets: Optional[_CachedMarkets] = load_from_cache(markets_cache_key, self._MARKETS_CACHE_TTL)
+        if isinstance(cached_markets, _CachedMarkets):
+            self.__markets = cached_markets.markets
+            self.__market_assets = cached_markets.market_assets
+            return self.__markets
+
         ccxt_markets: Any = self._client.fetch_markets()
+        if self.__logger.isEnabledFor(logging.DEBUG):
+            for market in ccxt_markets:
+                self.__logger.debug("Market: %s", _LazyJson(market))
+
         market_list: List[str] = []
         for market in ccxt_markets:
-            self.__logger.debug("Market: %s", json.dumps(market))
             if market[_TYPE] == "spot":
                 market_list.append(market[_ID])
+                # Split the symbol once per market instead of once per trade
+                if market.get(_SYMBOL) and market.get(_BASE) and market.get(_QUOTE):
+                    self.__market_assets[market[_SYMBOL]] = (market[_BASE], market[_QUOTE])
 
         self.__markets = market_list
+        save_to_cache(markets_cache_key, _CachedMarkets(self.__markets, self.__market_assets))
 
         return self.__markets
 
     @staticmethod
-    def _rp2_timestamp_from_ms_epoch(epoch_timestamp: str) -> str:
-        epoch_in_seconds: int = int(epoch_timestamp) // _MS_IN_SECOND
-        return AbstractCcxtInputPlugin._rp2_timestamp_from_seconds_epoch(str(epoch_in_seconds))
+    def _rp2_timestamp_from_ms_epoch(epoch_timestamp: Union[str, int]) -> str:
+        return _rp2_timestamp_from_whole_seconds_epoch(int(epoch_timestamp) // _MS_IN_SECOND)
 
     @staticmethod
     def _rp2_timestamp_from_seconds_epoch(epoch_timestamp: str) -> str:
         rp2_time = datetime.fromtimestamp((float(epoch_timestamp)), timezone.utc)
         return rp2_time.strftime("%Y-%m-%d %H:%M:%S%z")
 
-    # Parses the symbol (eg. 'BTC/USD') into base and quote assets, and formats notes for the transactions
+    # Returns True for buy trades and False for sell trades: one dict lookup replaces the per-trade buy/sell/else comparison chain
     @staticmethod
-    def _to_trade(market_pair: str, base_amount: str, quote_amount: str) -> Trade:
-        assets = market_pair.split("/")
+    def _is_buy_side(transaction: Any) -> bool:
+        is_buy: Optional[bool] = _IS_BUY_SIDE.get(transaction[_SIDE])
+        if is_buy is None:
+            raise RP2RuntimeError(f"Internal error: unrecognized transaction side: {transaction[_SIDE]}")
+        return is_buy
+
+    # CCXT fills 'datetime' with the ISO8601 rendering of 'timestamp' in UTC: reformatting it with string slicing is much cheaper
+    # than building a datetime object out of the epoch and formatting it. Falls back to the epoch if the string is not in CCXT format.
+    @staticmethod
+    def _rp2_timestamp_from_ccxt_transaction(transaction: Any) -> str:
+        ccxt_datetime: Optional[str] = transaction.get(_DATE_TIME)
+        if ccxt_datetime and len(ccxt_datetime) == _CCXT_DATETIME_LENGTH and ccxt_datetime[10] == "T" and ccxt_datetime[-1] == "Z":
+            return f"{ccxt_datetime[:10]} {ccxt_datetime[11:19]}+0000"
+        return AbstractCcxtInputPlugin._rp2_timestamp_from_ms_epoch(transaction[_TIMESTAMP])
+
+    # Parses the symbol (eg. 'BTC/USD') into base and quote assets, and formats notes for the transactions
+    def _to_trade(self, market_pair: str, base_amount: str, quote_amount: str) -> Trade:
+        assets: Optional[Tuple[str, str]] = self.__market_assets.get(market_pair)
+        if assets is None:
+            # Symbols not described by fetch_markets() (e.g. delisted markets) are split once and remembered
+            split_pair: List[str] = market_pair.split("/")
+            assets = (split_pair[0], split_pair[1])
+            self.__market_assets[market_pair] = assets
+        base_asset, quote_asset = assets
         return Trade(
-            base_asset=assets[0],
-            quote_asset=assets[1],
-            base_info=f"{base_amount} {assets[0]}",
-            quote_info=f"{quote_amount} {assets[1]}",
+            base_asset=base_asset,
+            quote_asset=quote_asset,
+            base_info=f"{base_amount} {base_asset}",
+            quote_info=f"{quote_amount} {quote_asset}",
         )
 
     @property
@@ -181,7 +308,6 @@ class AbstractCcxtInputPlugin(AbstractInputPlugin):
         return self.__thread_count
 
     def load(self, country: AbstractCountry) -> List[AbstractTransaction]:
-        result: List[AbstractTransaction] = []
         in_transactions: List[InTransaction] = []
         out_transactions: List[OutTransaction] = []
         intra_transactions: List[IntraTransaction] = []
@@ -195,9 +321,8 @@ class AbstractCcxtInputPlugin(AbstractInputPlugin):
             self._process_withdrawals(intra_transactions)
         self._process_implicit_api(in_transactions, out_transactions, intra_transactions)
 
-        result.extend(in_transactions)
-        result.extend(out_transactions)
-        result.extend(intra_transactions)
+        # Build the result in a single pass over the three lists
+        result: List[AbstractTransaction] = list(chain(in_transactions, out_transactions, intra_transactions))
 
         return result
 
@@ -269,8 +394,7 @@ class AbstractCcxtInputPlugin(AbstractInputPlugin):
 
                 pagination_detail_iterator.update_fetched_elements(deposits)
 
-                with ThreadPool(self._thread_count) as pool:
-                    processing_result_list = pool.map(self._process_transfer, deposits)
+                processing_result_list = [self._process_transfer(deposit) for deposit in deposits]
 
                 for processing_result in processing_result_list:
                     if processing_result is None:
@@ -310,20 +434,30 @@ class AbstractCcxtInputPlugin(AbstractInputPlugin):
 
         has_pagination_detail_set: AbstractPaginationDetailSet = pagination_detail_set
 
-        pagination_detail_iterator: AbstractPaginationDetailsIterator = iter(has_pagination_detail_set)
+        # Network round-trips dominate trade processing and markets are paginated independently of each other:
+        # markets are fetched concurrently (bounded by thread_count) in the background, while the trades of the
+        # markets already fetched are processed. imap() preserves market order.
+        with ThreadPool(self._thread_count) as fetch_pool:
+            for trades in fetch_pool.imap(self._fetch_trades, has_pagination_detail_set.split_by_market()):
+                # Processing is CPU-bound Python code holding the GIL: threads would only add overhead
+                processing_result_list = [self._process_buy_and_sell(trade) for trade in trades]
+
+                for processing_result in processing_result_list:
+                    if processing_result is None:
+                        continue
+                    if processing_result.in_transactions:
+                        in_transactions.extend(processing_result.in_transactions)
+                    if processing_result.out_transactions:
+                        out_transactions.extend(processing_result.out_transactions)
+
+    # Drain all the pages of a pagination detail set
+    def _fetch_trades(self, pagination_detail_set: AbstractPaginationDetailSet) -> List[Dict[str, Union[str, float]]]:
+        result: List[Dict[str, Union[str, float]]] = []
+        pagination_detail_iterator: AbstractPaginationDetailsIterator = iter(pagination_detail_set)
         try:
             while True:
                 pagination_details: PaginationDetails = next(pagination_detail_iterator)
 
-                trades: Iterable[Dict[str, Union[str, float]]] = self._safe_api_call(
-                    self._client.fetch_my_trades,
-                    {
-                        "symbol": pagination_details.symbol,
-                        "since": pagination_details.since,
-                        "limit": pagination_details.limit,
-                        "params": pagination_details.params,
-                    },
-                )
                 #   {
                 #       'info':         { ... },                    // the original decoded JSON as is
                 #       'id':           '12345-67890:09876/54321',  // string trade id
@@ -348,24 +482,24 @@ class AbstractCcxtInputPlugin(AbstractInputPlugin):
                 # * The ``cost`` of the trade means ``amount * price``. It is the total *quote* volume of the trade (whereas `amount` is the *base* volume).
                 # * The cost field itself is there mostly for convenience and can be deduced from other fields.
                 # * The ``cost`` of the trade is a *"gross"* value. That is the value pre-fee, and the fee has to be applied afterwards.
-
+                trades: Iterable[Dict[str, Union[str, float]]] = self._safe_api_call(
+                    self._client.fetch_my_trades,
+                    {
+                        "symbol": pagination_details.symbol,
+                        "since": pagination_details.since,
+                        "limit": pagination_details.limit,
+                        "params": pagination_details.params,
+                    },
+                )
                 pagination_detail_iterator.update_fetched_elements(trades)
-
-                with ThreadPool(self._thread_count) as pool:
-                    processing_result_list = pool.map(self._process_buy_and_sell, trades)
-
-                for processing_result in processing_result_list:
-                    if processing_result is None:
-                        continue
-                    if processing_result.in_transactions:
-                        in_transactions.extend(processing_result.in_transactions)
-                    if processing_result.out_transactions:
-                        out_transactions.extend(processing_result.out_transactions)
+                result.extend(trades)
 
         except StopIteration:
             # End of pagination details
             pass
 
+        return result
+
     def _process_withdrawals(
         self,
         intra_transactions: List[IntraTransaction],
@@ -428,8 +562,7 @@ class AbstractCcxtInputPlugin(AbstractInputPlugin):
                 # }
                 pagination_detail_iterator.update_fetched_elements(withdrawals)
 
-                with ThreadPool(self._thread_count) as pool:
-                    processing_result_list = pool.map(self._process_transfer, withdrawals)
+                processing_result_list = [self._process_transfer(withdrawal) for withdrawal in withdrawals]
 
                 for processing_result in processing_result_list:
                     if processing_result is None:
@@ -449,146 +582,162 @@ class AbstractCcxtInputPlugin(AbstractInputPlugin):
         results: Iterable[Dict[str, Union[str, float]]] = {}
         request_count: int = 0
 
-        # Most exceptions are caused by request limits of the underlying APIs
-        while request_count < 9:
+        # Request pacing is left to the CCXT rate limiter (see __init__): retries only handle the exchange pushing
+        # back anyway, or being unavailable, and back off exponentially instead of sleeping a fixed amount.
+        while True:
             try:
                 results = function(**params)
                 break
             except ExchangeError as exc:
                 self.__logger.debug("ExchangeError exception from server. Exception - %s", exc)
-                sleep(0.1)
                 break
-            except DDoSProtection as exc:
-                self.__logger.debug(
-                    "DDosProtection exception from server, most likely too many requests. Making another attempt after 0.1 second delay. Exception - %s", exc
-                )
-                sleep(0.1)
-                request_count += 3
-            except (ExchangeNotAvailable, NetworkError, RequestTimeout) as exc_na:
+            except (DDoSProtection, ExchangeNotAvailable, NetworkError, RequestTimeout) as exc_na:
                 request_count += 1
-                if request_count > 9:
+                if request_count >= _MAX_API_CALL_ATTEMPTS:
                     self.__logger.info("Maximum number of retries reached.")
                     raise RP2RuntimeError("Server error") from exc_na
 
-                self.__logger.debug("Server not available. Making attempt #%s of 10 after a ten second delay. Exception - %s", request_count, exc_na)
-                sleep(10)
+                delay: float = min(_RETRY_INITIAL_DELAY * 2 ** (request_count - 1), _RETRY_MAX_DELAY)
+                self.__logger.debug(
+                    "Server not available or too many requests. Making attempt #%s of %s after a %s second delay. Exception - %s",
+                    request_count + 1,
+                    _MAX_API_CALL_ATTEMPTS,
+                    delay,
+                    exc_na,
+                )
+                sleep(delay)
 
         return results
 
     ### Single Transaction Processing
 
     def _process_buy_and_sell(self, transaction: Any, notes: Optional[str] = None) -> ProcessOperationResult:
-        results: ProcessOperationResult = self._process_buy(transaction, notes)
-        results.out_transactions.extend(self._process_sell(transaction, notes).out_transactions)
+        # Both sides of the trade share the same raw data: serialize it only once
+        raw_data: str = _raw_data(transaction)
+        results: ProcessOperationResult = self._process_buy(transaction, notes, raw_data)
+        results.out_transactions.extend(self._process_sell(transaction, notes, raw_data).out_transactions)
 
         return results
 
-    def _process_buy(self, transaction: Any, notes: Optional[str] = None) -> ProcessOperationResult:
-        self.__logger.debug("Buy: %s", json.dumps(transaction))
+    def _process_buy(self, transaction: Any, notes: Optional[str] = None, raw_data: Optional[str] = None) -> ProcessOperationResult:
+        self.__logger.debug("Buy: %s", _LazyJson(transaction))
+        if raw_data is None:
+            raw_data = _raw_data(transaction)
+        # Read the CCXT fields once: each of them is used several times below
+        symbol: str = transaction[_SYMBOL]
+        amount: Any = transaction[_AMOUNT]
+        cost: Any = transaction[_COST]
+        fee: Dict[str, Any] = transaction[_FEE]
+        unique_id: str = transaction[_ID]
+        timestamp: str = self._rp2_timestamp_from_ccxt_transaction(transaction)
         in_transaction_list: List[InTransaction] = []
         out_transaction_list: List[OutTransaction] = []
         crypto_in: RP2Decimal
         crypto_fee: RP2Decimal
-        fee_asset: Optional[str] = transaction[_FEE][_CURRENCY]
+        fee_asset: Optional[str] = fee[_CURRENCY]
         if not fee_asset:
             # On certain exchanges (e.g Coinbase) sometimes fee/currency is missing, so we try
             # to derive it from symbol.
-            fee_asset = str(transaction[_SYMBOL].split("/")[-1]) if "/" in transaction[_SYMBOL] else None
+            fee_asset = str(symbol.split("/")[-1]) if "/" in symbol else None
 
-        trade: Trade = self._to_trade(transaction[_SYMBOL], str(transaction[_AMOUNT]), str(transaction[_COST]))
-        if transaction[_SIDE] == _BUY:
+        trade: Trade = self._to_trade(symbol, str(amount), str(cost))
+        is_buy: bool = self._is_buy_side(transaction)
+        if is_buy:
             out_asset = trade.quote_asset
             in_asset = trade.base_asset
-            if transaction[_AMOUNT]:
-                crypto_in = RP2Decimal(str(transaction[_AMOUNT]))
+            if amount is not None and _to_rp2_decimal(amount):
+                crypto_in = _to_rp2_decimal(amount)
             else:
                 # On certain exchanges (e.g. Coinbase) sometimes transaction/amount is missing,
                 # so we try to derive it from transaction/cost and transaction/price.
-                crypto_in = RP2Decimal(str(transaction[_COST])) / RP2Decimal(str(transaction[_PRICE]))
+                crypto_in = _to_rp2_decimal(cost) / _to_rp2_decimal(transaction[_PRICE])
             conversion_info = f"{trade.quote_info} -> {trade.base_info}"
-        elif transaction[_SIDE] == _SELL:
+        else:
             out_asset = trade.base_asset
             in_asset = trade.quote_asset
-            crypto_in = RP2Decimal(str(transaction[_COST]))
+            crypto_in = _to_rp2_decimal(cost)
             conversion_info = f"{trade.base_info} -> {trade.quote_info}"
-        else:
-            raise RP2RuntimeError(f"Internal error: unrecognized transaction side: {transaction[_SIDE]}")
 
         if fee_asset == in_asset:
-            crypto_fee = RP2Decimal(str(transaction[_FEE][_COST]))
+            crypto_fee = _to_rp2_decimal(fee[_COST])
         else:
             crypto_fee = ZERO
-            transaction_fee = RP2Decimal(str(transaction[_FEE][_COST]))
-
-            # Users can use other crypto assets to pay for trades
-            if fee_asset != out_asset and RP2Decimal(transaction_fee) > ZERO:
-                out_transaction_list.append(
-                    OutTransaction(
-                        plugin=self.plugin_name(),
-                        unique_id=transaction[_ID],
-                        raw_data=json.dumps(transaction),
-                        timestamp=self._rp2_timestamp_from_ms_epoch(transaction[_TIMESTAMP]),
-                        asset=transaction[_FEE][_CURRENCY],
-                        exchange=self.exchange_name(),
-                        holder=self.account_holder,
-                        transaction_type=Keyword.FEE.value,
-                        spot_price=Keyword.UNKNOWN.value,
-                        crypto_out_no_fee="0",
-                        crypto_fee=str(transaction_fee),
-                        crypto_out_with_fee=str(transaction_fee),
-                        fiat_out_no_fee=str(transaction_fee) if self.is_native_fiat(fee_asset) else None,
-                        fiat_fee=str(transaction_fee) if self.is_native_fiat(fee_asset) else None,
-                        notes=(f"{notes + '; ' if notes else ''} Fee for conversion from " f"{conversion_info}"),
+            fee_cost: Any = fee[_COST]
+
+            # Users can use other crypto assets to pay for trades. Most trades have no such fee: the cheap
+            # checks on the raw value come first, so that the fee is only parsed when it can be non-zero.
+            if fee_asset != out_asset and fee_cost and fee_cost not in _ZERO_FEE_STRINGS:
+                transaction_fee: RP2Decimal = _to_rp2_decimal(fee_cost)
+                if transaction_fee > ZERO:
+                    is_fee_asset_native_fiat: bool = self.is_native_fiat(fee_asset)
+                    out_transaction_list.append(
+                        OutTransaction(
+                            plugin=self.__plugin_name,
+                            unique_id=unique_id,
+                            raw_data=raw_data,
+                            timestamp=timestamp,
+                            asset=fee[_CURRENCY],
+                            exchange=self.__exchange_name,
+                            holder=self.__account_holder,
+                            transaction_type=Keyword.FEE.value,
+                            spot_price=Keyword.UNKNOWN.value,
+                            crypto_out_no_fee="0",
+                            crypto_fee=str(transaction_fee),
+                            crypto_out_with_fee=str(transaction_fee),
+                            fiat_out_no_fee=str(transaction_fee) if is_fee_asset_native_fiat else None,
+                            fiat_fee=str(transaction_fee) if is_fee_asset_native_fiat else None,
+                            notes=(f"{notes + '; ' if notes else ''} Fee for conversion from " f"{conversion_info}"),
+                        )
                     )
-                )
 
         # Is this a plain buy or a conversion?
         if self.is_native_fiat(trade.quote_asset):
-            fiat_in_with_fee = RP2Decimal(str(transaction[_COST]))
-            fiat_fee = RP2Decimal(crypto_fee)
-            spot_price = RP2Decimal(str(transaction[_PRICE]))
-            if transaction[_SIDE] == _BUY:
+            fiat_in_with_fee = _to_rp2_decimal(cost)
+            fiat_fee = crypto_fee
+            spot_price = _to_rp2_decimal(transaction[_PRICE])
+            if is_buy:
                 transaction_notes = f"Fiat buy of {trade.base_asset} with {trade.quote_asset}"
-                fiat_in_no_fee = fiat_in_with_fee - (fiat_fee * spot_price)
-            elif transaction[_SIDE] == _SELL:
-                transaction_notes = f"Fiat sell of {trade.base_asset} into {trade.quote_asset}"
-                fiat_in_no_fee = fiat_in_with_fee - fiat_fee
+                # Amounts end up in tax reports, so they stay RP2Decimal (float would introduce rounding errors):
+                # the arithmetic is skipped instead when there is no fee to subtract (zero fees are common)
+                fiat_in_no_fee = fiat_in_with_fee if not fiat_fee else fiat_in_with_fee - (fiat_fee * spot_price)
             else:
-                raise RP2RuntimeError(f"Internal error: unrecognized transaction side: {transaction[_SIDE]}")
+                transaction_notes = f"Fiat sell of {trade.base_asset} into {trade.quote_asset}"
+                fiat_in_no_fee = fiat_in_with_fee if not fiat_fee else fiat_in_with_fee - fiat_fee
 
+            is_in_asset_native_fiat: bool = self.is_native_fiat(in_asset)
             in_transaction_list.append(
                 InTransaction(
-                    plugin=self.plugin_name(),
-                    unique_id=transaction[_ID],
-                    raw_data=json.dumps(transaction),
-                    timestamp=self._rp2_timestamp_from_ms_epoch(transaction[_TIMESTAMP]),
+                    plugin=self.__plugin_name,
+                    unique_id=unique_id,
+                    raw_data=raw_data,
+                    timestamp=timestamp,
                     asset=in_asset,
-                    exchange=self.exchange_name(),
-                    holder=self.account_holder,
+                    exchange=self.__exchange_name,
+                    holder=self.__account_holder,
                     transaction_type=Keyword.BUY.value,
                     spot_price=str(spot_price),
                     crypto_in=str(crypto_in),
-                    crypto_fee=None if self.is_native_fiat(in_asset) else str(crypto_fee),
+                    crypto_fee=None if is_in_asset_native_fiat else str(crypto_fee),
                     fiat_in_no_fee=str(fiat_in_no_fee),
                     fiat_in_with_fee=str(fiat_in_with_fee),
-                    fiat_fee=str(fiat_fee) if self.is_native_fiat(in_asset) else None,
+                    fiat_fee=str(fiat_fee) if is_in_asset_native_fiat else None,
                     fiat_ticker=trade.quote_asset,
                     notes=(f"{notes + '; ' if notes else ''} {transaction_notes}"),
                 )
             )
 
         else:
-            transaction_notes = f"Buy side of conversion from " f"{conversion_info}" f"({out_asset} out-transaction unique id: {transaction[_ID]}"
+            transaction_notes = f"Buy side of conversion from " f"{conversion_info}" f"({out_asset} out-transaction unique id: {unique_id}"
 
             in_transaction_list.append(
                 InTransaction(
-                    plugin=self.plugin_name(),
-                    unique_id=transaction[_ID],
-                    raw_data=json.dumps(transaction),
-                    timestamp=self._rp2_timestamp_from_ms_epoch(transaction[_TIMESTAMP]),
+                    plugin=self.__plugin_name,
+                    unique_id=unique_id,
+                    raw_data=raw_data,
+                    timestamp=timestamp,
                     asset=in_asset,
-                    exchange=self.exchange_name(),
-                    holder=self.account_holder,
+                    exchange=self.__exchange_name,
+                    holder=self.__account_holder,
                     transaction_type=Keyword.BUY.value,
                     spot_price=Keyword.UNKNOWN.value,
                     crypto_in=str(crypto_in),
@@ -602,46 +751,51 @@ class AbstractCcxtInputPlugin(AbstractInputPlugin):
 
         return ProcessOperationResult(in_transactions=in_transaction_list, out_transactions=out_transaction_list, intra_transactions=[])
 
-    def _process_sell(self, transaction: Any, notes: Optional[str] = None) -> ProcessOperationResult:
-        self.__logger.debug("Sell: %s", json.dumps(transaction))
+    def _process_sell(self, transaction: Any, notes: Optional[str] = None, raw_data: Optional[str] = None) -> ProcessOperationResult:
+        self.__logger.debug("Sell: %s", _LazyJson(transaction))
+        if raw_data is None:
+            raw_data = _raw_data(transaction)
+        symbol: str = transaction[_SYMBOL]
+        amount: Any = transaction[_AMOUNT]
+        cost: Any = transaction[_COST]
+        fee: Dict[str, Any] = transaction[_FEE]
+        unique_id: str = transaction[_ID]
+        timestamp: str = self._rp2_timestamp_from_ccxt_transaction(transaction)
         out_transaction_list: List[OutTransaction] = []
-        trade: Trade = self._to_trade(transaction[_SYMBOL], str(transaction[_AMOUNT]), str(transaction[_COST]))
+        trade: Trade = self._to_trade(symbol, str(amount), str(cost))
 
-        # For some reason CCXT outputs amounts in float
-        if transaction[_SIDE] == _BUY:
+        if self._is_buy_side(transaction):
             out_asset = trade.quote_asset
             in_asset = trade.base_asset
-            crypto_out_no_fee: RP2Decimal = RP2Decimal(str(transaction[_COST]))
+            crypto_out_no_fee: RP2Decimal = _to_rp2_decimal(cost)
             conversion_info = f"{trade.quote_info} -> {trade.base_info}"
-        elif transaction[_SIDE] == _SELL:
+        else:
             out_asset = trade.base_asset
             in_asset = trade.quote_asset
-            crypto_out_no_fee = RP2Decimal(str(transaction[_AMOUNT]))
+            crypto_out_no_fee = _to_rp2_decimal(amount)
             conversion_info = f"{trade.base_info} -> {trade.quote_info}"
-        else:
-            raise RP2RuntimeError(f"Internal error: unrecognized transaction side: {transaction[_SIDE]}")
 
-        if transaction[_FEE][_CURRENCY] == out_asset:
-            crypto_fee: RP2Decimal = RP2Decimal(str(transaction[_FEE][_COST]))
+        if fee[_CURRENCY] == out_asset:
+            crypto_fee: RP2Decimal = _to_rp2_decimal(fee[_COST])
         else:
             crypto_fee = ZERO
-        crypto_out_with_fee: RP2Decimal = crypto_out_no_fee + crypto_fee
+        crypto_out_with_fee: RP2Decimal = crypto_out_no_fee if not crypto_fee else crypto_out_no_fee + crypto_fee
 
         # Is this a plain buy or a conversion?
         if self.is_native_fiat(trade.quote_asset):
-            fiat_out_no_fee: RP2Decimal = RP2Decimal(str(transaction[_COST]))
+            fiat_out_no_fee: RP2Decimal = _to_rp2_decimal(cost)
             fiat_fee: RP2Decimal = crypto_fee
-            spot_price: RP2Decimal = RP2Decimal(str(transaction[_PRICE]))
+            spot_price: RP2Decimal = _to_rp2_decimal(transaction[_PRICE])
 
             out_transaction_list.append(
                 OutTransaction(
-                    plugin=self.plugin_name(),
-                    unique_id=transaction[_ID],
-                    raw_data=json.dumps(transaction),
-                    timestamp=self._rp2_timestamp_from_ms_epoch(transaction[_TIMESTAMP]),
+                    plugin=self.__plugin_name,
+                    unique_id=unique_id,
+                    raw_data=raw_data,
+                    timestamp=timestamp,
                     asset=out_asset,
-                    exchange=self.exchange_name(),
-                    holder=self.account_holder,
+                    exchange=self.__exchange_name,
+                    holder=self.__account_holder,
                     transaction_type=Keyword.SELL.value,
                     spot_price=str(spot_price),
                     crypto_out_no_fee=str(crypto_out_no_fee),
@@ -658,13 +812,13 @@ class AbstractCcxtInputPlugin(AbstractInputPlugin):
             # CCXT does not report the value of the transaction in fiat
             out_transaction_list.append(
                 OutTransaction(
-                    plugin=self.plugin_name(),
-                    unique_id=transaction[_ID],
-                    raw_data=json.dumps(transaction),
-                    timestamp=self._rp2_timestamp_from_ms_epoch(transaction[_TIMESTAMP]),
+                    plugin=self.__plugin_name,
+                    unique_id=unique_id,
+                    raw_data=raw_data,
+                    timestamp=timestamp,
                     asset=out_asset,
-                    exchange=self.exchange_name(),
-                    holder=self.account_holder,
+                    exchange=self.__exchange_name,
+                    holder=self.__account_holder,
                     transaction_type=Keyword.SELL.value,
                     spot_price=Keyword.UNKNOWN.value,
                     crypto_out_no_fee=str(crypto_out_no_fee),
@@ -675,7 +829,7 @@ class AbstractCcxtInputPlugin(AbstractInputPlugin):
                     notes=(
                         f"{notes + '; ' if notes else ''} Sell side of conversion from "
                         f"{conversion_info}"
-                        f"({in_asset} in-transaction unique id: {transaction[_ID]}"
+                        f"({in_asset} in-transaction unique id: {unique_id}"
                     ),
                 )
             )
@@ -683,27 +837,27 @@ class AbstractCcxtInputPlugin(AbstractInputPlugin):
         return ProcessOperationResult(out_transactions=out_transaction_list, in_transactions=[], intra_transactions=[])
 
     def _process_transfer(self, transaction: Any) -> ProcessOperationResult:
-        self.__logger.debug("Transfer: %s", json.dumps(transaction))
+        self.__logger.debug("Transfer: %s", _LazyJson(transaction))
         if transaction[_STATUS] == "failed":
-            self.__logger.info("Skipping failed transfer %s", json.dumps(transaction))
+            self.__logger.info("Skipping failed transfer %s", _LazyJson(transaction))
         else:
             intra_transaction_list: List[IntraTransaction] = []
 
-            # This is a CCXT list must convert to string from float
-            amount: RP2Decimal = RP2Decimal(str(transaction[_AMOUNT]))
+            amount: RP2Decimal = _to_rp2_decimal(transaction[_AMOUNT])
+            raw_data: str = _raw_data(transaction)
 
             if transaction[_TYPE] == _DEPOSIT:
                 intra_transaction_list.append(
                     IntraTransaction(
-                        plugin=self.plugin_name(),
+                        plugin=self.__plugin_name,
                         unique_id=transaction[_TX_ID],
-                        raw_data=json.dumps(transaction),
+                        raw_data=raw_data,
                         timestamp=transaction[_DATE_TIME],
                         asset=transaction[_CURRENCY],
                         from_exchange=Keyword.UNKNOWN.value,
                         from_holder=Keyword.UNKNOWN.value,
-                        to_exchange=self.exchange_name(),
-                        to_holder=self.account_holder,
+                        to_exchange=self.__exchange_name,
+                        to_holder=self.__account_holder,
                         spot_price=Keyword.UNKNOWN.value,
                         crypto_sent=Keyword.UNKNOWN.value,
                         crypto_received=str(amount),
@@ -712,13 +866,13 @@ class AbstractCcxtInputPlugin(AbstractInputPlugin):
             elif transaction[_TYPE] == _WITHDRAWAL:
                 intra_transaction_list.append(
                     IntraTransaction(
-                        plugin=self.plugin_name(),
+                        plugin=self.__plugin_name,
                         unique_id=transaction[_TX_ID],
-                        raw_data=json.dumps(transaction),
+                        raw_data=raw_data,
                         timestamp=transaction[_DATE_TIME],
                         asset=transaction[_CURRENCY],
-                        from_exchange=self.exchange_name(),
-                        from_holder=self.account_holder,
+                        from_exchange=self.__exchange_name,
+                        from_holder=self.__account_holder,
                         to_exchange=Keyword.UNKNOWN.value,
                         to_holder=Keyword.UNKNOWN.value,
                         spot_price=Keyword.UNKNOWN.value,
@@ -727,6 +881,6 @@ class AbstractCcxtInputPlugin(AbstractInputPlugin):
                     )
                 )
             else:
-                self.__logger.error("Unrecognized Crypto transfer: %s", json.dumps(transaction))
+                self.__logger.error("Unrecognized Crypto transfer: %s", _LazyJson(transaction))
 
         return ProcessOperationResult(out_transactions=[], in_transactions=[], intra_transactions=intra_transaction_list)
@@ -15,12 +15,25 @@
 # Disabled for now. Hopefully, we can refactor some of the logic out to MappedGraph.
 # pylint: disable=too-many-lines
 
+import hashlib
+import json
 import logging
-from datetime import datetime, timedelta, timezone
-from time import sleep, time
+from bisect import bisect_right
+from datetime import datetime, timedelta, timezone, tzinfo
+from functools import lru_cache
+from heapq import merge
+from itertools import groupby
+from json import JSONDecodeError
+from multiprocessing.pool import ThreadPool
+from operator import itemgetter
+from sys import intern
+from threading import BoundedSemaphore, RLock
+from time import sleep
 from typing import (
     Any,
+    Callable,
     Dict,
+    FrozenSet,
     Iterator,
     List,
     NamedTuple,
@@ -47,21 +60,25 @@ from ccxt import (
     okex,
     upbit,
 )
-from dateutil.relativedelta import relativedelta
-from prezzemolo.avl_tree import AVLTree
+from prezzemolo.avl_tree import AVLNode, AVLTree
 from prezzemolo.vertex import Vertex
+from requests.adapters import HTTPAdapter
+from requests.sessions import Session
 from rp2.logger import create_logger
 from rp2.rp2_decimal import ZERO, RP2Decimal
 from rp2.rp2_error import RP2RuntimeError, RP2ValueError
+from urllib3.util.retry import Retry
 
 from dali.abstract_pair_converter_plugin import (
     AbstractPairConverterPlugin,
     AssetPairAndTimestamp,
 )
+from dali.cache import load_from_cache, save_to_cache
+from dali.ccxt_throttle import serialize_throttle
 from dali.configuration import Keyword
 from dali.historical_bar import HistoricalBar
 from dali.logger import LOGGER
-from dali.mapped_graph import Alias, MappedGraph
+from dali.mapped_graph import Alias, MappedGraph, MappedGraphEdges
 from dali.plugin.pair_converter.csv.kraken import Kraken as KrakenCsvPricing
 from dali.transaction_manifest import TransactionManifest
 
@@ -92,6 +109,8 @@ _TIME_GRANULARITY_STRING_TO_SECONDS: Dict[str, int] = {
     _ONE_DAY: 86400,
     _ONE_WEEK: 604800,
 }
+# Bars of a timeframe all share the same duration: build it once per timeframe rather than once per bar
+_TIME_GRANULARITY_DURATION: Dict[str, timedelta] = {timespan: timedelta(seconds=seconds) for timespan, seconds in _TIME_GRANULARITY_STRING_TO_SECONDS.items()}
 
 # Currently supported exchanges
 _ALIAS: str = "Alias"  # Virtual exchange - to be removed when teleportation is implemented
@@ -107,6 +126,8 @@ _OKEX: str = "Okex"
 _PIONEX: str = "Pionex"  # Not currently supported by CCXT
 _UPBIT: str = "Upbit"
 _FIAT_EXCHANGE: str = "Exchangerate.host"
+# Market exchanges of every fiat market: the list is shared by all of them, so it must never be mutated
+_FIAT_EXCHANGE_LIST: List[str] = [_FIAT_EXCHANGE]
 _DEFAULT_EXCHANGE: str = _KRAKEN
 _EXCHANGE_DICT: Dict[str, Any] = {
     _BINANCE: binance,
@@ -122,8 +143,11 @@ _COINBASE_PRO_GRANULARITY_LIST: List[str] = [_MINUTE, _FIVE_MINUTE, _FIFTEEN_MIN
 _TIME_GRANULARITY_DICT: Dict[str, List[str]] = {
     _COINBASE_PRO: _COINBASE_PRO_GRANULARITY_LIST,
 }
-_NONSTANDARD_GRANULARITY_EXCHANGE_SET: Set[str] = set(_TIME_GRANULARITY_DICT.keys())
-_TIME_GRANULARITY_SET: Set[str] = set(_TIME_GRANULARITY) | set(_COINBASE_PRO_GRANULARITY_LIST)
+# Position of each time span in the granularity lists, to find where to start retrying from without scanning them
+_TIME_GRANULARITY_INDEX: Dict[str, int] = {timespan: index for index, timespan in enumerate(_TIME_GRANULARITY)}
+_TIME_GRANULARITY_INDEX_DICT: Dict[str, Dict[str, int]] = {
+    exchange: {timespan: index for index, timespan in enumerate(granularity)} for exchange, granularity in _TIME_GRANULARITY_DICT.items()
+}
 
 # Delay in fractional seconds before making a request to avoid too many request errors
 # Kraken states it has a limit of 1 call per second, but this doesn't seem to be correct.
@@ -132,6 +156,20 @@ _TIME_GRANULARITY_SET: Set[str] = set(_TIME_GRANULARITY) | set(_COINBASE_PRO_GRA
 # Being authenticated lowers this limit.
 _REQUEST_DELAY_DICT: Dict[str, float] = {_KRAKEN: 5.1, _BITFINEX: 5.0}
 
+# Threads fetching the weekly bars of the markets priced on an exchange without a request delay
+_WEEKLY_BARS_THREADS_PER_EXCHANGE: int = 4
+
+# HTTP connection pool for each exchange: ccxt keeps one requests.Session per exchange, but doesn't size its pool or retry
+# transient gateway errors, which are common when pulling long price histories.
+_HTTP_POOL_SIZE: int = 32
+_HTTP_RETRY: Retry = Retry(total=3, backoff_factor=0.1, status_forcelist=[502, 503, 504], raise_on_status=False)
+
+# HTTP connection pool for the fiat rate APIs: requests go to the same host one after the other, so a small pool keeps the
+# connection alive between them and the adapter retries rate limiting and transient gateway errors (honoring Retry-After)
+# before the JSON decode retry loop of the plugin gets involved
+_FIAT_API_HTTP_POOL_SIZE: int = 4
+_FIAT_API_HTTP_RETRY: Retry = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 502, 503, 504], raise_on_status=False)
+
 # CSV Pricing classes
 _CSV_PRICING_DICT: Dict[str, Any] = {_KRAKEN: KrakenCsvPricing}
 
@@ -208,9 +246,21 @@ _QUOTE_PRIORITY: Dict[str, float] = {
 
 # Time constants
 _MS_IN_SECOND: int = 1000
+_MS_IN_MINUTE: int = 60 * _MS_IN_SECOND
+_EPOCH: datetime = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_ONE_MILLISECOND: timedelta = timedelta(milliseconds=1)
+_MS_TIMESTAMP_CACHE_SIZE: int = 1 << 14
+_DECIMAL_CACHE_SIZE: int = 1 << 16
+_WEEK_BOUNDARY_CACHE_SIZE: int = 1 << 12
 
 # Cache
 _CACHE_INTERVAL: int = 200
+_FLOOR_KEY_CACHE_SIZE: int = 1 << 17
+# Number of 1 minute candles pulled when looking up a single bar: the following candles are cached too, so transactions
+# close in time to each other (e.g. the fills of one order) are priced with a single request
+_SINGLE_BAR_WINDOW: int = 60
+# Graph snapshots are cached on disk for a day: after that the latest weekly candles and the markets are pulled again
+_GRAPH_SNAPSHOTS_CACHE_TTL: timedelta = timedelta(hours=24)
 
 # Djikstra weights
 # Priority should go to quote assets listed above, then other assets, and finally alternatives
@@ -245,7 +295,8 @@ DEFAULT_FIAT_LIST: List[str] = ["AUD", "CAD", "CHF", "EUR", "GBP", "JPY", "NZD",
 MARKET_PADDING_IN_WEEKS: int = 4
 
 DAYS_IN_WEEK: int = 7
-MANY_YEARS_IN_THE_FUTURE: relativedelta = relativedelta(years=100)
+# Start date of bogus markets: built once, since it's assigned for every market without bars
+_FAR_FUTURE: datetime = datetime(9999, 1, 1, tzinfo=timezone.utc)
 
 class AssetPairAndHistoricalPrice(NamedTuple):
     from_asset: str
@@ -259,6 +310,43 @@ class ExchangeNameAndClass(NamedTuple):
     klass: Any
 
 
+class _CachedGraphSnapshots(NamedTuple):
+    digest: str
+    markets: Dict[str, List[str]]
+    snapshots: List[Tuple[datetime, MappedGraphEdges]]
+
+
+# Each hop of a conversion requests its bars at the same timestamp, so the conversion to CCXT's epoch milliseconds is memoized.
+# Integer arithmetic on timedelta is exact, unlike multiplying the float returned by datetime.timestamp().
+@lru_cache(maxsize=_MS_TIMESTAMP_CACHE_SIZE)
+def _to_ms_timestamp(timestamp: datetime) -> int:
+    # Naive timestamps are local time, as in datetime.timestamp()
+    return (timestamp.astimezone() - _EPOCH) // _ONE_MILLISECOND if timestamp.tzinfo is None else (timestamp - _EPOCH) // _ONE_MILLISECOND
+
+
+# Flat markets repeat the same open/high/low/close values and illiquid ones the same (often zero) volume, so the Decimals built from
+# candle values are shared. RP2Decimal is immutable, and typed keys keep 1 and 1.0 apart so each value keeps its own exponent.
+@lru_cache(maxsize=_DECIMAL_CACHE_SIZE, typed=True)
+def _to_decimal(value: Union[int, float]) -> RP2Decimal:
+    return RP2Decimal(str(value))
+
+
+# Every bar cache lookup floors its key, and the same keys come back over and over while routing, so the floored keys are memoized.
+# The timezone is part of the cache key because equal instants in different timezones floor to different days. There are many
+# timestamps but few asset/exchange names: interning them lets all keys share one copy of each name and lets key comparisons on
+# dict hits succeed on identity.
+@lru_cache(maxsize=_FLOOR_KEY_CACHE_SIZE)
+def _floor_timestamp_key(
+    timestamp: datetime, timestamp_tzinfo: Optional[tzinfo], from_asset: str, to_asset: str, exchange: str, daily: bool
+) -> AssetPairAndTimestamp:
+    floored_timestamp: datetime
+    if daily:
+        floored_timestamp = timestamp.replace(tzinfo=timestamp_tzinfo, hour=0, minute=0, second=0, microsecond=0)
+    else:
+        floored_timestamp = timestamp.replace(tzinfo=timestamp_tzinfo, second=0, microsecond=0)
+    return AssetPairAndTimestamp(timestamp=floored_timestamp, from_asset=intern(from_asset), to_asset=intern(to_asset), exchange=intern(exchange))
+
+
 class AbstractCcxtPairConverterPlugin(AbstractPairConverterPlugin):
     def __init__(
         self,
@@ -269,15 +357,20 @@ class AbstractCcxtPairConverterPlugin(AbstractPairConverterPlugin):
         aliases: Optional[str] = None,
         cache_modifier: Optional[str] = None,
     ) -> None:
-        exchange_cache_modifier = "_".join(default_exchange.replace(" ", "_") if default_exchange and exchange_locked else "")
-        cache_modifier = cache_modifier if cache_modifier else ""
-        self.__cache_modifier = "_".join(x for x in [exchange_cache_modifier, cache_modifier] if x)
+        exchange_cache_modifier: Optional[str] = default_exchange.replace(" ", "_") if default_exchange and exchange_locked else None
+        self.__cache_modifier: str = "_".join(x for x in [exchange_cache_modifier, cache_modifier] if x)
+        # The cache key is read on every cache load and save, so it's built once
+        self.__cache_key: str = self.name() + "_" + self.__cache_modifier if self.__cache_modifier else self.name()
 
         super().__init__(historical_price_type=historical_price_type)
         self._logger: logging.Logger = create_logger(f"{self.name()}/{historical_price_type}")
 
         self.__exchanges: Dict[str, Exchange] = {}
+        # key: name of exchange, value: name of the exchange its client was created for (e.g. Kraken for an unknown exchange)
+        self.__client_exchanges: Dict[str, str] = {}
         self.__exchange_markets: Dict[str, Dict[str, List[str]]] = {}
+        # key: name of exchange, value: market -> exchange to price it on. Built from __exchange_markets on first use
+        self.__exchange_2_direct_market_exchanges: Dict[str, Dict[str, str]] = {}
         self.__exchange_locked: bool = exchange_locked if exchange_locked is not None else False
         self.__default_exchange: str = _DEFAULT_EXCHANGE if default_exchange is None else default_exchange
 
@@ -290,9 +383,29 @@ class AbstractCcxtPairConverterPlugin(AbstractPairConverterPlugin):
         # TO BE IMPLEMENTED - Combine all graphs into one graph where assets can 'teleport' between exchanges
         #   This will eliminate the need for markets and this dict, replacing it with just one AVLTree
         self.__exchange_2_graph_tree: Dict[str, AVLTree[datetime, MappedGraph[str]]] = {}
-        self.__exchange_last_request: Dict[str, float] = {}
+        # key: name of exchange, value: timestamps of the snapshots in ascending order and the matching snapshots. Snapshots are
+        # read-only once built, so lookups during pricing bisect these lists instead of walking the AVLTree.
+        self.__exchange_2_snapshots: Dict[str, Tuple[List[datetime], List[MappedGraph[str]]]] = {}
+        # key: snapshot and the assets being converted, value: hops of the conversion with the exchange used to price each of them
+        self.__conversion_routes: Dict[Tuple[MappedGraph[str], str, str], Tuple[AssetPairAndHistoricalPrice, ...]] = {}
+        # key: market assets, exchange pricing the market and optimization start, value: weekly bars of the market
+        self.__weekly_bars: Dict[Tuple[str, str, str, datetime], Optional[List[HistoricalBar]]] = {}
+        # Weekly bars for different exchanges are fetched concurrently during optimization: this guards the price cache while it's
+        # being written to or pickled
+        self.__cache_lock: RLock = RLock()
+        # Snapshots for different exchanges are built concurrently: this guards the exchange clients and CSV readers they share
+        self.__client_lock: RLock = RLock()
+        # key: name of the exchange a client was created for, value: slots bounding the weekly bar requests in flight on that client.
+        # Snapshots built concurrently can price markets on the same client (e.g. the alternative ones, or exchanges priced on
+        # Kraken), so the bound is shared by all of them
+        self.__exchange_request_slots: Dict[str, BoundedSemaphore] = {}
         self._manifest: Optional[TransactionManifest] = None
         self.__transaction_count: int = 0
+        # Fiat rates are daily: memoize them by day-floored key so that every transaction (or hop) on the same day doesn't hit the
+        # fiat source again
+        self.__fiat_daily_cache: Dict[AssetPairAndTimestamp, HistoricalBar] = {}
+        # Last bar found in (or added to) the cache with the cache and its floored key, kept in one tuple so that it's replaced atomically
+        self.__last_bar: Optional[Tuple[Dict[AssetPairAndTimestamp, Any], AssetPairAndTimestamp, HistoricalBar]] = None
         if exchange_locked:
             self._logger.debug("Routing locked to single exchange %s.", self.__default_exchange)
         else:
@@ -302,46 +415,51 @@ class AbstractCcxtPairConverterPlugin(AbstractPairConverterPlugin):
         # Assets that are not tradeable on any exchange yet
         self.__untradeable_assets: Set[str] = set(untradeable_assets.split(", ")) if untradeable_assets is not None else set()
         self.__aliases: Optional[Dict[str, Dict[Alias, RP2Decimal]]] = None if aliases is None else self._process_aliases(aliases)
-        self._fiat_priority: Dict[str, float] = FIAT_PRIORITY
-        self._fiat_list: List[str] = DEFAULT_FIAT_LIST
+        # A copy, so that subclasses can't modify the module-level default
+        self._fiat_priority: Dict[str, float] = dict(FIAT_PRIORITY)
+        self._fiat_list = DEFAULT_FIAT_LIST
 
     def _add_bar_to_cache(self, key: AssetPairAndTimestamp, historical_bar: HistoricalBar) -> None:
-        self._cache[self._floor_key(key)] = historical_bar
-
+        floored_key: AssetPairAndTimestamp = self._floor_key(key)
+        with self.__cache_lock:
+            cache: Dict[AssetPairAndTimestamp, Any] = self._cache
+            cache[floored_key] = historical_bar
+            self.__last_bar = (cache, floored_key, historical_bar)
+
+    # Routing and reverse lookups ask for the same bar several times in a row: the last bar found is checked before the cache. Floored
+    # keys are memoized, so a repeated lookup usually matches on identity. The last bar is only valid for the cache it was found in.
     def _get_bar_from_cache(self, key: AssetPairAndTimestamp) -> Optional[HistoricalBar]:
-        return self._cache.get(self._floor_key(key))
+        floored_key: AssetPairAndTimestamp = self._floor_key(key)
+        cache: Dict[AssetPairAndTimestamp, Any] = self._cache
+        last_bar: Optional[Tuple[Dict[AssetPairAndTimestamp, Any], AssetPairAndTimestamp, HistoricalBar]] = self.__last_bar
+        if last_bar is not None and last_bar[0] is cache and (last_bar[1] is floored_key or last_bar[1] == floored_key):
+            return last_bar[2]
+        historical_bar: Optional[HistoricalBar] = cache.get(floored_key)
+        if historical_bar is not None:
+            self.__last_bar = (cache, floored_key, historical_bar)
+        return historical_bar
 
     # All bundle timestamps have 1 millisecond added to them, so will not conflict with the floored timestamps of single bars
     def _add_bundle_to_cache(self, key: AssetPairAndTimestamp, historical_bars: List[HistoricalBar]) -> None:
-        self._cache[key] = historical_bars
+        with self.__cache_lock:
+            self._cache[key] = historical_bars
 
     def _get_bundle_from_cache(self, key: AssetPairAndTimestamp) -> Optional[List[HistoricalBar]]:
         return cast(List[HistoricalBar], self._cache.get(key))
 
     # The most granular pricing available is 1 minute, to reduce the size of cache and increase the reuse of pricing data
     def _floor_key(self, key: AssetPairAndTimestamp, daily: bool = False) -> AssetPairAndTimestamp:
-        raw_timestamp: datetime = key.timestamp
-        floored_timestamp: datetime
-        if daily:
-            floored_timestamp = raw_timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
-        else:
-            floored_timestamp = raw_timestamp - timedelta(
-                minutes=raw_timestamp.minute % 1, seconds=raw_timestamp.second, microseconds=raw_timestamp.microsecond
-            )
-        floored_key: AssetPairAndTimestamp = AssetPairAndTimestamp(
-            timestamp=floored_timestamp,
-            from_asset=key.from_asset,
-            to_asset=key.to_asset,
-            exchange=key.exchange,
-        )
+        return _floor_timestamp_key(key.timestamp, key.timestamp.tzinfo, key.from_asset, key.to_asset, key.exchange, daily)
 
-        return floored_key
+    def save_historical_price_cache(self) -> None:
+        with self.__cache_lock:
+            super().save_historical_price_cache()
 
     def name(self) -> str:
         raise NotImplementedError("Abstract method: it must be implemented in the plugin class")
 
     def cache_key(self) -> str:
-        return self.name() + "_" + self.__cache_modifier if self.__cache_modifier else self.name()
+        return self.__cache_key
 
     def optimize(self, transaction_manifest: TransactionManifest) -> None:
         self._manifest = transaction_manifest
@@ -362,6 +480,17 @@ class AbstractCcxtPairConverterPlugin(AbstractPairConverterPlugin):
     def fiat_list(self) -> List[str]:
         return self._fiat_list
 
+    # Fiat checks run at least twice per priced hop: the set is kept in sync with the list so they are hashed lookups, and the names
+    # are interned like the asset names in the cache keys
+    @property
+    def _fiat_list(self) -> List[str]:
+        return self.__fiat_list
+
+    @_fiat_list.setter
+    def _fiat_list(self, fiat_list: List[str]) -> None:
+        self.__fiat_list: List[str] = [intern(fiat) for fiat in fiat_list]
+        self._fiat_set: FrozenSet[str] = frozenset(self.__fiat_list)
+
     def get_historic_bar_from_native_source(self, timestamp: datetime, from_asset: str, to_asset: str, exchange: str) -> Optional[HistoricalBar]:
         self._logger.debug("Converting %s to %s", from_asset, to_asset)
 
@@ -379,13 +508,13 @@ class AbstractCcxtPairConverterPlugin(AbstractPairConverterPlugin):
 
         # If both assets are fiat, skip further processing
         if self._is_fiat_pair(from_asset, to_asset):
-            return self._get_fiat_exchange_rate(timestamp, from_asset, to_asset)
+            return self._get_daily_fiat_exchange_rate(timestamp, from_asset, to_asset)
 
         if exchange not in self.__exchange_2_graph_tree:
-            self._cache_graph_snapshots(exchange)
+            self._cache_manifest_graph_snapshots(exchange)
 
         current_markets = self.__exchange_markets[exchange]
-        current_graph = self.__exchange_2_graph_tree[exchange].find_max_value_less_than(timestamp)
+        current_graph = self._find_graph_snapshot(exchange, timestamp)
         if current_graph is None:
             raise RP2RuntimeError(
                 "Internal error: The graph snapshot does not exist. It appears that an attempt is being made to route "
@@ -395,12 +524,12 @@ class AbstractCcxtPairConverterPlugin(AbstractPairConverterPlugin):
         to_asset_vertex: Optional[Vertex[str]] = current_graph.get_vertex(to_asset)
         market_symbol = from_asset + to_asset
         result: Optional[HistoricalBar] = None
-        pricing_path: Optional[Iterator[Vertex[str]]] = None
 
         # TO BE IMPLEMENTED - bypass routing if conversion can be done with one market on the exchange
-        if market_symbol in current_markets and market_symbol not in _FORCE_ROUTING:
+        direct_market_exchange: Optional[str] = self._get_direct_market_exchanges(exchange).get(market_symbol)
+        if direct_market_exchange:
             self._logger.debug("Found market - %s on single exchange, skipping routing.", market_symbol)
-            result = self.find_historical_bar(from_asset, to_asset, timestamp, current_markets[market_symbol][0])
+            result = self.find_historical_bar(from_asset, to_asset, timestamp, direct_market_exchange)
             return result
         # else:
         # Graph building goes here.
@@ -421,50 +550,55 @@ class AbstractCcxtPairConverterPlugin(AbstractPairConverterPlugin):
                 f"The asset {from_asset}({from_asset_vertex}) or {to_asset}({to_asset_vertex}) is missing from {exchange} graph for {timestamp}"
             )
 
-        pricing_path = current_graph.dijkstra(from_asset_vertex, to_asset_vertex, False)
-
-        if pricing_path is None:
-            self._logger.debug("No path found for %s to %s. Please open an issue at %s.", from_asset, to_asset, self.issues_url)
-            return None
-
-        pricing_path_list: List[str] = [v.name for v in pricing_path]
-        self._logger.debug("Found path - %s", pricing_path_list)
-
-        for asset in pricing_path_list:
-            if not current_graph.is_optimized(asset):
-                raise RP2RuntimeError(f"Internal Error: The asset {asset} is not optimized.")
-
-        conversion_route: List[AssetPairAndHistoricalPrice] = []
-        last_node: Optional[str] = None
-        hop_bar: Optional[HistoricalBar] = None
-
-        # Build conversion stack, we will iterate over this to find the price for each conversion
-        # Then multiply them together to get our final price.
-        for node in pricing_path_list:
-            if last_node:
-                conversion_route.append(
-                    AssetPairAndHistoricalPrice(
-                        from_asset=last_node,
-                        to_asset=node,
-                        exchange=_ALIAS if current_graph.is_alias(last_node, node) else current_markets[(last_node + node)][0],
-                        historical_data=None,
-                    )
+        # Snapshots are read-only once built, so the hops of a conversion (and the exchange pricing each of them) only need to be resolved
+        # the first time a pair is priced on a snapshot: later conversions reuse the same hop tuples instead of rebuilding them.
+        route_key: Tuple[MappedGraph[str], str, str] = (current_graph, from_asset, to_asset)
+        conversion_route: Optional[Tuple[AssetPairAndHistoricalPrice, ...]] = self.__conversion_routes.get(route_key)
+        if conversion_route is None:
+            # Routes are cached on the snapshot, so only the first conversion from an asset pays for Dijkstra
+            pricing_path_list: Optional[List[str]] = current_graph.get_route(from_asset_vertex, to_asset_vertex)
+
+            if pricing_path_list is None:
+                self._logger.debug("No path found for %s to %s. Please open an issue at %s.", from_asset, to_asset, self.issues_url)
+                return None
+
+            self._logger.debug("Found path - %s", pricing_path_list)
+
+            for asset in pricing_path_list:
+                if not current_graph.is_optimized(asset):
+                    raise RP2RuntimeError(f"Internal Error: The asset {asset} is not optimized.")
+
+            # Build conversion stack, we will iterate over this to find the price for each conversion
+            # Then multiply them together to get our final price.
+            conversion_route = tuple(
+                AssetPairAndHistoricalPrice(
+                    from_asset=hop_from_asset,
+                    to_asset=hop_to_asset,
+                    exchange=_ALIAS if current_graph.is_alias(hop_from_asset, hop_to_asset) else current_markets[hop_from_asset + hop_to_asset][0],
                 )
+                for hop_from_asset, hop_to_asset in zip(pricing_path_list, pricing_path_list[1:])
+            )
+            self.__conversion_routes[route_key] = conversion_route
 
-            last_node = node
+        hop_bar: Optional[HistoricalBar] = None
 
-        for i, hop_data in enumerate(conversion_route):
+        # Running products of the hop prices: the bar is only built once, after the last hop
+        duration: timedelta = timedelta(0)
+        open_price: RP2Decimal = ZERO
+        high_price: RP2Decimal = ZERO
+        low_price: RP2Decimal = ZERO
+        close_price: RP2Decimal = ZERO
+        volume: RP2Decimal = ZERO
+        is_multi_hop: bool = False
+        for hop_data in conversion_route:
             if self._is_fiat_pair(hop_data.from_asset, hop_data.to_asset):
-                hop_bar = self._get_fiat_exchange_rate(timestamp, hop_data.from_asset, hop_data.to_asset)
+                hop_bar = self._get_daily_fiat_exchange_rate(timestamp, hop_data.from_asset, hop_data.to_asset)
             elif hop_data.exchange == _ALIAS:
                 hop_bar = current_graph.get_alias_bar(hop_data.from_asset, hop_data.to_asset, timestamp)
             else:
                 hop_bar = self.find_historical_bar(hop_data.from_asset, hop_data.to_asset, timestamp, hop_data.exchange)
 
-            if hop_bar is not None:
-                # Replacing an immutable attribute
-                conversion_route[i] = conversion_route[i]._replace(historical_data=hop_bar)
-            else:
+            if hop_bar is None:
                 self._logger.debug(
                     """No pricing data found for hop. This could be caused by airdropped
                     coins that do not have a market yet. Market - %s%s, Timestamp - %s, Exchange - %s""",
@@ -474,27 +608,82 @@ class AbstractCcxtPairConverterPlugin(AbstractPairConverterPlugin):
                     hop_data.exchange,
                 )
             if result is not None:
-                # TO BE IMPLEMENTED - override Historical Bar * to multiply two bars?
-                result = HistoricalBar(
-                    duration=max(result.duration, hop_bar.duration),  # type: ignore
-                    timestamp=timestamp,
-                    open=(result.open * hop_bar.open),  # type: ignore
-                    high=(result.high * hop_bar.high),  # type: ignore
-                    low=(result.low * hop_bar.low),  # type: ignore
-                    close=(result.close * hop_bar.close),  # type: ignore
-                    volume=(result.volume + hop_bar.volume),  # type: ignore
-                )
-            else:
+                duration = max(duration, hop_bar.duration)  # type: ignore
+                open_price *= hop_bar.open  # type: ignore
+                high_price *= hop_bar.high  # type: ignore
+                low_price *= hop_bar.low  # type: ignore
+                close_price *= hop_bar.close  # type: ignore
+                volume += hop_bar.volume  # type: ignore
+                is_multi_hop = True
+            elif hop_bar is not None:
                 result = hop_bar
+                duration, open_price, high_price, low_price, close_price, volume = (
+                    hop_bar.duration,
+                    hop_bar.open,
+                    hop_bar.high,
+                    hop_bar.low,
+                    hop_bar.close,
+                    hop_bar.volume,
+                )
+
+        if is_multi_hop:
+            result = HistoricalBar(
+                duration=duration,
+                timestamp=timestamp,
+                open=open_price,
+                high=high_price,
+                low=low_price,
+                close=close_price,
+                volume=volume,
+            )
 
         return result
 
+    # Markets that can price a conversion without routing, with the exchange to price them on (the first one listed for the market)
+    def _get_direct_market_exchanges(self, exchange: str) -> Dict[str, str]:
+        direct_market_exchanges: Optional[Dict[str, str]] = self.__exchange_2_direct_market_exchanges.get(exchange)
+        if direct_market_exchanges is None:
+            direct_market_exchanges = {
+                market: market_exchanges[0] for market, market_exchanges in self.__exchange_markets[exchange].items() if market not in _FORCE_ROUTING
+            }
+            self.__exchange_2_direct_market_exchanges[exchange] = direct_market_exchanges
+        return direct_market_exchanges
+
+    # Returns the latest snapshot starting at or before the timestamp, like AVLTree.find_max_value_less_than()
+    def _find_graph_snapshot(self, exchange: str, timestamp: datetime) -> Optional[MappedGraph[str]]:
+        snapshots: Optional[Tuple[List[datetime], List[MappedGraph[str]]]] = self.__exchange_2_snapshots.get(exchange)
+        if snapshots is None:
+            snapshots = self._flatten_graph_tree(self.__exchange_2_graph_tree[exchange])
+            self.__exchange_2_snapshots[exchange] = snapshots
+        timestamps, graphs = snapshots
+        index: int = bisect_right(timestamps, timestamp) - 1
+        return graphs[index] if index >= 0 else None
+
+    @staticmethod
+    def _flatten_graph_tree(exchange_tree: AVLTree[datetime, MappedGraph[str]]) -> Tuple[List[datetime], List[MappedGraph[str]]]:
+        timestamps: List[datetime] = []
+        graphs: List[MappedGraph[str]] = []
+        # In-order walk, so the lists come out sorted by timestamp
+        stack: List[AVLNode[datetime, MappedGraph[str]]] = []
+        node: Optional[AVLNode[datetime, MappedGraph[str]]] = exchange_tree.root
+        while stack or node is not None:
+            if node is not None:
+                stack.append(node)
+                node = node.left
+            else:
+                node = stack.pop()
+                timestamps.append(node.key)
+                graphs.append(node.value)
+                node = node.right
+        return timestamps, graphs
+
     def find_historical_bar(self, from_asset: str, to_asset: str, timestamp: datetime, exchange: str) -> Optional[HistoricalBar]:
         key: AssetPairAndTimestamp = AssetPairAndTimestamp(timestamp, from_asset, to_asset, exchange)
         historical_bar: Optional[HistoricalBar] = self._get_bar_from_cache(key)
 
         if historical_bar is not None:
-            self._logger.debug("Retrieved cache for %s/%s->%s for %s", timestamp, from_asset, to_asset, exchange)
+            if self._logger.isEnabledFor(logging.DEBUG):
+                self._logger.debug("Retrieved cache for %s/%s->%s for %s", timestamp, from_asset, to_asset, exchange)
             return historical_bar
 
         historical_bars: Optional[List[HistoricalBar]] = self.find_historical_bars(from_asset, to_asset, timestamp, exchange)
@@ -514,55 +703,56 @@ class AbstractCcxtPairConverterPlugin(AbstractPairConverterPlugin):
         self, from_asset: str, to_asset: str, timestamp: datetime, exchange: str, all_bars: bool = False, timespan: str = _MINUTE
     ) -> Optional[List[HistoricalBar]]:
         result: List[HistoricalBar] = []
-        retry_count: int = 0
         self.__transaction_count += 1
-        if timespan in _TIME_GRANULARITY_SET:
-            if exchange in _NONSTANDARD_GRANULARITY_EXCHANGE_SET:
-                retry_count = _TIME_GRANULARITY_DICT[exchange].index(timespan)
-            else:
-                retry_count = _TIME_GRANULARITY.index(timespan)
-        else:
+        timespan_index: Optional[int] = _TIME_GRANULARITY_INDEX_DICT.get(exchange, _TIME_GRANULARITY_INDEX).get(timespan)
+        if timespan_index is None:
             raise RP2ValueError("Internal error: Invalid time span passed to find_historical_bars.")
+        retry_count: int = timespan_index
         current_exchange: Any = self.__exchanges[exchange]
-        ms_timestamp: int = int(timestamp.timestamp() * _MS_IN_SECOND)
-        csv_pricing: Any = self.__csv_pricing_dict.get(exchange)
-        csv_reader: Any = None
-
-        if self.__exchange_csv_reader.get(exchange):
-            csv_reader = self.__exchange_csv_reader[exchange]
-        elif csv_pricing == self.__default_csv_reader.klass and self.__exchange_csv_reader.get(self.__default_csv_reader.name) is not None:
-            csv_reader = self.__exchange_csv_reader.get(self.__default_csv_reader.name)
-        elif csv_pricing is not None:
-            csv_reader = csv_pricing(self._manifest)
-
-            if csv_pricing == self.__default_csv_reader.klass:
-                self.__exchange_csv_reader[self.__default_csv_reader.name] = csv_reader
-
-        if csv_reader:
-            csv_bar: Optional[List[HistoricalBar]]
-            if all_bars:
-                csv_bar = csv_reader.find_historical_bars(from_asset, to_asset, timestamp, True, _ONE_WEEK)
-            else:
-                csv_bar = [csv_reader.find_historical_bar(from_asset, to_asset, timestamp)]
-
-            # We might want to add a function that adds bars to cache here.
-
-            self.__exchange_csv_reader[exchange] = csv_reader
-            if csv_bar is not None and csv_bar[0] is not None:
+        ms_timestamp: int = _to_ms_timestamp(timestamp)
+        csv_bar: Optional[List[HistoricalBar]] = None
+
+        # CSV readers are shared by the exchanges priced on the same source and download their files lazily: snapshots for several
+        # exchanges can be built concurrently, so they are created and read one caller at a time
+        with self.__client_lock:
+            csv_pricing: Any = self.__csv_pricing_dict.get(exchange)
+            csv_reader: Any = None
+
+            if self.__exchange_csv_reader.get(exchange):
+                csv_reader = self.__exchange_csv_reader[exchange]
+            elif csv_pricing == self.__default_csv_reader.klass and self.__exchange_csv_reader.get(self.__default_csv_reader.name) is not None:
+                csv_reader = self.__exchange_csv_reader.get(self.__default_csv_reader.name)
+            elif csv_pricing is not None:
+                csv_reader = csv_pricing(self._manifest)
+
+                if csv_pricing == self.__default_csv_reader.klass:
+                    self.__exchange_csv_reader[self.__default_csv_reader.name] = csv_reader
+
+            if csv_reader:
                 if all_bars:
-                    timestamp = csv_bar[-1].timestamp + timedelta(milliseconds=1)
-                    ms_timestamp = int(timestamp.timestamp() * _MS_IN_SECOND)
-                    self._logger.debug(
-                        "Retrieved bars up to %s from cache for %s/%s for %s. Continuing with REST API.",
-                        str(ms_timestamp),
-                        from_asset,
-                        to_asset,
-                        exchange,
-                    )
-                    result = csv_bar
+                    csv_bar = csv_reader.find_historical_bars(from_asset, to_asset, timestamp, True, _ONE_WEEK)
                 else:
-                    self._logger.debug("Retrieved bar from cache - %s for %s/%s->%s for %s", csv_bar, timestamp, from_asset, to_asset, exchange)
-                    return csv_bar
+                    csv_bar = [csv_reader.find_historical_bar(from_asset, to_asset, timestamp)]
+
+                # We might want to add a function that adds bars to cache here.
+
+                self.__exchange_csv_reader[exchange] = csv_reader
+
+        if csv_bar is not None and csv_bar[0] is not None:
+            if all_bars:
+                timestamp = csv_bar[-1].timestamp + timedelta(milliseconds=1)
+                ms_timestamp = _to_ms_timestamp(timestamp)
+                self._logger.debug(
+                    "Retrieved bars up to %s from cache for %s/%s for %s. Continuing with REST API.",
+                    str(ms_timestamp),
+                    from_asset,
+                    to_asset,
+                    exchange,
+                )
+                result = csv_bar
+            else:
+                self._logger.debug("Retrieved bar from cache - %s for %s/%s->%s for %s", csv_bar, timestamp, from_asset, to_asset, exchange)
+                return csv_bar
 
         within_last_week: bool = False
 
@@ -572,42 +762,43 @@ class AbstractCcxtPairConverterPlugin(AbstractPairConverterPlugin):
             if cached_bundle:
                 result.extend(cached_bundle)
                 timestamp = cached_bundle[-1].timestamp + timedelta(milliseconds=1)
-                ms_timestamp = int(timestamp.timestamp() * _MS_IN_SECOND)
+                ms_timestamp = _to_ms_timestamp(timestamp)
 
             # If the bundle of bars is within the last week, we don't need to pull new optimization data.
             if result and (datetime.now(timezone.utc) - result[-1].timestamp).total_seconds() > _TIME_GRANULARITY_STRING_TO_SECONDS[_ONE_WEEK]:
                 within_last_week = True
 
-        while (retry_count < len(_TIME_GRANULARITY_DICT.get(exchange, _TIME_GRANULARITY))) and not within_last_week:
-            timeframe: str = _TIME_GRANULARITY_DICT.get(exchange, _TIME_GRANULARITY)[retry_count]
+        # The timeframes only depend on the exchange: resolve them once per call
+        timeframes: List[str] = _TIME_GRANULARITY_DICT.get(exchange, _TIME_GRANULARITY)
+        while (retry_count < len(timeframes)) and not within_last_week:
+            timeframe: str = timeframes[retry_count]
             request_count: int = 0
             historical_data: List[List[Union[int, float]]] = []
 
             # Most exceptions are caused by request limits of the underlying APIs
             while request_count < 9:
                 try:
-                    # Excessive calls to the API within a certain window might get an IP temporarily banned
-                    if self._get_request_delay(exchange) > 0:
-                        current_time = time()
-                        second_delay = max(0, self._get_request_delay(exchange) - (current_time - self.__exchange_last_request.get(exchange, 0)))
-                        self._logger.debug("Delaying for %s seconds", second_delay)
-                        sleep(second_delay)
-                        self.__exchange_last_request[exchange] = time()
-
                     # this is where we pull the historical prices from the underlying exchange
                     if all_bars:
                         historical_data = current_exchange.fetchOHLCV(f"{from_asset}/{to_asset}", timeframe, ms_timestamp, 1500)
                         if len(historical_data) > 0:
                             ms_timestamp = int(historical_data[-1][0]) + 1
                     else:
-                        historical_data = current_exchange.fetchOHLCV(f"{from_asset}/{to_asset}", timeframe, ms_timestamp, 1)
-                        self._logger.debug(
-                            "Got historical_data: %s with ms_timestamp - %s with exchange %s with timeframe - %s",
-                            historical_data,
-                            ms_timestamp,
-                            type(current_exchange),
-                            timeframe,
+                        # Exchanges return the candles opening at or after the start, so a minute lookup starts from the minute
+                        # the timestamp falls in: the first candle then holds the timestamp, like the window candles cached below
+                        since: int = ms_timestamp - ms_timestamp % _MS_IN_MINUTE if timeframe == _MINUTE else ms_timestamp
+                        historical_data = current_exchange.fetchOHLCV(
+                            f"{from_asset}/{to_asset}", timeframe, since, _SINGLE_BAR_WINDOW if timeframe == _MINUTE else 1
                         )
+                        # Skip building the arguments (and the candle window) for a record that will be dropped
+                        if self._logger.isEnabledFor(logging.DEBUG):
+                            self._logger.debug(
+                                "Got historical_data: %s with ms_timestamp - %s with exchange %s with timeframe - %s",
+                                historical_data,
+                                ms_timestamp,
+                                type(current_exchange),
+                                timeframe,
+                            )
                     break
                 except ExchangeError as exc:
                     self._logger.debug("ExchangeError exception from server. Exception - %s", exc)
@@ -642,7 +833,7 @@ class AbstractCcxtPairConverterPlugin(AbstractPairConverterPlugin):
             if len(historical_data) > 0:
                 returned_timestamp = datetime.fromtimestamp(int(historical_data[0][0]) / _MS_IN_SECOND, timezone.utc)
                 if (returned_timestamp - timestamp).total_seconds() > _TIME_GRANULARITY_STRING_TO_SECONDS[timeframe] and not all_bars:
-                    if retry_count == len(_TIME_GRANULARITY_DICT.get(exchange, _TIME_GRANULARITY)) - 1:  # If this is the last try
+                    if retry_count == len(timeframes) - 1:  # If this is the last try
                         self._logger.info(
                             "For %s/%s requested candle for %s (ms %s) doesn't match the returned timestamp %s. It is assumed the asset was not tradeable at "
                             "the time of acquisition, so the first weekly candle is used for pricing. Please check the price of %s at %s.",
@@ -694,29 +885,20 @@ class AbstractCcxtPairConverterPlugin(AbstractPairConverterPlugin):
                 if not all_bars:
                     result = [
                         HistoricalBar(
-                            duration=timedelta(seconds=_TIME_GRANULARITY_STRING_TO_SECONDS[timeframe]),
+                            duration=_TIME_GRANULARITY_DURATION[timeframe],
                             timestamp=timestamp,
-                            open=RP2Decimal(str(historical_data[0][1])),
-                            high=RP2Decimal(str(historical_data[0][2])),
-                            low=RP2Decimal(str(historical_data[0][3])),
-                            close=RP2Decimal(str(historical_data[0][4])),
-                            volume=RP2Decimal(str(historical_data[0][5])),
+                            open=_to_decimal(historical_data[0][1]),
+                            high=_to_decimal(historical_data[0][2]),
+                            low=_to_decimal(historical_data[0][3]),
+                            close=_to_decimal(historical_data[0][4]),
+                            volume=_to_decimal(historical_data[0][5]),
                         )
                     ]
+                    if timeframe == _MINUTE:
+                        self._add_minute_bars_to_cache(from_asset, to_asset, exchange, historical_data[1:])
                     break
 
-                for historical_bar in historical_data:
-                    result.append(
-                        HistoricalBar(
-                            duration=timedelta(seconds=_TIME_GRANULARITY_STRING_TO_SECONDS[timeframe]),
-                            timestamp=datetime.fromtimestamp(int(historical_bar[0]) / _MS_IN_SECOND, timezone.utc),
-                            open=RP2Decimal(str(historical_bar[1])),
-                            high=RP2Decimal(str(historical_bar[2])),
-                            low=RP2Decimal(str(historical_bar[3])),
-                            close=RP2Decimal(str(historical_bar[4])),
-                            volume=RP2Decimal(str(historical_bar[5])),
-                        )
-                    )
+                result.extend(self._candles_to_bars(historical_data, timeframe))
             elif all_bars:
                 self._add_bundle_to_cache(AssetPairAndTimestamp(timestamp, from_asset, to_asset, exchange), result)
                 break  # If historical_data is empty we have hit the end of records and need to return
@@ -728,6 +910,33 @@ class AbstractCcxtPairConverterPlugin(AbstractPairConverterPlugin):
 
         return result
 
+    # Single bar lookups start from the minute the timestamp falls in, so a 1 minute candle is what a lookup at any time within
+    # the minute it opens at would return: it can be cached as is
+    def _add_minute_bars_to_cache(self, from_asset: str, to_asset: str, exchange: str, historical_data: List[List[Union[int, float]]]) -> None:
+        for historical_bar in self._candles_to_bars(historical_data, _MINUTE):
+            self._add_bar_to_cache(AssetPairAndTimestamp(historical_bar.timestamp, from_asset, to_asset, exchange), historical_bar)
+
+    # Bundles hold up to 1500 candles per request: the duration is shared by all of them and the constructors are bound to locals
+    # so that each candle only pays for the calls themselves
+    @staticmethod
+    def _candles_to_bars(historical_data: List[List[Union[int, float]]], timeframe: str) -> List[HistoricalBar]:
+        duration: timedelta = _TIME_GRANULARITY_DURATION[timeframe]
+        from_timestamp: Callable[[float, tzinfo], datetime] = datetime.fromtimestamp
+        utc: tzinfo = timezone.utc
+        decimal: Callable[[Union[int, float]], RP2Decimal] = _to_decimal
+        return [
+            HistoricalBar(
+                duration=duration,
+                timestamp=from_timestamp(int(candle[0]) / _MS_IN_SECOND, utc),
+                open=decimal(candle[1]),
+                high=decimal(candle[2]),
+                low=decimal(candle[3]),
+                close=decimal(candle[4]),
+                volume=decimal(candle[5]),
+            )
+            for candle in historical_data
+        ]
+
     def _add_alternative_markets(self, graph: MappedGraph[str], current_markets: Dict[str, List[str]]) -> None:
         for base_asset, quote_asset in _ALT_MARKET_BY_BASE_DICT.items():
             alt_market = base_asset + quote_asset
@@ -737,10 +946,11 @@ class AbstractCcxtPairConverterPlugin(AbstractPairConverterPlugin):
             current_markets[alt_market] = [alt_exchange_name]
 
             # Cache the exchange so that we can pull prices from it later
-            if alt_exchange_name not in self.__exchanges:
-                self._logger.debug("Added Alternative Exchange: %s", alt_exchange_name)
-                alt_exchange: Exchange = _EXCHANGE_DICT[alt_exchange_name]()
-                self.__exchanges[alt_exchange_name] = alt_exchange
+            with self.__client_lock:
+                if alt_exchange_name not in self.__exchanges:
+                    self._logger.debug("Added Alternative Exchange: %s", alt_exchange_name)
+                    alt_exchange: Exchange = self._create_exchange(alt_exchange_name)
+                    self.__exchanges[alt_exchange_name] = alt_exchange
 
             # If the asset name doesn't exist, the MappedGraph will create a vertex with that name and add it to the graph
             # If it does exist it will look it up in the dictionary by name and add the neighbor to that vertex.
@@ -748,6 +958,40 @@ class AbstractCcxtPairConverterPlugin(AbstractPairConverterPlugin):
                 self._logger.debug("Added %s:%s to graph.", base_asset, quote_asset)
                 graph.add_neighbor(base_asset, quote_asset, _ALTERNATIVE_MARKET_WEIGHT)
 
+    def _cache_manifest_graph_snapshots(self, exchange: str) -> None:
+        # Building snapshots is dominated by REST calls, so the snapshots of the other exchanges in the manifest are built alongside
+        # the requested one. Exchanges priced on the same exchange are built one after the other to stay within its request limits.
+        exchanges: Set[str] = {exchange}
+        if self._manifest:
+            exchanges.update(self._manifest.exchanges)
+        # key: exchange used for pricing, value: exchanges priced on it that still need snapshots
+        pricing_exchange_2_exchanges: Dict[str, List[str]] = {}
+        for manifest_exchange in sorted(exchanges):
+            if manifest_exchange not in self.__exchange_2_graph_tree:
+                pricing_exchange_2_exchanges.setdefault(self._get_pricing_exchange_for_exchange(manifest_exchange), []).append(manifest_exchange)
+
+        if len(pricing_exchange_2_exchanges) == 1:
+            for pending_exchange in next(iter(pricing_exchange_2_exchanges.values())):
+                self._cache_graph_snapshots_for(pending_exchange, exchange)
+            return
+
+        with ThreadPool(len(pricing_exchange_2_exchanges)) as pool:
+            pool.map(
+                lambda pending_exchanges: [self._cache_graph_snapshots_for(pending_exchange, exchange) for pending_exchange in pending_exchanges],
+                pricing_exchange_2_exchanges.values(),
+            )
+
+    # Only the snapshots of the requested exchange are needed now: the other exchanges of the manifest may never be priced, so
+    # failing to build theirs (e.g. markets that can't be loaded) doesn't abort the run. They are built again on first use, if any.
+    def _cache_graph_snapshots_for(self, exchange: str, requested_exchange: str) -> None:
+        if exchange == requested_exchange:
+            self._cache_graph_snapshots(exchange)
+            return
+        try:
+            self._cache_graph_snapshots(exchange)
+        except Exception as exc:  # pylint: disable=broad-except
+            self._logger.warning("Unable to build graph snapshots for %s ahead of time, retrying when it is priced: %s", exchange, exc)
+
     def _cache_graph_snapshots(self, exchange: str) -> None:
         # TO BE IMPLEMENTED - If asset is missing from manifest, warn user and reoptimize.
         if self.__exchange_2_graph_tree.get(exchange):
@@ -755,12 +999,21 @@ class AbstractCcxtPairConverterPlugin(AbstractPairConverterPlugin):
                 f"Internal Error: You have already generated graph snapshots for exchange - {exchange}. " f"Optimization can only be performed once."
             )
 
-        if self._manifest:
-            unoptimized_graph: MappedGraph[str] = self._generate_unoptimized_graph(exchange)
-        else:
+        if not self._manifest:
             # TO BE IMPLEMENTED - Set a default start time of the earliest possible crypto trade.
             raise RP2ValueError("Internal error: No manifest provided for the CCXT pair converter plugin. Unable to optimize the graph.")
 
+        # Snapshots only depend on the manifest, the plugin configuration and the markets, so a recent build can be reused as is
+        graph_cache_key: str = f"{self.cache_key()}-{exchange}-graph"
+        digest: str = self._graph_snapshots_digest(exchange)
+        cached_snapshots: Optional[_CachedGraphSnapshots] = load_from_cache(graph_cache_key, _GRAPH_SNAPSHOTS_CACHE_TTL)
+        if isinstance(cached_snapshots, _CachedGraphSnapshots) and cached_snapshots.digest == digest:
+            self._logger.debug("Loaded graph snapshots for %s from cache", exchange)
+            self._restore_graph_snapshots(exchange, cached_snapshots)
+            return
+
+        unoptimized_graph: MappedGraph[str] = self._generate_unoptimized_graph(exchange)
+
         # Key: name of asset being optimized, value: key -> neighboring asset, value -> weight of the connection
         optimizations: Dict[datetime, Dict[str, Dict[str, float]]]
         optimizations = self._optimize_assets_for_exchange(
@@ -772,24 +1025,82 @@ class AbstractCcxtPairConverterPlugin(AbstractPairConverterPlugin):
         self._logger.debug("Optimizations created for graph: %s", optimizations)
 
         exchange_tree: AVLTree[datetime, MappedGraph[str]] = AVLTree[datetime, MappedGraph[str]]()
+        snapshot_timestamps: List[datetime] = []
+        snapshot_graphs: List[MappedGraph[str]] = []
         pruned_graph: MappedGraph[str] = unoptimized_graph.prune_graph(optimizations[next(iter(optimizations))])
+        # Optimizations are sorted by timestamp, so the previous graph is always the last snapshot added
         for timestamp, optimization in optimizations.items():
             # Since weeks don't align across exchanges, optimizations from previous graphs, which may correspond to different
             # sources with different starting days for weeks (e.g. source A starts on Monday, source B starts on Thursday)
-            previous_graph: Optional[MappedGraph[str]] = exchange_tree.find_max_value_less_than(timestamp)
+            previous_graph: Optional[MappedGraph[str]] = snapshot_graphs[-1] if snapshot_graphs else None
             graph_snapshot: MappedGraph[str]
             if previous_graph:
                 graph_snapshot = previous_graph.clone_with_optimization(optimization)
             else:
                 graph_snapshot = pruned_graph.clone_with_optimization(optimization)
             exchange_tree.insert_node(timestamp, graph_snapshot)
+            snapshot_timestamps.append(timestamp)
+            snapshot_graphs.append(graph_snapshot)
             self._logger.debug("Added graph snapshot AVLTree for %s for timestamp: %s", exchange, timestamp)
 
         self.__exchange_2_graph_tree[exchange] = exchange_tree
+        self.__exchange_2_snapshots[exchange] = (snapshot_timestamps, snapshot_graphs)
+        save_to_cache(
+            graph_cache_key,
+            _CachedGraphSnapshots(
+                digest=digest,
+                markets=self.__exchange_markets[exchange],
+                snapshots=[(timestamp, graph.to_edges()) for timestamp, graph in zip(snapshot_timestamps, snapshot_graphs)],
+            ),
+        )
 
         # Add unoptimized_graph to the last week?
 
-    def _find_following_monday(self, timestamp: datetime) -> datetime:
+    def _graph_snapshots_digest(self, exchange: str) -> str:
+        manifest: Optional[TransactionManifest] = self._manifest
+        if manifest is None:
+            raise RP2ValueError("Internal error: No manifest provided for the CCXT pair converter plugin. Unable to optimize the graph.")
+        digest_source: str = repr(
+            (
+                exchange,
+                sorted(manifest.assets),
+                manifest.first_transaction_datetime.isoformat(),
+                sorted(self.__untradeable_assets),
+                self.__aliases,
+                self.__exchange_locked,
+                self.__default_exchange,
+                self._fiat_list,
+            )
+        )
+        return hashlib.blake2b(digest_source.encode("utf-8")).hexdigest()
+
+    def _restore_graph_snapshots(self, exchange: str, cached_snapshots: _CachedGraphSnapshots) -> None:
+        pricing_exchange: str = self._get_pricing_exchange_for_exchange(exchange)
+        self._get_exchange_client(exchange, pricing_exchange)
+        with self.__client_lock:
+            # Alternative markets are priced on other exchanges, which need their own clients
+            for market_exchanges in cached_snapshots.markets.values():
+                for market_exchange in market_exchanges:
+                    if market_exchange in _EXCHANGE_DICT and market_exchange not in self.__exchanges:
+                        self.__exchanges[market_exchange] = self._create_exchange(market_exchange)
+        self.__exchange_markets[exchange] = cached_snapshots.markets
+
+        exchange_tree: AVLTree[datetime, MappedGraph[str]] = AVLTree[datetime, MappedGraph[str]]()
+        snapshot_timestamps: List[datetime] = []
+        snapshot_graphs: List[MappedGraph[str]] = []
+        for timestamp, edges in cached_snapshots.snapshots:
+            graph_snapshot: MappedGraph[str] = MappedGraph[str].from_edges(edges)
+            exchange_tree.insert_node(timestamp, graph_snapshot)
+            snapshot_timestamps.append(timestamp)
+            snapshot_graphs.append(graph_snapshot)
+
+        self.__exchange_2_graph_tree[exchange] = exchange_tree
+        self.__exchange_2_snapshots[exchange] = (snapshot_timestamps, snapshot_graphs)
+
+    # Week boundaries only depend on the timestamp: each distinct timestamp is computed once
+    @staticmethod
+    @lru_cache(maxsize=_WEEK_BOUNDARY_CACHE_SIZE)
+    def _find_following_monday(timestamp: datetime) -> datetime:
         following_monday: datetime = timestamp + timedelta(days=-timestamp.weekday(), weeks=1)
         return following_monday.replace(hour=0, minute=0, second=0, microsecond=0)
 
@@ -820,13 +1131,7 @@ class AbstractCcxtPairConverterPlugin(AbstractPairConverterPlugin):
         pricing_exchange: str = self._get_pricing_exchange_for_exchange(exchange)
         exchange_name: str = exchange
 
-        if exchange_name not in self.__exchanges:
-            # initializes the cctx exchange instance which is used to get the historical data
-            # https://docs.ccxt.com/en/latest/manual.html#notes-on-rate-limiter
-            self._logger.debug("Trying to instantiate exchange %s", exchange)
-            current_exchange = _EXCHANGE_DICT[pricing_exchange]({"enableRateLimit": True})
-        else:
-            current_exchange = self.__exchanges[exchange_name]
+        current_exchange: Exchange = self._get_exchange_client(exchange_name, pricing_exchange)
 
         # key: market, value: exchanges where the market is available in order of priority
         current_markets: Dict[str, List[str]] = {}
@@ -836,16 +1141,26 @@ class AbstractCcxtPairConverterPlugin(AbstractPairConverterPlugin):
         for alias in current_graph.aliases:
             current_markets[f"{alias.from_asset}{alias.to_asset}"] = [exchange]
 
-        for market in filter(lambda x: x[_TYPE] == "spot" and x[_QUOTE] in _QUOTE_PRIORITY, current_exchange.fetch_markets()):
-            self._logger.debug("Market: %s", market)
-
-            current_markets[f"{market[_BASE]}{market[_QUOTE]}"] = [exchange]
+        # Exchanges list thousands of markets: each one is checked with a single quote priority lookup, which also gives its weight
+        is_debug_enabled: bool = self._logger.isEnabledFor(logging.DEBUG)
+        for market in current_exchange.fetch_markets():
+            if market[_TYPE] != "spot":
+                continue
+            quote_asset: str = market[_QUOTE]
+            quote_weight: Optional[float] = _QUOTE_PRIORITY.get(quote_asset)
+            if quote_weight is None:
+                continue
+            base_asset: str = market[_BASE]
+            if is_debug_enabled:
+                self._logger.debug("Market: %s", market)
+
+            current_markets[base_asset + quote_asset] = [exchange]
 
             # TO BE IMPLEMENTED - lazy build graph only if needed
 
             # If the asset name doesn't exist, the MappedGraph will create a vertex with that name and add it to the graph
             # If it does exist it will look it up in the dictionary by name and add the neighbor to that vertex.
-            current_graph.add_neighbor(market[_BASE], market[_QUOTE], _QUOTE_PRIORITY.get(market[_QUOTE], STANDARD_WEIGHT))
+            current_graph.add_neighbor(base_asset, quote_asset, quote_weight)
 
         # Add alternative markets if they don't exist
         if not self.__exchange_locked:
@@ -854,14 +1169,60 @@ class AbstractCcxtPairConverterPlugin(AbstractPairConverterPlugin):
 
         self._add_fiat_edges_to_graph(current_graph, current_markets)
         self._logger.debug("Created unoptimized graph for %s : %s", exchange, current_graph)
-        self.__exchanges[exchange_name] = current_exchange
         self.__exchange_markets[exchange_name] = current_markets
 
         return current_graph
 
-    # Isolated to be mocked
-    def _get_request_delay(self, exchange: str) -> float:
-        return _REQUEST_DELAY_DICT.get(exchange, 0)
+    # An exchange shares the client of the exchange it's priced on (which may already be cached, e.g. as an alternative market
+    # exchange), so that the requests to it go through a single rate limiter and connection pool
+    def _get_exchange_client(self, exchange: str, pricing_exchange: str) -> Exchange:
+        with self.__client_lock:
+            current_exchange: Optional[Exchange] = self.__exchanges.get(exchange)
+            client_exchange: str = self.__client_exchanges.get(exchange, exchange)
+            if current_exchange is None:
+                current_exchange = self.__exchanges.get(pricing_exchange)
+                client_exchange = self.__client_exchanges.get(pricing_exchange, pricing_exchange)
+            if current_exchange is None:
+                # initializes the cctx exchange instance which is used to get the historical data
+                # https://docs.ccxt.com/en/latest/manual.html#notes-on-rate-limiter
+                self._logger.debug("Trying to instantiate exchange %s", pricing_exchange)
+                current_exchange = self._create_exchange(pricing_exchange)
+                self.__exchanges[pricing_exchange] = current_exchange
+                client_exchange = pricing_exchange
+            self.__exchanges[exchange] = current_exchange
+            self.__client_exchanges[exchange] = client_exchange
+            return current_exchange
+
+    # Exchanges priced on another exchange share its client, and with it the ccxt throttler: requests are bounded per client
+    def _get_client_exchange(self, exchange: str) -> str:
+        with self.__client_lock:
+            return self.__client_exchanges.get(exchange, exchange)
+
+    @staticmethod
+    def _create_exchange(exchange: str) -> Exchange:
+        # Excessive calls to the API within a certain window might get an IP temporarily banned: let the ccxt throttler space out
+        # requests, using the stricter delay for exchanges that need it (ccxt expects milliseconds)
+        options: Dict[str, Any] = {"enableRateLimit": True}
+        if exchange in _REQUEST_DELAY_DICT:
+            options["rateLimit"] = int(_REQUEST_DELAY_DICT[exchange] * _MS_IN_SECOND)
+        current_exchange: Exchange = _EXCHANGE_DICT[exchange](options)
+        # The client is shared by the weekly bars threads and by the exchanges priced on this one
+        serialize_throttle(current_exchange)
+        # Reuse connections (and their TLS handshakes) across requests and let the adapter retry transient gateway errors
+        adapter: HTTPAdapter = HTTPAdapter(pool_connections=_HTTP_POOL_SIZE, pool_maxsize=_HTTP_POOL_SIZE, max_retries=_HTTP_RETRY)
+        current_exchange.session.mount("http://", adapter)
+        current_exchange.session.mount("https://", adapter)
+        return current_exchange
+
+    @staticmethod
+    def _create_fiat_api_session() -> Session:
+        session: Session = Session()
+        adapter: HTTPAdapter = HTTPAdapter(
+            pool_connections=_FIAT_API_HTTP_POOL_SIZE, pool_maxsize=_FIAT_API_HTTP_POOL_SIZE, max_retries=_FIAT_API_HTTP_RETRY
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
 
     def _optimize_assets_for_exchange(
         self, unoptimized_graph: MappedGraph[str], start_date: datetime, assets: Set[str], exchange: str
@@ -872,15 +1233,11 @@ class AbstractCcxtPairConverterPlugin(AbstractPairConverterPlugin):
         market_starts: Dict[str, Dict[str, datetime]] = {}
         # Weekly candles can start on any weekday depending on the exchange, we pull a week early to make sure we pull a full week.
         week_start_date = self._get_previous_monday(start_date)
-        optimizations: Dict[datetime, Dict[str, Dict[str, float]]] = {}
-        optimizations[week_start_date] = {}
 
-        ## Alternative market initialization
-        for asset in self.__untradeable_assets:
-            optimizations[week_start_date][asset] = {}
-
-        # Stage 2: Gather all valid candidates for optimization
+        # Stage 2: Gather all valid candidates for optimization. Prices are always routed to a fiat asset, so candidates with no path
+        # to one can't be part of any route and the bars of their markets aren't worth fetching.
         optimization_candidates = self._gather_optimization_candidates(unoptimized_graph, assets)
+        optimization_candidates &= unoptimized_graph.get_vertexes_reaching(self._fiat_list)
 
         # Stage 3: Check if any of the candidates are already optimized
         self._logger.debug("Checking if any of the following candidates are optimized - %s", [candidate.name for candidate in optimization_candidates])
@@ -894,7 +1251,7 @@ class AbstractCcxtPairConverterPlugin(AbstractPairConverterPlugin):
         self.save_historical_price_cache()
 
         # Stage 5: Convert bars into optimizations
-        optimizations.update(self._generate_optimizations(child_bars, market_starts, week_start_date))
+        optimizations: Dict[datetime, Dict[str, Dict[str, float]]] = self._generate_optimizations(child_bars, market_starts, week_start_date)
 
         return self._refine_and_finalize_optimizations(optimizations)
 
@@ -920,6 +1277,9 @@ class AbstractCcxtPairConverterPlugin(AbstractPairConverterPlugin):
     ) -> Tuple[Dict[str, Dict[str, List[HistoricalBar]]], Dict[str, Dict[str, datetime]]]:
         child_bars: Dict[str, Dict[str, List[HistoricalBar]]] = {}
         market_starts: Dict[str, Dict[str, datetime]] = {}
+        markets: List[Tuple[str, str]] = []
+        # key: exchange whose client prices the market, value: markets (child, neighbor) with the name of the exchange they are listed on
+        client_exchange_2_markets: Dict[str, List[Tuple[str, str, str]]] = {}
         for child_name in unoptimized_assets:
             child_bars[child_name] = {}
             market_starts[child_name] = {}
@@ -928,28 +1288,73 @@ class AbstractCcxtPairConverterPlugin(AbstractPairConverterPlugin):
 
             for neighbor in child_neighbors:
                 if neighbor in optimization_candidates:
-                    bar_check = self.find_historical_bars(
-                        child_name, neighbor.name, week_start_date, self.__exchange_markets[exchange][child_name + neighbor.name][0], True, _ONE_WEEK
+                    markets.append((child_name, neighbor.name))
+                    market_exchange: str = self.__exchange_markets[exchange][child_name + neighbor.name][0]
+                    client_exchange_2_markets.setdefault(self._get_client_exchange(market_exchange), []).append(
+                        (child_name, neighbor.name, market_exchange)
                     )
-                    if bar_check:
-                        no_market_padding = HistoricalBar(
-                            duration=bar_check[0].duration,
-                            timestamp=bar_check[0].timestamp - timedelta(weeks=MARKET_PADDING_IN_WEEKS),
-                            open=bar_check[0].open,
-                            high=bar_check[0].high,
-                            low=bar_check[0].low,
-                            close=bar_check[0].close,
-                            volume=bar_check[0].volume,
-                        )
-                        bar_check = [no_market_padding] + bar_check
-                        child_bars[child_name][neighbor.name] = bar_check
-                        market_starts[child_name][neighbor.name] = bar_check[0].timestamp
-                    else:
-                        # This is a bogus market, either the exchange is misreporting it or it is not available from first transaction datetime
-                        # By setting the start date far into the future this market will be deleted from the graph snapshots
-                        market_starts[child_name][neighbor.name] = datetime.now() + MANY_YEARS_IN_THE_FUTURE
+
+        # Each client gets its own threads, so waiting on a slow exchange (e.g. Kraken) doesn't hold up the others. Clients with a
+        # request delay are queried one market at a time. The markets of the others are split among a few threads: their requests
+        # are still sent at the rate limit of the client, since _create_exchange() serializes its throttle, but the responses are
+        # waited for in parallel. Each thread fetches its share of the markets one after the other.
+        market_shares: List[List[Tuple[str, str, str]]] = []
+        for client_exchange, client_markets in client_exchange_2_markets.items():
+            thread_count: int = 1 if client_exchange in _REQUEST_DELAY_DICT else min(_WEEKLY_BARS_THREADS_PER_EXCHANGE, len(client_markets))
+            market_shares.extend(client_markets[index::thread_count] for index in range(thread_count))
+
+        market_2_bars: Dict[Tuple[str, str], Optional[List[HistoricalBar]]] = {}
+        if market_shares:
+            with ThreadPool(len(market_shares)) as pool:
+                for exchange_bars in pool.imap_unordered(lambda market_share: self._find_weekly_bars(market_share, week_start_date), market_shares):
+                    market_2_bars.update(exchange_bars)
+
+        for child_name, neighbor_name in markets:
+            bar_check = market_2_bars[(child_name, neighbor_name)]
+            if bar_check:
+                no_market_padding = HistoricalBar(
+                    duration=bar_check[0].duration,
+                    timestamp=bar_check[0].timestamp - timedelta(weeks=MARKET_PADDING_IN_WEEKS),
+                    open=bar_check[0].open,
+                    high=bar_check[0].high,
+                    low=bar_check[0].low,
+                    close=bar_check[0].close,
+                    volume=bar_check[0].volume,
+                )
+                bar_check = [no_market_padding] + bar_check
+                child_bars[child_name][neighbor_name] = bar_check
+                market_starts[child_name][neighbor_name] = bar_check[0].timestamp
+            else:
+                # This is a bogus market, either the exchange is misreporting it or it is not available from first transaction datetime
+                # By setting the start date far into the future this market will be deleted from the graph snapshots
+                market_starts[child_name][neighbor_name] = _FAR_FUTURE
         return child_bars, market_starts
 
+    # Markets are (from asset, to asset, exchange they are listed on)
+    def _find_weekly_bars(self, markets: List[Tuple[str, str, str]], week_start_date: datetime) -> Dict[Tuple[str, str], Optional[List[HistoricalBar]]]:
+        result: Dict[Tuple[str, str], Optional[List[HistoricalBar]]] = {}
+        for from_asset, to_asset, exchange in markets:
+            # Graphs of different exchanges share markets (e.g. the alternative ones), so the weekly bars of a market are fetched
+            # once per optimization start and reused, including when the market turned out to have no bars at all
+            key: Tuple[str, str, str, datetime] = (from_asset, to_asset, exchange, week_start_date)
+            if key not in self.__weekly_bars:
+                with self._get_exchange_request_slots(exchange):
+                    self.__weekly_bars[key] = self.find_historical_bars(from_asset, to_asset, week_start_date, exchange, True, _ONE_WEEK)
+            result[(from_asset, to_asset)] = self.__weekly_bars[key]
+        return result
+
+    # The rate of the requests is enforced by the throttler of the client (see serialize_throttle()), the slots only bound how many
+    # of them are in flight at once. They belong to the client, which exchanges priced on another exchange share. Clients with a
+    # request delay get a single slot, so their requests never overlap, the others get one slot per weekly bars thread.
+    def _get_exchange_request_slots(self, exchange: str) -> BoundedSemaphore:
+        with self.__client_lock:
+            client_exchange: str = self._get_client_exchange(exchange)
+            if client_exchange not in self.__exchange_request_slots:
+                self.__exchange_request_slots[client_exchange] = BoundedSemaphore(
+                    1 if client_exchange in _REQUEST_DELAY_DICT else _WEEKLY_BARS_THREADS_PER_EXCHANGE
+                )
+            return self.__exchange_request_slots[client_exchange]
+
     # We sort the bars first by timestamp, then by asset, then by the asset's neighbor and
     # the volume of the market (asset/neighbor) at that time duration. Later, the volumes of all markets
     # for this asset are compared and used to detemine the weight of the edge in the graph
@@ -959,46 +1364,66 @@ class AbstractCcxtPairConverterPlugin(AbstractPairConverterPlugin):
         market_starts: Dict[str, Dict[str, datetime]],
         week_start_date: datetime,
     ) -> Dict[datetime, Dict[str, Dict[str, float]]]:
-        optimizations: Dict[datetime, Dict[str, Dict[str, float]]] = {week_start_date: {}}
-        for crypto_asset, neighbor_assets in child_bars.items():
-            for neighbor_asset, historical_bars in neighbor_assets.items():
-                for historical_bar in historical_bars:
-                    timestamp = historical_bar.timestamp
-                    volume = historical_bar.volume
-
-                    if timestamp not in optimizations:
-                        optimizations[timestamp] = {}
-                    if crypto_asset not in optimizations[timestamp]:
-                        optimizations[timestamp][crypto_asset] = {}
-
-                    if timestamp < market_starts[crypto_asset].get(neighbor_asset, week_start_date):
-                        # This is meant as a sanity check to make sure we don't route a price before the market starts
-                        # If we try to lookup a price before week_start_date - MARKET_PADDING_IN_WEEKS, we will get an error
-                        # Unless it is an untradeable asset, in which case we will give it a price of 0.
-                        optimizations[timestamp][crypto_asset][neighbor_asset] = -1.0
-                    else:
-                        optimizations[timestamp][crypto_asset][neighbor_asset] = float(volume)
+        optimizations: Dict[datetime, Dict[str, Dict[str, float]]] = {}
+        # The bars of each market are sorted by time, so merging the markets yields the volumes of every market week after week:
+        # the optimizations are built in time order and don't need to be sorted again
+        market_volumes: List[Iterator[Tuple[datetime, str, str, float]]] = [
+            self._market_volumes(crypto_asset, neighbor_asset, historical_bars, market_starts[crypto_asset].get(neighbor_asset, week_start_date))
+            for crypto_asset, neighbor_assets in child_bars.items()
+            for neighbor_asset, historical_bars in neighbor_assets.items()
+        ]
+        # Each week is filled in one go: the snapshot and asset dicts are only created when first needed, rather than allocating
+        # throwaway setdefault() defaults and looking the week up again for every volume
+        for timestamp, week_volumes in groupby(merge(*market_volumes), key=itemgetter(0)):
+            if week_start_date < timestamp and week_start_date not in optimizations:
+                optimizations[week_start_date] = {}
+            snapshot_assets: Dict[str, Dict[str, float]] = {}
+            for _, crypto_asset, neighbor_asset, volume in week_volumes:
+                neighbor_volumes: Optional[Dict[str, float]] = snapshot_assets.get(crypto_asset)
+                if neighbor_volumes is None:
+                    neighbor_volumes = snapshot_assets[crypto_asset] = {}
+                neighbor_volumes[neighbor_asset] = volume
+            optimizations[timestamp] = snapshot_assets
+        optimizations.setdefault(week_start_date, {})
         return optimizations
 
+    @staticmethod
+    def _market_volumes(
+        crypto_asset: str, neighbor_asset: str, historical_bars: List[HistoricalBar], market_start: datetime
+    ) -> Iterator[Tuple[datetime, str, str, float]]:
+        for historical_bar in historical_bars:
+            if historical_bar.timestamp < market_start:
+                # This is meant as a sanity check to make sure we don't route a price before the market starts
+                # If we try to lookup a price before week_start_date - MARKET_PADDING_IN_WEEKS, we will get an error
+                # Unless it is an untradeable asset, in which case we will give it a price of 0.
+                yield historical_bar.timestamp, crypto_asset, neighbor_asset, -1.0
+            else:
+                yield historical_bar.timestamp, crypto_asset, neighbor_asset, float(historical_bar.volume)
+
     def _refine_and_finalize_optimizations(self, optimizations: Dict[datetime, Dict[str, Dict[str, float]]]) -> Dict[datetime, Dict[str, Dict[str, float]]]:
-        sorted_optimizations = dict(sorted(optimizations.items(), key=lambda x: x[0]))
+        # Optimizations are generated in time order, so they only need to be sorted if they were assembled out of order
+        timestamps: List[datetime] = list(optimizations)
+        sorted_optimizations: Dict[datetime, Dict[str, Dict[str, float]]] = optimizations
+        if any(later < earlier for earlier, later in zip(timestamps, timestamps[1:])):
+            sorted_optimizations = dict(sorted(optimizations.items(), key=lambda x: x[0]))
         previous_assets: Optional[Dict[str, Dict[str, float]]] = None
         timestamps_to_delete: List[datetime] = []
 
-        # Assign weights based on the rank of the volume for the market
+        is_debug_enabled: bool = self._logger.isEnabledFor(logging.DEBUG)
+
+        # Assign weights based on the rank of the volume for the market. Volumes are never negative, so the -1.0 markers sort
+        # last and every real market gets its rank as weight.
+        by_volume: Callable[[Tuple[str, float]], float] = itemgetter(1)
         for timestamp, snapshot_assets in sorted_optimizations.items():
             for asset, neighbors in snapshot_assets.items():
-                ranked_neighbors: Dict[str, float] = dict(sorted(iter(neighbors.items()), key=lambda x: x[1], reverse=True))
-                weight: float = 1.0
-                for neighbor_name, neighbor_volume in ranked_neighbors.items():
+                for rank, (neighbor_name, neighbor_volume) in enumerate(sorted(neighbors.items(), key=by_volume, reverse=True), start=1):
                     if neighbor_volume != -1.0:
-                        neighbors[neighbor_name] = weight
-                        weight += 1.0
-                        self._logger.debug("Optimization for %s to %s at %s is %s", asset, neighbor_name, timestamp, neighbors[neighbor_name])
-                    else:
-                        neighbors[neighbor_name] = -1.0
+                        neighbors[neighbor_name] = float(rank)
+                        if is_debug_enabled:
+                            self._logger.debug("Optimization for %s to %s at %s is %s", asset, neighbor_name, timestamp, neighbors[neighbor_name])
 
-            # mark duplicate successive snapshots
+            # mark duplicate successive snapshots: dict equality already stops at the first differing size, key or weight, so only
+            # weeks that really are duplicates get compared in full
             if snapshot_assets == previous_assets:
                 timestamps_to_delete.append(timestamp)
 
@@ -1025,10 +1450,32 @@ class AbstractCcxtPairConverterPlugin(AbstractPairConverterPlugin):
 
         return processed_aliases
 
-    def _get_previous_monday(self, date: datetime) -> datetime:
+    # fiat_priority is a list of fiat in JSON format (e.g. ["EUR", "USD"]): the first one gets the lowest (best) weight
+    def _process_fiat_priority(self, fiat_priority: str, weight: float, increment: float) -> Dict[str, float]:
+        try:
+            fiat_list: Any = json.loads(fiat_priority)
+        except JSONDecodeError as exc:
+            raise RP2ValueError(f"fiat_priority must be a list of fiat in JSON format (e.g. [\"EUR\", \"USD\"]): {fiat_priority}") from exc
+        if not isinstance(fiat_list, list) or not all(isinstance(fiat, str) for fiat in fiat_list):
+            raise RP2ValueError(f"fiat_priority must be a list of fiat in JSON format (e.g. [\"EUR\", \"USD\"]): {fiat_priority}")
+
+        return {intern(fiat): weight + index * increment for index, fiat in enumerate(fiat_list)}
+
+    @staticmethod
+    @lru_cache(maxsize=_WEEK_BOUNDARY_CACHE_SIZE)
+    def _get_previous_monday(date: datetime) -> datetime:
         days_behind = (date.weekday() + 1) % DAYS_IN_WEEK
         return date - timedelta(days=days_behind)
 
+    def _get_daily_fiat_exchange_rate(self, timestamp: datetime, from_asset: str, to_asset: str) -> Optional[HistoricalBar]:
+        key: AssetPairAndTimestamp = self._floor_key(AssetPairAndTimestamp(timestamp, from_asset, to_asset, _FIAT_EXCHANGE), True)
+        result: Optional[HistoricalBar] = self.__fiat_daily_cache.get(key)
+        if result is None:
+            result = self._get_fiat_exchange_rate(timestamp, from_asset, to_asset)
+            if result is not None:
+                self.__fiat_daily_cache[key] = result
+        return result
+
     def _get_fiat_exchange_rate(self, timestamp: datetime, from_asset: str, to_asset: str) -> Optional[HistoricalBar]:
         raise NotImplementedError("The _get_fiat_exchange_rate method must be overridden.")
 
@@ -1039,30 +1486,32 @@ class AbstractCcxtPairConverterPlugin(AbstractPairConverterPlugin):
         if not self._fiat_list:
             self._build_fiat_list()
 
-        return asset in self._fiat_list
+        return asset in self._fiat_set
 
+    # Called for every conversion and every hop of a route: the fiat list is checked once and the lookups short-circuit
     def _is_fiat_pair(self, from_asset: str, to_asset: str) -> bool:
-        return self._is_fiat(from_asset) and self._is_fiat(to_asset)
+        if not self._fiat_list:
+            self._build_fiat_list()
+
+        fiat_set: FrozenSet[str] = self._fiat_set
+        return from_asset in fiat_set and to_asset in fiat_set
 
     def _add_fiat_edges_to_graph(self, graph: MappedGraph[str], markets: Dict[str, List[str]]) -> None:
         if not self._fiat_list:
             self._build_fiat_list()
 
-        for fiat in self._fiat_list:
-            to_fiat_list: Dict[str, None] = dict.fromkeys(self._fiat_list.copy())
-            del to_fiat_list[fiat]
+        # Built once: the fiat itself is skipped instead of copying the list for every fiat
+        fiats: Tuple[str, ...] = tuple(self._fiat_list)
+        for fiat in fiats:
             # We don't want to add a fiat vertex here because that would allow a double hop on fiat (eg. USD -> KRW -> JPY)
-            if graph.get_vertex(fiat):
-                for to_be_added_fiat in to_fiat_list:
-                    graph.add_fiat_neighbor(
-                        fiat,
-                        to_be_added_fiat,
-                        self._fiat_priority.get(fiat, STANDARD_WEIGHT),
-                        True,  # use set optimization
-                    )
-
-                LOGGER.debug("Added to assets for %s: %s", fiat, to_fiat_list)
+            if graph.get_vertex(fiat) is not None:
+                to_fiats: List[str] = [to_fiat for to_fiat in fiats if to_fiat != fiat]
+                graph.add_fiat_neighbors(
+                    fiat,
+                    to_fiats,
+                    self._fiat_priority.get(fiat, STANDARD_WEIGHT),
+                    True,  # use set optimization
+                )
+                LOGGER.debug("Added to assets for %s: %s", fiat, to_fiats)
 
-            for to_fiat in to_fiat_list:
-                fiat_market = f"{fiat}{to_fiat}"
-                markets[fiat_market] = [_FIAT_EXCHANGE]
+        markets.update({f"{fiat}{to_fiat}": _FIAT_EXCHANGE_LIST for fiat in fiats for to_fiat in fiats if to_fiat != fiat})
@@ -12,8 +12,11 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import logging
 from datetime import datetime
-from typing import Any, Dict, NamedTuple, Optional, cast
+from sys import intern
+from threading import Lock
+from typing import Any, Dict, NamedTuple, Optional, Tuple, cast
 
 from rp2.rp2_decimal import RP2Decimal
 from rp2.rp2_error import RP2TypeError
@@ -42,14 +45,31 @@ class AbstractPairConverterPlugin:
             raise RP2TypeError(
                 f"historical_price_type must be one of {', '.join(sorted(HISTORICAL_PRICE_KEYWORD_SET))}, instead it was: {historical_price_type}"
             )
-        try:
-            result = cast(Dict[AssetPairAndTimestamp, HistoricalBar], load_from_cache(self.cache_key()))
-        except EOFError:
-            LOGGER.error("EOFError: Cached file corrupted, no cache found.")
-            result = None
-        self._cache: Dict[AssetPairAndTimestamp, Any] = result if result is not None else {}
+        # The price cache is loaded on first use: plugins that end up answering no query (e.g. fallback pair converters) don't pay
+        # for unpickling it, and neither does the start of the run. Plugins can look prices up from several threads, hence the lock.
+        self.__cache: Optional[Dict[AssetPairAndTimestamp, Any]] = None
+        self.__cache_load_lock: Lock = Lock()
         self.__historical_price_type: str = historical_price_type
 
+    @property
+    def _cache(self) -> Dict[AssetPairAndTimestamp, Any]:
+        cache: Optional[Dict[AssetPairAndTimestamp, Any]] = self.__cache
+        if cache is None:
+            with self.__cache_load_lock:
+                if self.__cache is None:
+                    self.__cache = self.__load_historical_price_cache()
+                cache = self.__cache
+        return cache
+
+    @_cache.setter
+    def _cache(self, cache: Dict[AssetPairAndTimestamp, Any]) -> None:
+        self.__cache = cache
+
+    def __load_historical_price_cache(self) -> Dict[AssetPairAndTimestamp, Any]:
+        # Truncated or corrupted cache files load as None, like missing ones
+        result = cast(Optional[Dict[AssetPairAndTimestamp, HistoricalBar]], load_from_cache(self.cache_key()))
+        return result if result is not None else {}
+
     def name(self) -> str:
         raise NotImplementedError("Abstract method: it must be implemented in the plugin class")
 
@@ -71,33 +91,38 @@ class AbstractPairConverterPlugin:
         raise NotImplementedError("Abstract method: it must be implemented in the plugin class")
 
     def save_historical_price_cache(self) -> None:
-        save_to_cache(self.cache_key(), self._cache)
+        # A cache that was never loaded was neither read nor written: the file on disk is already up to date
+        if self.__cache is not None:
+            save_to_cache(self.cache_key(), self.__cache)
 
     def get_conversion_rate(self, timestamp: datetime, from_asset: str, to_asset: str, exchange: str) -> Optional[RP2Decimal]:
         result: Optional[RP2Decimal] = None
         historical_bar: Optional[HistoricalBar] = None
-        key: AssetPairAndTimestamp = AssetPairAndTimestamp(timestamp, from_asset, to_asset, exchange)
-        log_message_qualifier: str = ""
-        if key in self._cache:
-            historical_bar = self._cache[key]
-            log_message_qualifier = "cache of "
-        else:
+        # Asset and exchange names come from a small vocabulary: interned, they compare by identity when the key is found in the cache.
+        # A plain tuple hashes and compares like the AssetPairAndTimestamp it mirrors, but is cheaper to build: the named key is only
+        # built when a new bar is stored.
+        key: Tuple[datetime, str, str, str] = (timestamp, intern(from_asset), intern(to_asset), intern(exchange))
+        # Most lookups are cache hits: a single probe finds the bar (bars are never stored as None)
+        historical_bar = self._cache.get(cast(AssetPairAndTimestamp, key))
+        is_cache_hit: bool = historical_bar is not None
+        if not is_cache_hit:
             historical_bar = self.get_historic_bar_from_native_source(timestamp, from_asset, to_asset, exchange)
             if historical_bar:
-                self._cache[key] = historical_bar
+                self._cache[AssetPairAndTimestamp._make(key)] = historical_bar
 
         if historical_bar:
             result = historical_bar.derive_transaction_price(timestamp, self.__historical_price_type)
-            LOGGER.debug(
-                "Fetched %s conversion rate %s for %s/%s->%s from %splugin %s: %s",
-                self.__historical_price_type,
-                result,
-                timestamp,
-                from_asset,
-                to_asset,
-                log_message_qualifier,
-                self.name(),
-                historical_bar,
-            )
+            if LOGGER.isEnabledFor(logging.DEBUG):
+                LOGGER.debug(
+                    "Fetched %s conversion rate %s for %s/%s->%s from %splugin %s: %s",
+                    self.__historical_price_type,
+                    result,
+                    timestamp,
+                    from_asset,
+                    to_asset,
+                    "cache of " if is_cache_hit else "",
+                    self.name(),
+                    historical_bar,
+                )
 
         return result
@@ -13,8 +13,8 @@
 # limitations under the License.
 
 from datetime import datetime
-from inspect import Parameter, signature
-from typing import Callable, Dict, List, Mapping, NamedTuple, Optional, Type, Union
+from inspect import signature
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple, Type, Union
 
 from backports.datetime_fromisoformat import MonkeyPatch
 from dateutil.parser import parse
@@ -42,8 +42,27 @@ class DirectionTypeAndNotes(NamedTuple):
     notes: str
 
 
+# can_be_unknown is False for fields whose unknown value doesn't make the transaction unresolved
+class ConstructorParameter(NamedTuple):
+    name: str
+    can_be_unknown: bool
+
+
 class AbstractTransaction:
-    _parameter_cache: Dict[Type["AbstractTransaction"], Mapping[str, Parameter]] = {}
+    # Many transactions are alive at once: slots keep them small and the slot names are mangled like the attributes
+    __slots__ = (
+        "__plugin",
+        "__unique_id",
+        "__raw_data",
+        "__timestamp",
+        "__timestamp_value",
+        "__asset",
+        "__notes",
+        "__is_spot_price_from_web",
+        "__fiat_ticker",
+        "__key",
+    )
+    _parameter_cache: Dict[Type["AbstractTransaction"], Tuple[ConstructorParameter, ...]] = {}
 
     @classmethod
     def _validate_string_field(cls, name: str, value: str, raw_data: str, disallow_empty: bool, disallow_unknown: bool) -> str:
@@ -73,12 +92,13 @@ class AbstractTransaction:
     @classmethod
     def _validate_timestamp_field(cls, name: str, value: str, raw_data: str) -> StringAndDatetime:
         value = cls._validate_string_field(name, value, raw_data, disallow_empty=True, disallow_unknown=True)
+        # ISO 8601 is what most plugins generate: the C parser handles it and the much slower dateutil parser is only a fallback
         try:
             result: datetime = datetime.fromisoformat(value)
         except ValueError:
             try:
                 result = parse(value)
-            except RP2RuntimeError as exc:
+            except (OverflowError, ValueError) as exc:
                 raise RP2RuntimeError(f"Internal error parsing {name} as datetime: {value}\n{raw_data}\n{str(exc)}") from exc
         if result.tzinfo is None:
             raise RP2RuntimeError(f"Internal error: {name} has no timezone info: {value}\n{raw_data}")
@@ -127,6 +147,8 @@ class AbstractTransaction:
         self.__fiat_ticker: Optional[str] = self._validate_optional_string_field(
             "fiat_ticker", fiat_ticker, raw_data, disallow_empty=True, disallow_unknown=True
         )
+        # Identity of the transaction, used by both __eq__ and __hash__: none of its fields change after construction
+        self.__key: Tuple[str, str, str] = (self.__unique_id, self.__plugin, self.__asset)
 
     def to_string(self, indent: int = 0, repr_format: bool = True, extra_data: Optional[List[str]] = None) -> str:
         class_specific_data: List[str] = []
@@ -161,27 +183,39 @@ class AbstractTransaction:
             return False
         if not isinstance(other, AbstractTransaction):
             raise RP2RuntimeError(f"Internal error: operand has non-AbstractTransaction value {repr(other)}")
-        result: bool = self.unique_id == other.unique_id and self.plugin == self.plugin and self.asset == self.asset
+        result: bool = self.__key == other.__key
         return result
 
     def __ne__(self, other: object) -> bool:
         return not self.__eq__(other)
 
     def __hash__(self) -> int:
-        return hash((self.unique_id, self.plugin, self.asset))
+        return hash(self.__key)
+
+    # Pickles of slotted objects carry a (None, slot dictionary) state, while caches saved before transactions had slots carry
+    # a plain attribute dictionary: its mangled names map 1:1 onto the slots, but the key has to be rebuilt
+    def __setstate__(self, state: Any) -> None:
+        slot_state: Dict[str, Any] = state[1] if isinstance(state, tuple) else state
+        for name, value in slot_state.items():
+            setattr(self, name, value)
+        if "_AbstractTransaction__key" not in slot_state:
+            self.__key = (self.__unique_id, self.__plugin, self.__asset)
 
     # Build a dictionary of constructor initialization parameters. Return true if any of them have UNKNOWN value
     def _setup_constructor_parameter_dictionary(self, parameter_dictionary: Dict[str, Union[str, bool, Optional[str], Optional[bool]]]) -> bool:
         result: bool = False
-        if self.__class__ not in self._parameter_cache:
-            self._parameter_cache[self.__class__] = signature(self.__class__).parameters
-
-        for parameter in self._parameter_cache[self.__class__]:
-            value: str = getattr(self, parameter)
-            parameter_dictionary[parameter] = value
-            if is_internal_field(parameter) or parameter == Keyword.UNIQUE_ID.value:
-                continue
-            if is_unknown(value):
+        parameters: Optional[Tuple[ConstructorParameter, ...]] = self._parameter_cache.get(self.__class__)
+        if parameters is None:
+            # Signature inspection and field classification only depend on the class: do them once per class
+            parameters = tuple(
+                ConstructorParameter(name, not is_internal_field(name) and name != Keyword.UNIQUE_ID.value) for name in signature(self.__class__).parameters
+            )
+            self._parameter_cache[self.__class__] = parameters
+
+        for parameter in parameters:
+            value: str = getattr(self, parameter.name)
+            parameter_dictionary[parameter.name] = value
+            if parameter.can_be_unknown and not result and is_unknown(value):
                 result = True
         return result
 
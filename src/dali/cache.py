@@ -15,27 +15,89 @@
 
 import os
 import pickle  # nosec
-from typing import Any
+import tempfile
+from datetime import datetime, timedelta, timezone
+from typing import Any, FrozenSet, NamedTuple, Optional, Tuple
 
 from rp2.rp2_error import RP2TypeError
 
 CACHE_DIR: str = ".dali_cache"
 
+# Cache files only hold DaLI and RP2 objects built out of standard types: unpickling is restricted to classes defined in these
+# packages, so that a tampered cache file can't run arbitrary code when it's loaded
+_ALLOWED_PACKAGES: FrozenSet[str] = frozenset({"dali", "datetime", "dateutil", "decimal", "pytz", "rp2"})
+# Globals outside of the allowed packages (or that are not classes) that pickles of the cached objects legitimately reference
+_ALLOWED_GLOBALS: FrozenSet[Tuple[str, str]] = frozenset(
+    {
+        ("builtins", "bytearray"),
+        ("builtins", "complex"),
+        ("builtins", "frozenset"),
+        ("builtins", "object"),
+        ("builtins", "set"),
+        ("collections", "OrderedDict"),
+        ("copyreg", "_reconstructor"),
+        ("pytz", "_UTC"),
+        ("pytz", "_p"),
+    }
+)
 
-def load_from_cache(cache_name: str) -> Any:
+
+# Cache files hold the data together with the time it was saved, so that caches of data that goes stale can expire
+class _CacheEntry(NamedTuple):
+    saved_at: datetime
+    data: Any
+
+
+class _CacheUnpickler(pickle.Unpickler):  # nosec
+    def find_class(self, module: str, name: str) -> Any:
+        if (module, name) in _ALLOWED_GLOBALS:
+            return super().find_class(module, name)
+        # Dotted names would be resolved attribute by attribute (e.g. dali.cache + os.system): only plain names are accepted
+        if "." not in name and module.split(".", 1)[0] in _ALLOWED_PACKAGES:
+            result: Any = super().find_class(module, name)
+            # Modules of the allowed packages also import functions, modules and classes from elsewhere: only their own classes pass
+            if isinstance(result, type) and result.__module__.split(".", 1)[0] in _ALLOWED_PACKAGES:
+                return result
+        raise pickle.UnpicklingError(f"Cache files can't reference {module}.{name}")
+
+
+# Caches loaded with a time to live are refreshed from their source once expired: an entry that can't be read back (e.g. because its
+# format changed) is refreshed the same way instead of failing the run.
+def load_from_cache(cache_name: str, time_to_live: Optional[timedelta] = None) -> Any:
     cache_path = os.path.join(CACHE_DIR, cache_name)
-    if not os.path.exists(cache_path):
+    try:
+        cache_file = open(cache_path, "rb")  # pylint: disable=consider-using-with
+    except FileNotFoundError:
         return None
-    with open(cache_path, "rb") as cache_file:
+    with cache_file:
         try:
-            result: Any = pickle.load(cache_file)  # nosec
-        except TypeError as exc:
+            result: Any = _CacheUnpickler(cache_file).load()  # nosec
+        except (EOFError, pickle.UnpicklingError):
+            # Truncated, corrupted or tampered file: treat it as missing, it will be overwritten by the next save
+            return None
+        except (AttributeError, TypeError) as exc:
+            if time_to_live is not None:
+                return None
             raise RP2TypeError(f"Cache format changed for {cache_path}: delete the cache file and rerun DaLI") from exc
-        return result
+
+    if not isinstance(result, _CacheEntry):
+        # Saved before entries carried their save time: its age is unknown
+        return None if time_to_live is not None else result
+    if time_to_live is not None and datetime.now(timezone.utc) - result.saved_at >= time_to_live:
+        return None
+    return result.data
 
 
 def save_to_cache(cache_name: str, data: Any) -> None:
-    if not os.path.exists(CACHE_DIR):
-        os.mkdir(CACHE_DIR)
-    with open(os.path.join(CACHE_DIR, cache_name), "wb") as cache_file:
-        cache_file.write(pickle.dumps(data))
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    # The pickle is staged in a temporary file next to the cache file and moved into place once complete: an interrupted run
+    # leaves the previous cache intact instead of a truncated file that would fail to load on every later run
+    staging_file_descriptor, staging_path = tempfile.mkstemp(prefix=f"{cache_name}.", suffix=".tmp", dir=CACHE_DIR)
+    try:
+        with os.fdopen(staging_file_descriptor, "wb") as cache_file:
+            # Stream the pickle into the file rather than building the whole byte string in memory first
+            pickle.dump(_CacheEntry(datetime.now(timezone.utc), data), cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(staging_path, os.path.join(CACHE_DIR, cache_name))
+    except BaseException:
+        os.remove(staging_path)
+        raise
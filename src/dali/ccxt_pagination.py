@@ -35,6 +35,10 @@ _DEFAULT_WINDOW: int = _THIRTY_DAYS_IN_MS
 _ID: str = "id"
 
 
+def _copy_params(params: Optional[Dict[str, Union[int, str, None]]]) -> Optional[Dict[str, Union[int, str, None]]]:
+    return None if params is None else dict(params)
+
+
 class PaginationDetails(NamedTuple):
     symbol: Optional[str]
     since: Optional[int]
@@ -42,7 +46,10 @@ class PaginationDetails(NamedTuple):
     params: Optional[Dict[str, Union[int, str, None]]]
 
 
+# Detail sets and iterators are created per market and per page: __slots__ keeps them small and their attribute access fast
 class AbstractPaginationDetailSet:
+    __slots__ = ("__limit", "__markets", "__params")
+
     def __init__(
         self,
         limit: Optional[int] = None,
@@ -56,6 +63,17 @@ class AbstractPaginationDetailSet:
     def __iter__(self) -> "AbstractPaginationDetailsIterator":
         raise NotImplementedError("Abstract method")
 
+    # Markets are paginated independently of each other: split the set into one set per market, so that
+    # callers can drain them concurrently. Each set gets its own copy of params, since iterators update them.
+    def split_by_market(self) -> List["AbstractPaginationDetailSet"]:
+        markets: Optional[List[str]] = self._get_markets()
+        if not markets or len(markets) == 1:
+            return [self]
+        return [self._with_market(market) for market in markets]
+
+    def _with_market(self, market: str) -> "AbstractPaginationDetailSet":
+        raise NotImplementedError("Abstract method")
+
     def _get_limit(self) -> Optional[int]:
         return self.__limit
 
@@ -67,6 +85,8 @@ class AbstractPaginationDetailSet:
 
 
 class DateBasedPaginationDetailSet(AbstractPaginationDetailSet):
+    __slots__ = ("__exchange_start_time", "__window")
+
     def __init__(
         self,
         exchange_start_time: int,
@@ -88,6 +108,9 @@ class DateBasedPaginationDetailSet(AbstractPaginationDetailSet):
             self.__window,
         )
 
+    def _with_market(self, market: str) -> "DateBasedPaginationDetailSet":
+        return DateBasedPaginationDetailSet(self.__exchange_start_time, self._get_limit(), [market], _copy_params(self._get_params()), self.__window)
+
     def _get_window(self) -> Optional[int]:
         return self.__window
 
@@ -96,6 +119,8 @@ class DateBasedPaginationDetailSet(AbstractPaginationDetailSet):
 
 
 class CustomDateBasedPaginationDetailSet(DateBasedPaginationDetailSet):
+    __slots__ = ("__start_time_key", "__end_time_key")
+
     def __init__(
         self,
         exchange_start_time: int,
@@ -111,10 +136,22 @@ class CustomDateBasedPaginationDetailSet(DateBasedPaginationDetailSet):
         self.__end_time_key: str = end_time_key
 
     def _get_window(self) -> int:
-        if self.__window:
-            return self.__window
+        window: Optional[int] = super()._get_window()
+        if window:
+            return window
         raise RP2RuntimeError("No window defined for iterator.")
 
+    def _with_market(self, market: str) -> "CustomDateBasedPaginationDetailSet":
+        return CustomDateBasedPaginationDetailSet(
+            self._get_exchange_start_time(),
+            self.__start_time_key,
+            self.__end_time_key,
+            self._get_window(),
+            self._get_limit(),
+            [market],
+            _copy_params(self._get_params()),
+        )
+
     def __iter__(self) -> "CustomDateBasedPaginationDetailsIterator":
         return CustomDateBasedPaginationDetailsIterator(
             self._get_exchange_start_time(),
@@ -128,6 +165,8 @@ class CustomDateBasedPaginationDetailSet(DateBasedPaginationDetailSet):
 
 
 class IdBasedPaginationDetailSet(AbstractPaginationDetailSet):
+    __slots__ = ("__id_param",)
+
     def __init__(
         self,
         id_param: str,
@@ -138,6 +177,9 @@ class IdBasedPaginationDetailSet(AbstractPaginationDetailSet):
         super().__init__(limit, markets, params)
         self.__id_param: str = id_param
 
+    def _with_market(self, market: str) -> "IdBasedPaginationDetailSet":
+        return IdBasedPaginationDetailSet(self.__id_param, self._get_limit(), [market], _copy_params(self._get_params()))
+
     def __iter__(self) -> "IdBasedPaginationDetailsIterator":
         return IdBasedPaginationDetailsIterator(
             self.__id_param,
@@ -148,6 +190,8 @@ class IdBasedPaginationDetailSet(AbstractPaginationDetailSet):
 
 
 class AbstractPaginationDetailsIterator:
+    __slots__ = ("__limit", "__markets", "__market_count", "__params")
+
     def __init__(self, limit: Optional[int], markets: Optional[List[str]] = None, params: Optional[Dict[str, Union[int, str, None]]] = None) -> None:
         params = {} if params is None else params
         self.__limit: Optional[int] = limit
@@ -183,6 +227,8 @@ class AbstractPaginationDetailsIterator:
 
 
 class DateBasedPaginationDetailsIterator(AbstractPaginationDetailsIterator):
+    __slots__ = ("__end_of_data", "__since", "__exchange_start_time", "__now", "__window")
+
     def __init__(
         self,
         exchange_start_time: int,
@@ -243,6 +289,8 @@ class DateBasedPaginationDetailsIterator(AbstractPaginationDetailsIterator):
 
 
 class CustomDateBasedPaginationDetailsIterator(DateBasedPaginationDetailsIterator):
+    __slots__ = ("__start_time_key", "__end_time_key")
+
     def __init__(
         self,
         exchange_start_time: int,
@@ -270,6 +318,8 @@ class CustomDateBasedPaginationDetailsIterator(DateBasedPaginationDetailsIterato
 
 
 class IdBasedPaginationDetailsIterator(AbstractPaginationDetailsIterator):
+    __slots__ = ("__end_of_data", "__last_id", "__id_param")
+
     def __init__(
         self,
         id_param: str,
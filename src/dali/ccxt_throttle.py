@@ -0,0 +1,34 @@
+# Copyright 2022 eprbell
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from threading import Lock
+from typing import Any, Callable, Optional
+
+from ccxt import Exchange
+
+
+# The throttler of a sync ccxt client isn't thread-safe: throttle() waits for the rate limit to elapse since
+# lastRestRequestTimestamp, but fetch2() only updates the timestamp after throttle() returns, without a lock. Threads sharing
+# the client all read the same timestamp and send their requests in bursts. Waiting and stamping the request under a lock of
+# the client enforces its rate limit, while the requests themselves (and the waits for their responses) still overlap.
+def serialize_throttle(client: Exchange) -> None:
+    lock: Lock = Lock()
+    throttle: Callable[..., Any] = client.throttle
+
+    def locked_throttle(cost: Optional[float] = None) -> None:
+        with lock:
+            throttle(cost)
+            client.lastRestRequestTimestamp = client.milliseconds()
+
+    client.throttle = locked_throttle
@@ -117,6 +117,10 @@ _INTERNAL_FIELD_SET: Set[str] = {
     Keyword.RAW_DATA.value,
 }
 
+# Checked for every field of every transaction: reading the enum value each time would go through the enum descriptor machinery
+_UNKNOWN: str = Keyword.UNKNOWN.value
+_UNKNOWN_OR_NONE_SET: Set[Optional[str]] = {_UNKNOWN, None}
+
 DIRECTION_SET: Set[str] = {
     Keyword.IN.value,
     Keyword.OUT.value,
@@ -231,11 +235,11 @@ def is_fiat(currency: str) -> bool:
 
 
 def is_unknown(value: str) -> bool:
-    return value == Keyword.UNKNOWN.value
+    return value == _UNKNOWN
 
 
 def is_unknown_or_none(value: Optional[str]) -> bool:
-    return value in {Keyword.UNKNOWN.value, None}
+    return value in _UNKNOWN_OR_NONE_SET
 
 
 def is_transaction_type_valid(direction: str, transaction_type: str) -> bool:
@@ -21,6 +21,20 @@ from dali.configuration import Keyword, is_transaction_type_valid
 
 
 class InTransaction(AbstractTransaction):
+    __slots__ = (
+        "__exchange",
+        "__holder",
+        "__transaction_type",
+        "__spot_price",
+        "__crypto_in",
+        "__crypto_fee",
+        "__fiat_in_no_fee",
+        "__fiat_in_with_fee",
+        "__fiat_fee",
+        "__constructor_parameter_dictionary",
+        "__is_unresolved",
+    )
+
     @classmethod
     def _validate_transaction_type_field(cls, name: str, value: str, raw_data: str) -> str:
         value = cls._validate_string_field(name, value, raw_data, disallow_empty=True, disallow_unknown=True)
@@ -21,6 +21,18 @@ from dali.configuration import Keyword, is_transaction_type_valid
 
 
 class IntraTransaction(AbstractTransaction):
+    __slots__ = (
+        "__from_exchange",
+        "__from_holder",
+        "__to_exchange",
+        "__to_holder",
+        "__spot_price",
+        "__crypto_sent",
+        "__crypto_received",
+        "__constructor_parameter_dictionary",
+        "__is_unresolved",
+    )
+
     @classmethod
     def _validate_transaction_type_field(cls, name: str, value: str, raw_data: str) -> str:
         value = cls._validate_string_field(name, value, raw_data, disallow_empty=True, disallow_unknown=True)
@@ -13,7 +13,7 @@
 # limitations under the License.
 
 from datetime import datetime, timedelta
-from typing import Dict, Iterator, List, NamedTuple, Optional, Set
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
 
 from prezzemolo.graph import Graph
 from prezzemolo.utility import ValueType
@@ -52,6 +52,16 @@ _EXCHANGE_SPECIFIC_ALIASES = {
 _UNIVERSAL: str = "UNIVERSAL"
 
 
+# Plain-data form of a MappedGraph, used to cache graph snapshots on disk. Vertexes and their neighbors are listed in insertion
+# order, so Dijkstra visits neighbors (and breaks ties) the same way on the rebuilt graph.
+class MappedGraphEdges(NamedTuple):
+    exchange: str
+    vertexes: List[Tuple[str, List[Tuple[str, float]]]]
+    optimized_assets: Set[str]
+    fiat_assets: Set[str]
+    aliases: Dict[Alias, RP2Decimal]
+
+
 class MappedGraph(Graph[ValueType]):
     def __init__(
         self,
@@ -61,6 +71,10 @@ class MappedGraph(Graph[ValueType]):
         fiat_assets: Optional[Set[str]] = None,
         aliases: Optional[Dict[str, Dict[Alias, RP2Decimal]]] = None,
     ) -> None:
+        # key: name of the source asset, value: Dijkstra parent of every vertex reachable from it
+        self.__source_2_parents: Dict[str, Dict[Vertex[ValueType], Optional[Vertex[ValueType]]]] = {}
+        # key: (from asset, to asset), value: names of the assets along the shortest path, or None if there is no path
+        self.__route_cache: Dict[Tuple[str, str], Optional[List[str]]] = {}
         super().__init__(vertexes)
         self.__exchange: str = exchange  # Temporary until teleportation
         self.__name_to_vertex: Dict[str, Vertex[ValueType]] = {vertex.name: vertex for vertex in vertexes} if vertexes else {}
@@ -106,9 +120,51 @@ class MappedGraph(Graph[ValueType]):
                 children.update(self.get_all_children_of_vertex(neighbor, visited))
         return children
 
+    # Vertexes with a path to any of the given ones (included), found walking the edges backwards from them
+    def get_vertexes_reaching(self, names: Iterable[str]) -> Set[Vertex[ValueType]]:
+        vertex_2_parents: Dict[Vertex[ValueType], List[Vertex[ValueType]]] = {}
+        for vertex in self.vertexes:
+            for neighbor in vertex.neighbors:
+                vertex_2_parents.setdefault(neighbor, []).append(vertex)
+
+        reaching: Set[Vertex[ValueType]] = {vertex for vertex in (self.__name_to_vertex.get(name) for name in names) if vertex is not None}
+        to_visit: List[Vertex[ValueType]] = list(reaching)
+        while to_visit:
+            for parent in vertex_2_parents.get(to_visit.pop(), []):
+                if parent not in reaching:
+                    reaching.add(parent)
+                    to_visit.append(parent)
+        return reaching
+
     def add_vertex(self, vertex: Vertex[ValueType]) -> None:
         super().add_vertex(vertex)
         self.__name_to_vertex[vertex.name] = vertex
+        self.__clear_routes()
+
+    # Snapshots are read-only once they are built, so a single Dijkstra pass per source asset is enough to route it to
+    # every other asset: the parents are kept and any later route from the same source is just a walk up the parent chain.
+    def get_route(self, from_vertex: Vertex[ValueType], to_vertex: Vertex[ValueType]) -> Optional[List[str]]:
+        key: Tuple[str, str] = (from_vertex.name, to_vertex.name)
+        if key in self.__route_cache:
+            return self.__route_cache[key]
+
+        vertex_2_parent: Optional[Dict[Vertex[ValueType], Optional[Vertex[ValueType]]]] = self.__source_2_parents.get(from_vertex.name)
+        if vertex_2_parent is None:
+            vertex_2_parent = {}
+            # With no end vertex Dijkstra settles the whole reachable graph. Parents never change once a vertex is settled,
+            # so the paths are the same as the ones returned by dijkstra() for each individual destination.
+            self._dijkstra(from_vertex, None, vertex_2_parent)
+            self.__source_2_parents[from_vertex.name] = vertex_2_parent
+
+        route: Optional[List[str]] = None
+        if to_vertex in vertex_2_parent:
+            route = [vertex.name for vertex in reversed(self._extract_path_from_parent_dictionary(to_vertex, vertex_2_parent))]
+        self.__route_cache[key] = route
+        return route
+
+    def __clear_routes(self) -> None:
+        self.__source_2_parents.clear()
+        self.__route_cache.clear()
 
     def get_alias_bar(self, from_asset: str, to_asset: str, timestamp: datetime) -> Optional[HistoricalBar]:
         alias_pair = Alias(from_asset, to_asset)
@@ -154,6 +210,27 @@ class MappedGraph(Graph[ValueType]):
     def optimized_assets(self) -> Set[str]:
         return self.__optimized_assets
 
+    def to_edges(self) -> MappedGraphEdges:
+        return MappedGraphEdges(
+            exchange=self.__exchange,
+            vertexes=[(vertex.name, [(neighbor.name, vertex.get_weight(neighbor)) for neighbor in vertex.neighbors]) for vertex in self.vertexes],
+            optimized_assets=self.__optimized_assets.copy(),
+            fiat_assets=self.__fiat_assets.copy(),
+            aliases=self.__aliases.copy(),
+        )
+
+    @classmethod
+    def from_edges(cls, edges: MappedGraphEdges) -> "MappedGraph[ValueType]":
+        mapped_graph: MappedGraph[ValueType] = cls(
+            edges.exchange, optimized_assets=edges.optimized_assets.copy(), fiat_assets=edges.fiat_assets.copy(), aliases={_UNIVERSAL: edges.aliases}
+        )
+        for vertex_name, _ in edges.vertexes:
+            mapped_graph.add_vertex_if_missing(vertex_name)
+        for vertex_name, neighbors in edges.vertexes:
+            for neighbor_name, weight in neighbors:
+                mapped_graph.add_neighbor(vertex_name, neighbor_name, weight)
+        return mapped_graph
+
     # Optimization contains a dict with a key of the optimized asset and a value of a dict with the optimized weights for each neighbor
     # Optimized assets are tracked to prevent requesting prices for unoptimized assets
     # Negative weights will get deleted.
@@ -163,17 +240,20 @@ class MappedGraph(Graph[ValueType]):
             self.__exchange, optimized_assets=self.__optimized_assets.copy(), fiat_assets=self.__fiat_assets.copy(), aliases={_UNIVERSAL: self.__aliases}
         )
 
+        # Every snapshot is cloned from the previous one, so this runs once per week of history: the optimization and vertex lookups
+        # are kept to dictionary probes instead of rebuilding key sets or vertex lists for every edge
         for original_vertex in self.vertexes:
-            if len(list(original_vertex.neighbors)) == 0 and original_vertex.name not in self.__fiat_assets:
+            original_neighbors: List[Vertex[ValueType]] = list(original_vertex.neighbors)
+            if not original_neighbors and original_vertex.name not in self.__fiat_assets:
                 cloned_mapped_graph.add_vertex_if_missing(original_vertex.name)
                 continue
+            vertex_optimization: Optional[Dict[str, float]] = optimization.get(original_vertex.name)
+            optimized: bool = vertex_optimization is not None
             # Add existing neighbors
-            for neighbor in original_vertex.neighbors:
+            for neighbor in original_neighbors:
                 neighbor_weight: float
-                optimized: bool = False
-                if original_vertex.name in set(optimization.keys()):
-                    neighbor_weight = optimization[original_vertex.name].pop(neighbor.name, original_vertex.get_weight(neighbor))
-                    optimized = True
+                if vertex_optimization is not None:
+                    neighbor_weight = vertex_optimization.pop(neighbor.name, original_vertex.get_weight(neighbor))
                 else:
                     neighbor_weight = original_vertex.get_weight(neighbor)
 
@@ -188,10 +268,11 @@ class MappedGraph(Graph[ValueType]):
 
         # Add new neighbors
         for optimized_asset, neighbor_weights in optimization.items():
-            for neighbor_name in neighbor_weights.keys():
-                if self.get_vertex(optimized_asset) in list(self.vertexes):
-                    cloned_mapped_graph.add_neighbor(optimized_asset, neighbor_name, neighbor_weights[neighbor_name], True)
-                    LOGGER.debug("Added while cloning %s to %s", optimized_asset, neighbor_name)
+            if self.get_vertex(optimized_asset) is None:
+                continue
+            for neighbor_name, neighbor_weight in neighbor_weights.items():
+                cloned_mapped_graph.add_neighbor(optimized_asset, neighbor_name, neighbor_weight, True)
+                LOGGER.debug("Added while cloning %s to %s", optimized_asset, neighbor_name)
 
         return cloned_mapped_graph
 
@@ -223,6 +304,7 @@ class MappedGraph(Graph[ValueType]):
         neighbor: Vertex[ValueType] = self.get_or_set_vertex(neighbor_name)
         if not vertex.has_neighbor(neighbor):
             vertex.add_neighbor(neighbor, weight)
+            self.__clear_routes()
         if optimized:
             self.__optimized_assets.add(vertex_name)
 
@@ -231,6 +313,22 @@ class MappedGraph(Graph[ValueType]):
         self.__fiat_assets.add(vertex_name)
         self.add_neighbor(vertex_name, neighbor_name, weight, optimized)
 
+    # Fiat assets are connected to all the others at once: the vertex is resolved, marked and logged once for all of its neighbors
+    def add_fiat_neighbors(self, vertex_name: str, neighbor_names: Iterable[str], weight: float = 0.0, optimized: bool = False) -> None:
+        vertex: Vertex[ValueType] = self.get_or_set_vertex(vertex_name)
+        self.__fiat_assets.add(vertex_name)
+        is_graph_changed: bool = False
+        for neighbor_name in neighbor_names:
+            neighbor: Vertex[ValueType] = self.get_or_set_vertex(neighbor_name)
+            if not vertex.has_neighbor(neighbor):
+                vertex.add_neighbor(neighbor, weight)
+                is_graph_changed = True
+        if is_graph_changed:
+            self.__clear_routes()
+        if optimized:
+            self.__optimized_assets.add(vertex_name)
+        LOGGER.debug("Added fiat neighbors %s to %s", neighbor_names, vertex_name)
+
     # No adding aliases after cloning, because that would make MappedGraph mutable
     def __add_aliases(self, aliases: Dict[Alias, RP2Decimal]) -> None:
         for market in aliases.keys():
@@ -129,7 +129,7 @@ class InputPlugin(AbstractCcxtInputPlugin):
                 holder=self.account_holder,
                 transaction_type=Keyword.INCOME.value,
                 spot_price=Keyword.UNKNOWN.value,
-                crypto_in=str(-transaction[_FEE][_COST]),
+                crypto_in=str(-RP2Decimal(str(transaction[_FEE][_COST]))),
                 crypto_fee=None,
                 fiat_in_no_fee=None,
                 fiat_in_with_fee=None,
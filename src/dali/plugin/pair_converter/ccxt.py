@@ -12,11 +12,11 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import logging
 from datetime import datetime, timedelta, timezone
 from json import JSONDecodeError
 from typing import Any, Dict, Optional, Set, Tuple
 
-import requests
 from requests.exceptions import ReadTimeout
 from requests.models import Response
 from requests.sessions import Session
@@ -24,7 +24,6 @@ from rp2.rp2_decimal import ZERO, RP2Decimal
 from rp2.rp2_error import RP2RuntimeError, RP2ValueError
 
 from dali.abstract_ccxt_pair_converter_plugin import (
-    FIAT_PRIORITY,
     STANDARD_INCREMENT,
     STANDARD_WEIGHT,
     AbstractCcxtPairConverterPlugin,
@@ -45,6 +44,7 @@ _RATES: str = "rates"
 _TO: str = "to"
 
 _DAYS_IN_SECONDS: int = 86400
+_ONE_DAY: timedelta = timedelta(seconds=_DAYS_IN_SECONDS)
 
 
 class PairConverterPlugin(AbstractCcxtPairConverterPlugin):
@@ -69,13 +69,8 @@ class PairConverterPlugin(AbstractCcxtPairConverterPlugin):
             cache_modifier=cache_modifier,
         )
         if fiat_priority:
-            weight: float = STANDARD_WEIGHT
-            for fiat in fiat_priority:
-                self._fiat_priority[fiat] = weight
-                weight += STANDARD_INCREMENT
-        else:
-            self._fiat_priority = FIAT_PRIORITY
-        self.__session: Session = requests.Session()
+            self._fiat_priority = self._process_fiat_priority(fiat_priority, STANDARD_WEIGHT, STANDARD_INCREMENT)
+        self.__session: Session = self._create_fiat_api_session()
 
     def name(self) -> str:
         return "Frankfurter"
@@ -86,7 +81,8 @@ class PairConverterPlugin(AbstractCcxtPairConverterPlugin):
         historical_bar: Optional[HistoricalBar] = self._get_bar_from_cache(key)
 
         if historical_bar is not None:
-            self._logger.debug("Retrieved cache for %s/%s->%s for %s", timestamp, from_asset, to_asset, _FRANKFURTER_EXCHANGE)
+            if self._logger.isEnabledFor(logging.DEBUG):
+                self._logger.debug("Retrieved cache for %s/%s->%s for %s", timestamp, from_asset, to_asset, _FRANKFURTER_EXCHANGE)
             return historical_bar
 
         result: Optional[HistoricalBar] = None
@@ -127,13 +123,14 @@ class PairConverterPlugin(AbstractCcxtPairConverterPlugin):
                     market: str = f"{from_asset}{to_asset}"
                     rates: Dict[str, Any] = data[_RATES]
                     previous_result: Optional[HistoricalBar] = None
+                    target_day: datetime = key.timestamp.replace(tzinfo=timezone.utc)
 
                     for day in range((end_of_year - beginning_of_year).days + 1):
                         current_day: datetime = beginning_of_year + timedelta(days=day)
                         try:
                             forex_rate: RP2Decimal = RP2Decimal(str(rates[current_day.strftime("%Y-%m-%d")][to_asset]))
                             forex_result = HistoricalBar(
-                                duration=timedelta(seconds=_DAYS_IN_SECONDS),
+                                duration=_ONE_DAY,
                                 timestamp=current_day,
                                 open=forex_rate,
                                 high=forex_rate,
@@ -143,15 +140,8 @@ class PairConverterPlugin(AbstractCcxtPairConverterPlugin):
                             )
                         except KeyError as exc:
                             if previous_result:
-                                forex_result = HistoricalBar(
-                                    duration=timedelta(seconds=_DAYS_IN_SECONDS),
-                                    timestamp=current_day,
-                                    open=previous_result.open,
-                                    high=previous_result.high,
-                                    low=previous_result.low,
-                                    close=previous_result.close,
-                                    volume=ZERO,
-                                )
+                                # Bank holiday: the previous rate carries over
+                                forex_result = previous_result._replace(timestamp=current_day)
                             else:
                                 raise RP2ValueError(f"No forex rate found for {current_day} for {from_asset} to {to_asset} in {market}") from exc
 
@@ -159,7 +149,7 @@ class PairConverterPlugin(AbstractCcxtPairConverterPlugin):
                             self._floor_key(AssetPairAndTimestamp(current_day, from_asset, to_asset, _FRANKFURTER_EXCHANGE), True), forex_result
                         )
                         previous_result = forex_result
-                        if current_day == key.timestamp.replace(tzinfo=timezone.utc):
+                        if current_day == target_day:
                             result = forex_result
 
                     # Add weekends
@@ -169,17 +159,9 @@ class PairConverterPlugin(AbstractCcxtPairConverterPlugin):
                     if (current_day + timedelta(days=3)).weekday() in [5, 6]:
                         extra_days.add(current_day + timedelta(days=3))
                     for extra_day in extra_days:
-                        forex_rate = forex_result.close
-                        forex_result = HistoricalBar(
-                            duration=timedelta(seconds=_DAYS_IN_SECONDS),
-                            timestamp=extra_day,
-                            open=forex_rate,
-                            high=forex_rate,
-                            low=forex_rate,
-                            close=forex_rate,
-                            volume=ZERO,
-                        )
-                        if extra_day == key.timestamp.replace(tzinfo=timezone.utc):
+                        # All the prices of a forex bar are the same rate: the bar only needs a new timestamp
+                        forex_result = forex_result._replace(timestamp=extra_day)
+                        if extra_day == target_day:
                             result = forex_result
                         self._add_bar_to_cache(
                             self._floor_key(AssetPairAndTimestamp(extra_day, from_asset, to_asset, _FRANKFURTER_EXCHANGE), True), forex_result
@@ -196,12 +178,6 @@ class PairConverterPlugin(AbstractCcxtPairConverterPlugin):
 
         return result
 
-    def _is_fiat(self, asset: str) -> bool:
-        if not self._fiat_list:
-            self._build_fiat_list()
-
-        return asset in self._fiat_list
-
     def _build_fiat_list(self) -> None:
         try:
             response: Response = self.__session.get(_EXCHANGE_SYMBOLS_URL, timeout=self.__TIMEOUT)
@@ -12,21 +12,20 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import logging
 from datetime import datetime, timedelta
 from json import JSONDecodeError
-from typing import Any, Dict, List, Optional
+from sys import intern
+from time import sleep
+from typing import Any, Dict, FrozenSet, List, Optional
 
-import requests
 from requests.exceptions import ReadTimeout
 from requests.models import Response
 from requests.sessions import Session
 from rp2.rp2_decimal import ZERO, RP2Decimal
 from rp2.rp2_error import RP2RuntimeError, RP2ValueError
 
-from dali.abstract_ccxt_pair_converter_plugin import (
-    FIAT_PRIORITY,
-    AbstractCcxtPairConverterPlugin,
-)
+from dali.abstract_ccxt_pair_converter_plugin import AbstractCcxtPairConverterPlugin
 from dali.abstract_pair_converter_plugin import AssetPairAndTimestamp
 from dali.historical_bar import HistoricalBar
 from dali.logger import LOGGER
@@ -35,7 +34,12 @@ from dali.logger import LOGGER
 _EXCHANGE_BASE_URL: str = "http://api.exchangerate.host/historical"
 _EXCHANGE_SYMBOLS_URL: str = "http://api.exchangerate.host/list"
 
+# Delay in seconds before the first retry of a request whose response couldn't be read, doubled at each following retry
+_RETRY_DELAY: float = 0.5
+
 _DAYS_IN_SECONDS: int = 86400
+_ONE_DAY: timedelta = timedelta(seconds=_DAYS_IN_SECONDS)
+_ONE: RP2Decimal = RP2Decimal("1")
 _FIAT_EXCHANGE: str = "exchangerate.host"
 
 # exchangerates.host keywords
@@ -71,17 +75,14 @@ class PairConverterPlugin(AbstractCcxtPairConverterPlugin):
             aliases=aliases,
             cache_modifier=cache_modifier,
         )
-        self.__fiat_list: List[str] = []
-        self._fiat_priority: Dict[str, float]
+        self.__fiat_set: FrozenSet[str] = frozenset()
         if fiat_priority:
-            weight: float = _STANDARD_WEIGHT
-            for fiat in fiat_priority:
-                self._fiat_priority[fiat] = weight
-                weight += _STANDARD_INCREMENT
-        else:
-            self._fiat_priority = FIAT_PRIORITY
+            self._fiat_priority = self._process_fiat_priority(fiat_priority, _STANDARD_WEIGHT, _STANDARD_INCREMENT)
         self.__fiat_access_key = fiat_access_key
-        self.__session: Session = requests.Session()
+        # Responses are not cached at the HTTP level: the rates they carry are already kept in the historical price cache
+        self.__session: Session = self._create_fiat_api_session()
+        # key: date, value: currency -> USD quote of the day (None if exchangerate.host has no quote for it)
+        self.__usd_rates: Dict[str, Dict[str, Optional[RP2Decimal]]] = {}
 
     def name(self) -> str:
         return "Fiat from exchangerate.host"
@@ -91,16 +92,62 @@ class PairConverterPlugin(AbstractCcxtPairConverterPlugin):
         historical_bar: Optional[HistoricalBar] = self._get_bar_from_cache(key)
 
         if historical_bar is not None:
-            LOGGER.debug("Retrieved cache for %s/%s->%s for %s", timestamp, from_asset, to_asset, _FIAT_EXCHANGE)
+            if LOGGER.isEnabledFor(logging.DEBUG):
+                LOGGER.debug("Retrieved cache for %s/%s->%s for %s", timestamp, from_asset, to_asset, _FIAT_EXCHANGE)
             return historical_bar
 
         # Currency has to be USD on free tier
         if from_asset != "USD" and to_asset != "USD":
             raise RP2ValueError("Fiat conversion is only available to/from USD at this time.")
         currency: str = from_asset if from_asset != "USD" else to_asset
-        result: Optional[HistoricalBar] = None
 
-        params: Dict[str, Any] = {_ACCESS_KEY: self.__fiat_access_key, _DATE: timestamp.strftime("%Y-%m-%d"), _CURRENCIES: currency}
+        # Only the USD->currency bar is cached: the reverse one is derived from it when it's asked for
+        usd_key: AssetPairAndTimestamp = AssetPairAndTimestamp(timestamp, "USD", currency, _FIAT_EXCHANGE)
+        usd_result: Optional[HistoricalBar] = None if from_asset == "USD" else self._get_bar_from_cache(usd_key)
+        if usd_result is None:
+            usd_rate: Optional[RP2Decimal] = self._get_usd_rate(timestamp, currency)
+            if usd_rate is None:
+                return None
+
+            # Exchangerate.host only returns one rate for the whole day and does not provide OHLCV, so
+            # all rates are the same.
+            usd_result = HistoricalBar(
+                duration=_ONE_DAY,
+                timestamp=timestamp,
+                open=usd_rate,
+                high=usd_rate,
+                low=usd_rate,
+                close=usd_rate,
+                volume=ZERO,
+            )
+            self._add_bar_to_cache(usd_key, usd_result)
+
+        if from_asset == "USD":
+            return usd_result
+
+        # Note: the from_asset and to_asset are purposely reversed
+        reverse_rate: RP2Decimal = _ONE / usd_result.close
+        return HistoricalBar(
+            duration=_ONE_DAY,
+            timestamp=timestamp,
+            open=reverse_rate,
+            high=reverse_rate,
+            low=reverse_rate,
+            close=reverse_rate,
+            volume=ZERO,
+        )
+
+    # Returns how much of the currency 1 USD buys on the day of the timestamp. The historical endpoint returns the quotes of as many
+    # currencies as requested in one response, so the first lookup of a day fetches all the fiat in the graph at once and the
+    # other currencies of that day are served from memory.
+    def _get_usd_rate(self, timestamp: datetime, currency: str) -> Optional[RP2Decimal]:
+        date: str = timestamp.strftime("%Y-%m-%d")
+        usd_rates: Optional[Dict[str, Optional[RP2Decimal]]] = self.__usd_rates.get(date)
+        if usd_rates is not None and currency in usd_rates:
+            return usd_rates[currency]
+
+        currencies: List[str] = sorted({currency}.union(self._fiat_list) - {"USD"})
+        params: Dict[str, Any] = {_ACCESS_KEY: self.__fiat_access_key, _DATE: date, _CURRENCIES: ",".join(currencies)}
         request_count: int = 0
         # exchangerate.host only gives us daily accuracy, which should be suitable for tax reporting
         while request_count < 5:
@@ -126,61 +173,41 @@ class PairConverterPlugin(AbstractCcxtPairConverterPlugin):
                 # }
                 data: Any = response.json()
 
-                # Exchangerate.host only returns one rate for the whole day and does not provide OHLCV, so
-                # all rates are the same.
-                if data[_SUCCESS]:
-                    market: str = f"USD{to_asset}" if to_asset != "USD" else f"USD{from_asset}"
-                    usd_rate: RP2Decimal = RP2Decimal(str(data[_QUOTES][market]))
-                    usd_result = HistoricalBar(
-                        duration=timedelta(seconds=_DAYS_IN_SECONDS),
-                        timestamp=timestamp,
-                        open=usd_rate,
-                        high=usd_rate,
-                        low=usd_rate,
-                        close=usd_rate,
-                        volume=ZERO,
-                    )
-                    self._add_bar_to_cache(key, usd_result)
-
-                    # Exchangerate.host only returns one rate for the whole day and does not provide OHLCV, so
-                    # all rates are the same.
-                    # Note: the from_asset and to_asset are purposely reversed
-                    reverse_key: AssetPairAndTimestamp = AssetPairAndTimestamp(timestamp, to_asset, from_asset, _FIAT_EXCHANGE)
-                    reverse_rate: RP2Decimal = RP2Decimal("1") / usd_rate
-                    reverse_result = HistoricalBar(
-                        duration=timedelta(seconds=_DAYS_IN_SECONDS),
-                        timestamp=timestamp,
-                        open=reverse_rate,
-                        high=reverse_rate,
-                        low=reverse_rate,
-                        close=reverse_rate,
-                        volume=ZERO,
-                    )
-                    self._add_bar_to_cache(reverse_key, reverse_result)
-
-                    result = usd_result
-                    if from_asset != "USD":
-                        result = reverse_result
-                break
+                if not data[_SUCCESS]:
+                    return None
+
+                # Currencies without a quote are remembered too, so that they aren't requested again for the same day
+                usd_rates = dict.fromkeys(currencies)
+                for market, rate in data[_QUOTES].items():
+                    # Quotes are keyed by market (e.g. USDAUD)
+                    usd_rates[market[3:]] = RP2Decimal(str(rate))
+                self.__usd_rates[date] = usd_rates
+                return usd_rates[currency]
 
             except (JSONDecodeError, ReadTimeout) as exc:
-                LOGGER.debug("Fetching of fiat exchange rates failed. The server might be down. Retrying the connection.")
                 request_count += 1
+                LOGGER.debug("Fetching of fiat exchange rates failed. The server might be down. Retrying the connection (attempt #%d).", request_count)
                 if request_count > 4:
                     LOGGER.info("Giving up after 4 tries. Saving to Cache.")
                     self.save_historical_price_cache()
                     raise RP2RuntimeError("JSON decode error") from exc
+                # Back off exponentially, so that a struggling server gets more time to recover after each failure
+                sleep(_RETRY_DELAY * 2 ** (request_count - 1))
 
-        return result
+        return None
 
     def _is_fiat(self, asset: str) -> bool:
-        if not self.__fiat_list:
+        if not self.__fiat_set:
             self._build_fiat_list()
 
-        return asset in self.__fiat_list
+        return asset in self.__fiat_set
 
     def _is_fiat_pair(self, from_asset: str, to_asset: str) -> bool:
-        return self._is_fiat(from_asset) and self._is_fiat(to_asset)
+        if not self.__fiat_set:
+            self._build_fiat_list()
+
+        fiat_set: FrozenSet[str] = self.__fiat_set
+        return from_asset in fiat_set and to_asset in fiat_set
 
     def _build_fiat_list(self) -> None:
         try:
@@ -200,7 +227,7 @@ class PairConverterPlugin(AbstractCcxtPairConverterPlugin):
             # }
             data: Any = response.json()
             if data[_SUCCESS]:
-                self.__fiat_list = [fiat_iso for fiat_iso in data[_CURRENCIES] if fiat_iso != "BTC"]
+                self.__fiat_set = frozenset(intern(fiat_iso) for fiat_iso in data[_CURRENCIES] if fiat_iso != "BTC")
             else:
                 if "message" in data:
                     LOGGER.error("Error %d: %s: %s", response.status_code, _EXCHANGE_SYMBOLS_URL, data["message"])
@@ -12,6 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import logging
 from datetime import datetime, timedelta
 from os import path
 from typing import List, Optional
@@ -27,6 +28,8 @@ from dali.historical_bar import HistoricalBar
 
 _FOREX_CSV_DOC_URL: str = "https://github.com/eprbell/dali-rp2/blob/main/docs/configuration_file.md"
 _FIAT_EXCHANGE: str = "From CSV"
+_ONE_DAY: timedelta = timedelta(days=1)
+_ONE: RP2Decimal = RP2Decimal("1")
 
 
 class PairConverterPlugin(AbstractCcxtPairConverterPlugin):
@@ -59,7 +62,8 @@ class PairConverterPlugin(AbstractCcxtPairConverterPlugin):
         historical_bar: Optional[HistoricalBar] = self._get_bar_from_cache(key)
 
         if historical_bar is not None:
-            self._logger.debug("Retrieved cache for %s/%s->%s for %s", timestamp, from_asset, to_asset, _FIAT_EXCHANGE)
+            if self._logger.isEnabledFor(logging.DEBUG):
+                self._logger.debug("Retrieved cache for %s/%s->%s for %s", timestamp, from_asset, to_asset, _FIAT_EXCHANGE)
             return historical_bar
 
         csv_file: str = f"{self.__CSV_DIRECTORY}{key.from_asset}_{key.to_asset}.csv"
@@ -89,7 +93,7 @@ class PairConverterPlugin(AbstractCcxtPairConverterPlugin):
                     date: datetime = datetime.strptime(parts[0], "%Y-%m-%d %H:%M:%S")
                     if date.strftime("%Y-%m-%d") == key.timestamp.strftime("%Y-%m-%d"):
                         result = HistoricalBar(
-                            duration=timedelta(days=1),
+                            duration=_ONE_DAY,
                             timestamp=key.timestamp,
                             open=RP2Decimal(parts[1]),
                             high=RP2Decimal(parts[2]),
@@ -101,12 +105,12 @@ class PairConverterPlugin(AbstractCcxtPairConverterPlugin):
 
                         reverse_key: AssetPairAndTimestamp = AssetPairAndTimestamp(key.timestamp, key.to_asset, key.from_asset, _FIAT_EXCHANGE)
                         reverse_result = HistoricalBar(
-                            duration=timedelta(days=1),
+                            duration=_ONE_DAY,
                             timestamp=key.timestamp,
-                            open=RP2Decimal("1") / result.close,
-                            high=RP2Decimal("1") / result.low,
-                            low=RP2Decimal("1") / result.high,
-                            close=RP2Decimal("1") / result.open,
+                            open=_ONE / result.close,
+                            high=_ONE / result.low,
+                            low=_ONE / result.high,
+                            close=_ONE / result.open,
                             volume=ZERO,
                         )
                         self._add_bar_to_cache(reverse_key, reverse_result)
@@ -118,7 +118,7 @@ _CCXT_TIME_GRANULARITY: List[str] = [
 ]
 
 
-_CCXT_TIME_GRANULARITY_SET: Set[str] = set(_CCXT_TIME_GRANULARITY)
+_CCXT_TIME_GRANULARITY_INDEX: Dict[str, int] = {timespan: index for index, timespan in enumerate(_CCXT_TIME_GRANULARITY)}
 
 # Chunking variables
 _PAIR_START: str = "start"
@@ -354,9 +354,8 @@ class Kraken:
     ) -> Optional[List[HistoricalBar]]:
         pair_name: str = base_asset + quote_asset
 
-        if timespan in _CCXT_TIME_GRANULARITY_SET:
-            retry_count: int = _CCXT_TIME_GRANULARITY.index(timespan)
-        else:
+        retry_count: Optional[int] = _CCXT_TIME_GRANULARITY_INDEX.get(timespan)
+        if retry_count is None:
             raise RP2ValueError("Internal Error: Invalid timespan passed to _retrieve_cached_bars.")
 
         if pair_name + _KRAKEN_TIME_GRANULARITY[retry_count] not in self.__cached_pairs:
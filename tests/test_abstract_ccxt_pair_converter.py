@@ -12,17 +12,27 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from multiprocessing.pool import ThreadPool
+from threading import Lock
+from time import sleep
 from typing import Any, Dict, List, Optional, Set
 
 import pytest
+from prezzemolo.avl_tree import AVLTree
 from prezzemolo.vertex import Vertex
 from rp2.rp2_decimal import RP2Decimal
+from rp2.rp2_error import RP2RuntimeError, RP2ValueError
 
 from dali.abstract_ccxt_pair_converter_plugin import (
     MARKET_PADDING_IN_WEEKS,
     AbstractCcxtPairConverterPlugin,
+    _CachedGraphSnapshots,
+    _to_decimal,
+    _to_ms_timestamp,
 )
+from dali.abstract_pair_converter_plugin import AssetPairAndTimestamp
+from dali.cache import save_to_cache
 from dali.configuration import Keyword
 from dali.historical_bar import HistoricalBar
 from dali.mapped_graph import MappedGraph
@@ -165,6 +175,16 @@ class TestAbstractCcxtPairConverterPlugin:
         # The user can then mark it as untradeable in the config file
         assert optimizations[week_start_date - timedelta(weeks=1)]["A"]["B"] == -1.0
 
+        # Markets are merged in time order, including the padding before the week start
+        child_bars = {
+            "A": {"B": [historical_bars[ONE_WEEK_EARLIER], historical_bars[MARKET_START]]},
+            "B": {"C": [historical_bars[MARKET_START]._replace(timestamp=week_start_date + timedelta(weeks=1))]},
+        }
+        market_starts = {"A": {"B": week_start_date}, "B": {"C": week_start_date}}
+        optimizations = plugin._generate_optimizations(child_bars, market_starts, week_start_date)  # pylint: disable=protected-access
+        assert list(optimizations) == [week_start_date - timedelta(weeks=1), week_start_date, week_start_date + timedelta(weeks=1)]
+        assert optimizations[week_start_date + timedelta(weeks=1)] == {"B": {"C": 100.0}}
+
     def test_refine_and_finalize_optimizations(self) -> None:
         plugin = MockAbstractCcxtPairConverterPlugin(Keyword.HISTORICAL_PRICE_HIGH.value)
         optimizations = {
@@ -193,3 +213,403 @@ class TestAbstractCcxtPairConverterPlugin:
         assert refined_optimizations[datetime(2023, 1, 4)]["A"]["C"] == 1.0
         assert refined_optimizations[datetime(2023, 1, 4)]["D"]["F"] == 1.0
         assert "E" not in refined_optimizations[datetime(2023, 1, 4)]["D"]
+
+    def test_floor_key(self) -> None:
+        plugin = MockAbstractCcxtPairConverterPlugin(Keyword.HISTORICAL_PRICE_HIGH.value)
+        key = AssetPairAndTimestamp(datetime(2023, 1, 1, 10, 30, 45, 123, tzinfo=timezone.utc), "A", "B", TEST_EXCHANGE)
+        shifted_key = AssetPairAndTimestamp(key.timestamp.astimezone(timezone(timedelta(hours=-12))), "A", "B", TEST_EXCHANGE)
+
+        assert plugin._floor_key(key) == AssetPairAndTimestamp(  # pylint: disable=protected-access
+            datetime(2023, 1, 1, 10, 30, tzinfo=timezone.utc), "A", "B", TEST_EXCHANGE
+        )
+        assert plugin._floor_key(key, True).timestamp == datetime(2023, 1, 1, tzinfo=timezone.utc)  # pylint: disable=protected-access
+        # Same instant, different timezone: the daily floor must not come from the memoized UTC key
+        shifted_floored_key = plugin._floor_key(shifted_key, True)  # pylint: disable=protected-access
+        assert shifted_floored_key.timestamp == datetime(2022, 12, 31, tzinfo=timezone(timedelta(hours=-12)))
+
+    def test_find_graph_snapshot(self, mocker: Any) -> None:
+        plugin = MockAbstractCcxtPairConverterPlugin(Keyword.HISTORICAL_PRICE_HIGH.value)
+        graphs: List[MappedGraph[str]] = [MappedGraph[str](TEST_EXCHANGE) for _ in range(5)]
+        exchange_tree: AVLTree[datetime, MappedGraph[str]] = AVLTree[datetime, MappedGraph[str]]()
+        for week in [3, 0, 4, 1, 2]:
+            exchange_tree.insert_node(datetime(2023, 1, 2) + timedelta(weeks=week), graphs[week])
+        mocker.patch.object(plugin, "_AbstractCcxtPairConverterPlugin__exchange_2_graph_tree", {TEST_EXCHANGE: exchange_tree})
+
+        for timestamp in [datetime(2023, 1, 1), datetime(2023, 1, 2), datetime(2023, 1, 20), datetime(2023, 1, 30), datetime(2024, 1, 1)]:
+            assert plugin._find_graph_snapshot(TEST_EXCHANGE, timestamp) is exchange_tree.find_max_value_less_than(  # pylint: disable=protected-access
+                timestamp
+            )
+        assert plugin._find_graph_snapshot(TEST_EXCHANGE, datetime(2023, 1, 1)) is None  # pylint: disable=protected-access
+        assert plugin._find_graph_snapshot(TEST_EXCHANGE, datetime(2023, 1, 9)) is graphs[1]  # pylint: disable=protected-access
+
+    def test_retrieve_historical_bars_from_multiple_exchanges(
+        self, mocker: Any, unoptimized_graph: MappedGraph[str], vertex_list: Dict[str, Vertex[str]], historical_bars: Dict[str, HistoricalBar]
+    ) -> None:
+        plugin = MockAbstractCcxtPairConverterPlugin(Keyword.HISTORICAL_PRICE_HIGH.value)
+        optimization_candidates: Set[Vertex[str]] = {vertex_list["A"], vertex_list["B"], vertex_list["C"]}
+        week_start_date = datetime(2023, 1, 1)
+
+        mocker.patch.object(plugin, "_AbstractCcxtPairConverterPlugin__exchange_markets", {TEST_EXCHANGE: {"AB": [TEST_EXCHANGE], "BC": ["Binance.com"]}})
+        find_historical_bars = mocker.patch.object(plugin, "find_historical_bars", return_value=[historical_bars[MARKET_START]])
+
+        child_bars, _ = plugin._retrieve_historical_bars(  # pylint: disable=protected-access
+            {"A", "B"}, optimization_candidates, week_start_date, TEST_EXCHANGE, unoptimized_graph
+        )
+
+        assert sorted(call.args[3] for call in find_historical_bars.call_args_list) == ["Binance.com", TEST_EXCHANGE]
+        assert child_bars["A"]["B"][1] == historical_bars[MARKET_START]
+        assert child_bars["B"]["C"][1] == historical_bars[MARKET_START]
+
+        # Another exchange routing through the same markets reuses the weekly bars, even the empty ones
+        find_historical_bars.return_value = None
+        plugin.exchange_markets["Coinbase Pro"] = {"AB": [TEST_EXCHANGE], "BC": ["Binance.com"], "CD": ["Binance.com"]}
+        vertex_list["C"].add_neighbor(vertex_list["D"], 1.0)
+        child_bars, market_starts = plugin._retrieve_historical_bars(  # pylint: disable=protected-access
+            {"A", "B", "C"}, optimization_candidates | {vertex_list["D"]}, week_start_date, "Coinbase Pro", unoptimized_graph
+        )
+        plugin._retrieve_historical_bars(  # pylint: disable=protected-access
+            {"C"}, optimization_candidates | {vertex_list["D"]}, week_start_date, "Coinbase Pro", unoptimized_graph
+        )
+
+        assert find_historical_bars.call_count == 3
+        assert child_bars["A"]["B"][1] == historical_bars[MARKET_START]
+        assert "D" not in child_bars["C"]
+        assert market_starts["C"]["D"] > datetime.now(timezone.utc)
+
+    def test_create_exchange(self) -> None:
+        exchange = MockAbstractCcxtPairConverterPlugin._create_exchange(TEST_EXCHANGE)  # pylint: disable=protected-access
+
+        assert exchange.enableRateLimit
+        assert exchange.rateLimit == 5100
+        assert MockAbstractCcxtPairConverterPlugin._create_exchange("Binance.com").rateLimit < 5100  # pylint: disable=protected-access
+        adapter = exchange.session.get_adapter("https://api.kraken.com")
+        assert adapter.max_retries.total == 3
+        assert 503 in adapter.max_retries.status_forcelist
+
+    def test_get_exchange_client(self, mocker: Any) -> None:
+        plugin = MockAbstractCcxtPairConverterPlugin(Keyword.HISTORICAL_PRICE_HIGH.value)
+        exchanges: Dict[str, Any] = {TEST_EXCHANGE: mocker.Mock()}
+        mocker.patch.object(plugin, "_AbstractCcxtPairConverterPlugin__exchanges", exchanges)
+        create_exchange = mocker.spy(plugin, "_create_exchange")
+
+        # The client already cached for the pricing exchange (e.g. as an alternative market exchange) is shared
+        assert plugin._get_exchange_client("Some Wallet", TEST_EXCHANGE) is exchanges[TEST_EXCHANGE]  # pylint: disable=protected-access
+        assert exchanges["Some Wallet"] is exchanges[TEST_EXCHANGE]
+        create_exchange.assert_not_called()
+
+        binance_client = plugin._get_exchange_client("Binance.com", "Binance.com")  # pylint: disable=protected-access
+        assert plugin._get_exchange_client("Binance.com", "Binance.com") is binance_client  # pylint: disable=protected-access
+        create_exchange.assert_called_once_with("Binance.com")
+
+    def test_is_fiat(self) -> None:
+        plugin = MockAbstractCcxtPairConverterPlugin(Keyword.HISTORICAL_PRICE_HIGH.value)
+
+        assert plugin._is_fiat_pair("USD", "EUR")  # pylint: disable=protected-access
+        assert not plugin._is_fiat_pair("USD", "KRW")  # pylint: disable=protected-access
+
+        plugin._fiat_list = ["KRW", "USD"]  # pylint: disable=protected-access
+        assert plugin._is_fiat_pair("USD", "KRW")  # pylint: disable=protected-access
+        assert not plugin._is_fiat("EUR")  # pylint: disable=protected-access
+
+    def test_find_historical_bar_caches_minute_window(self, mocker: Any) -> None:
+        start = datetime(2023, 1, 1, 10, 0, tzinfo=timezone.utc)
+        start_ms = int(start.timestamp() * 1000)
+
+        # Like exchanges, return the candles opening at or after since, each with its own open
+        def fetch_ohlcv(_symbol: str, _timeframe: str, since: int, limit: int) -> List[List[float]]:
+            first_minute = -(-(since - start_ms) // 60000)
+            return [[start_ms + minute * 60000, 1.0 + minute, 2.0 + minute, 0.5, 1.5, 10.0] for minute in range(first_minute, first_minute + min(limit, 3))]
+
+        prefetching_plugin = MockAbstractCcxtPairConverterPlugin(Keyword.HISTORICAL_PRICE_HIGH.value)
+        prefetching_exchange = mocker.Mock()
+        prefetching_exchange.fetchOHLCV.side_effect = fetch_ohlcv
+        mocker.patch.object(prefetching_plugin, "_AbstractCcxtPairConverterPlugin__exchanges", {"Binance.com": prefetching_exchange})
+        uncached_plugin = MockAbstractCcxtPairConverterPlugin(Keyword.HISTORICAL_PRICE_HIGH.value)
+        uncached_exchange = mocker.Mock()
+        uncached_exchange.fetchOHLCV.side_effect = fetch_ohlcv
+        mocker.patch.object(uncached_plugin, "_AbstractCcxtPairConverterPlugin__exchanges", {"Binance.com": uncached_exchange})
+
+        first_bar = prefetching_plugin.find_historical_bar("A", "B", start + timedelta(seconds=30), "Binance.com")
+        cached_bar = prefetching_plugin.find_historical_bar("A", "B", start + timedelta(minutes=2, seconds=15), "Binance.com")
+        uncached_bar = uncached_plugin.find_historical_bar("A", "B", start + timedelta(minutes=2, seconds=15), "Binance.com")
+
+        assert prefetching_exchange.fetchOHLCV.call_count == 1
+        assert prefetching_exchange.fetchOHLCV.call_args[0][2] == start_ms
+        assert uncached_exchange.fetchOHLCV.call_args[0][2] == start_ms + 2 * 60000
+        assert first_bar and first_bar.open == RP2Decimal("1.0")
+        assert cached_bar and uncached_bar
+        assert cached_bar.timestamp == start + timedelta(minutes=2)
+        cached_prices = (cached_bar.open, cached_bar.high, cached_bar.low, cached_bar.close)
+        assert cached_prices == (uncached_bar.open, uncached_bar.high, uncached_bar.low, uncached_bar.close)
+        assert uncached_bar.open == RP2Decimal("3.0")
+
+    def test_cache_key(self) -> None:
+        assert MockAbstractCcxtPairConverterPlugin(Keyword.HISTORICAL_PRICE_HIGH.value).cache_key() == "MockPlugin"
+        assert (
+            MockAbstractCcxtPairConverterPlugin(
+                Keyword.HISTORICAL_PRICE_HIGH.value, default_exchange="Coinbase Pro", exchange_locked=True, cache_modifier="EURUSD"
+            ).cache_key()
+            == "MockPlugin_Coinbase_Pro_EURUSD"
+        )
+        assert (
+            MockAbstractCcxtPairConverterPlugin(Keyword.HISTORICAL_PRICE_HIGH.value, default_exchange="Coinbase Pro", exchange_locked=False).cache_key()
+            == "MockPlugin"
+        )
+
+    def test_to_ms_timestamp(self) -> None:
+        timestamp = datetime(2023, 1, 1, 0, 0, 0, 123000, tzinfo=timezone.utc)
+
+        assert _to_ms_timestamp(timestamp) == 1672531200123
+        assert _to_ms_timestamp(timestamp.astimezone(timezone(timedelta(hours=9)))) == 1672531200123
+        assert _to_ms_timestamp(datetime(2023, 1, 1, 12)) == int(datetime(2023, 1, 1, 12).timestamp() * 1000)
+
+    def test_floor_key_interns_names(self) -> None:
+        plugin = MockAbstractCcxtPairConverterPlugin(Keyword.HISTORICAL_PRICE_HIGH.value)
+        timestamp = datetime(2023, 1, 1, 10, 30, tzinfo=timezone.utc)
+        first_key = plugin._floor_key(AssetPairAndTimestamp(timestamp, "".join(["A", "BC"]), "B", TEST_EXCHANGE))  # pylint: disable=protected-access
+        second_key = plugin._floor_key(  # pylint: disable=protected-access
+            AssetPairAndTimestamp(timestamp + timedelta(minutes=1), "".join(["AB", "C"]), "B", TEST_EXCHANGE)
+        )
+
+        assert first_key.from_asset is second_key.from_asset
+
+    def test_graph_snapshots_cache(self, mocker: Any, tmp_path: Any, unoptimized_graph: MappedGraph[str]) -> None:
+        mocker.patch("dali.cache.CACHE_DIR", str(tmp_path))
+        manifest = mocker.Mock(assets={"A", "B"}, first_transaction_datetime=datetime(2023, 1, 1, tzinfo=timezone.utc))
+        plugin = MockAbstractCcxtPairConverterPlugin(Keyword.HISTORICAL_PRICE_HIGH.value)
+        plugin.optimize(manifest)
+        snapshot_timestamp = datetime(2022, 12, 26, tzinfo=timezone.utc)
+        save_to_cache(
+            f"{plugin.cache_key()}-{TEST_EXCHANGE}-graph",
+            _CachedGraphSnapshots(
+                digest=plugin._graph_snapshots_digest(TEST_EXCHANGE),  # pylint: disable=protected-access
+                markets=TEST_MARKETS,
+                snapshots=[(snapshot_timestamp, unoptimized_graph.to_edges())],
+            ),
+        )
+        generate_unoptimized_graph = mocker.patch.object(plugin, "_generate_unoptimized_graph")
+
+        plugin._cache_graph_snapshots(TEST_EXCHANGE)  # pylint: disable=protected-access
+
+        generate_unoptimized_graph.assert_not_called()
+        assert plugin.exchange_markets[TEST_EXCHANGE] == TEST_MARKETS
+        assert TEST_EXCHANGE in plugin.exchanges
+        snapshot = plugin._find_graph_snapshot(TEST_EXCHANGE, datetime(2023, 1, 2, tzinfo=timezone.utc))  # pylint: disable=protected-access
+        assert snapshot
+        assert snapshot.to_edges() == unoptimized_graph.to_edges()
+
+        # A different manifest doesn't reuse the cached snapshots
+        other_plugin = MockAbstractCcxtPairConverterPlugin(Keyword.HISTORICAL_PRICE_HIGH.value)
+        other_plugin.optimize(mocker.Mock(assets={"A", "C"}, first_transaction_datetime=manifest.first_transaction_datetime))
+        assert other_plugin._graph_snapshots_digest(TEST_EXCHANGE) != plugin._graph_snapshots_digest(TEST_EXCHANGE)  # pylint: disable=protected-access
+
+    def test_find_historical_bars_invalid_timespan(self) -> None:
+        plugin = MockAbstractCcxtPairConverterPlugin(Keyword.HISTORICAL_PRICE_HIGH.value)
+
+        # 6h candles are only available on Coinbase Pro
+        with pytest.raises(RP2ValueError):
+            plugin.find_historical_bars("BTC", "USD", datetime(2023, 1, 1, tzinfo=timezone.utc), TEST_EXCHANGE, timespan="6h")
+        with pytest.raises(RP2ValueError):
+            plugin.find_historical_bars("BTC", "USD", datetime(2023, 1, 1, tzinfo=timezone.utc), TEST_EXCHANGE, timespan="2d")
+
+    def test_fiat_daily_cache(self, mocker: Any) -> None:
+        plugin = MockAbstractCcxtPairConverterPlugin(Keyword.HISTORICAL_PRICE_HIGH.value)
+        morning: datetime = datetime(2023, 1, 2, 9, 30, tzinfo=timezone.utc)
+        fiat_bar = HistoricalBar(
+            duration=timedelta(days=1),
+            timestamp=morning,
+            open=RP2Decimal("0.9"),
+            high=RP2Decimal("0.9"),
+            low=RP2Decimal("0.9"),
+            close=RP2Decimal("0.9"),
+            volume=RP2Decimal("0"),
+        )
+        get_fiat_exchange_rate = mocker.patch.object(plugin, "_get_fiat_exchange_rate", return_value=fiat_bar)
+
+        assert plugin.get_historic_bar_from_native_source(morning, "USD", "EUR", TEST_EXCHANGE) == fiat_bar
+        assert plugin.get_historic_bar_from_native_source(morning.replace(hour=18), "USD", "EUR", TEST_EXCHANGE) == fiat_bar
+        assert get_fiat_exchange_rate.call_count == 1
+
+        plugin.get_historic_bar_from_native_source(morning + timedelta(days=1), "USD", "EUR", TEST_EXCHANGE)
+        plugin.get_historic_bar_from_native_source(morning, "EUR", "USD", TEST_EXCHANGE)
+        assert get_fiat_exchange_rate.call_count == 3
+
+    def test_conversion_rate_cache_keys(self, mocker: Any, historical_bars: Dict[str, HistoricalBar]) -> None:
+        plugin = MockAbstractCcxtPairConverterPlugin(Keyword.HISTORICAL_PRICE_HIGH.value)
+        plugin._cache = {}  # pylint: disable=protected-access
+        get_historic_bar = mocker.patch.object(plugin, "get_historic_bar_from_native_source", return_value=historical_bars[MARKET_START])
+        timestamp: datetime = datetime(2023, 1, 2, 9, 30, 15, tzinfo=timezone.utc)
+
+        assert plugin.get_conversion_rate(timestamp, "A", "B", TEST_EXCHANGE) == historical_bars[MARKET_START].high
+        assert plugin.get_conversion_rate(timestamp, "A", "B", TEST_EXCHANGE) == historical_bars[MARKET_START].high
+        get_historic_bar.assert_called_once()
+        # Stored bars keep their named keys
+        assert list(plugin._cache) == [AssetPairAndTimestamp(timestamp, "A", "B", TEST_EXCHANGE)]  # pylint: disable=protected-access
+        assert all(isinstance(key, AssetPairAndTimestamp) for key in plugin._cache)  # pylint: disable=protected-access
+
+    def test_lazy_price_cache(self, mocker: Any, historical_bars: Dict[str, HistoricalBar]) -> None:
+        load_from_cache = mocker.patch("dali.abstract_pair_converter_plugin.load_from_cache", return_value=None)
+        save_to_cache = mocker.patch("dali.abstract_pair_converter_plugin.save_to_cache")
+        plugin = MockAbstractCcxtPairConverterPlugin(Keyword.HISTORICAL_PRICE_HIGH.value)
+
+        # The cache is only read on first use, and a cache that was never used isn't written back
+        plugin.save_historical_price_cache()
+        load_from_cache.assert_not_called()
+        save_to_cache.assert_not_called()
+
+        key = AssetPairAndTimestamp(datetime(2023, 1, 2, tzinfo=timezone.utc), "A", "B", TEST_EXCHANGE)
+        plugin._add_bar_to_cache(key, historical_bars[MARKET_START])  # pylint: disable=protected-access
+        assert plugin._get_bar_from_cache(key) == historical_bars[MARKET_START]  # pylint: disable=protected-access
+        plugin.save_historical_price_cache()
+        load_from_cache.assert_called_once_with(plugin.cache_key())
+        save_to_cache.assert_called_once()
+
+    def test_last_bar_from_cache(self, historical_bars: Dict[str, HistoricalBar]) -> None:
+        plugin = MockAbstractCcxtPairConverterPlugin(Keyword.HISTORICAL_PRICE_HIGH.value)
+        timestamp: datetime = datetime(2023, 1, 2, 9, 30, tzinfo=timezone.utc)
+        first_key = AssetPairAndTimestamp(timestamp, "A", "B", TEST_EXCHANGE)
+        second_key = AssetPairAndTimestamp(timestamp, "B", "A", TEST_EXCHANGE)
+        plugin._add_bar_to_cache(first_key, historical_bars[MARKET_START])  # pylint: disable=protected-access
+        plugin._add_bar_to_cache(second_key, historical_bars[ONE_WEEK_EARLIER])  # pylint: disable=protected-access
+
+        # Lookups within the same minute share the floored key, whichever bar was found last
+        assert plugin._get_bar_from_cache(second_key) == historical_bars[ONE_WEEK_EARLIER]  # pylint: disable=protected-access
+        same_minute_key = first_key._replace(timestamp=timestamp + timedelta(seconds=30))
+        assert plugin._get_bar_from_cache(same_minute_key) == historical_bars[MARKET_START]  # pylint: disable=protected-access
+        assert plugin._get_bar_from_cache(first_key) == historical_bars[MARKET_START]  # pylint: disable=protected-access
+        assert plugin._get_bar_from_cache(second_key) == historical_bars[ONE_WEEK_EARLIER]  # pylint: disable=protected-access
+        assert plugin._get_bar_from_cache(first_key._replace(timestamp=timestamp + timedelta(minutes=1))) is None  # pylint: disable=protected-access
+
+        # A bar added for the same key replaces the last one found
+        plugin._add_bar_to_cache(second_key, historical_bars[MARKET_START])  # pylint: disable=protected-access
+        assert plugin._get_bar_from_cache(second_key) == historical_bars[MARKET_START]  # pylint: disable=protected-access
+
+    def test_cache_manifest_graph_snapshots(self, mocker: Any) -> None:
+        plugin = MockAbstractCcxtPairConverterPlugin(Keyword.HISTORICAL_PRICE_HIGH.value)
+        plugin.optimize(mocker.Mock(exchanges={TEST_EXCHANGE, "Binance.com"}))
+        cache_graph_snapshots = mocker.patch.object(plugin, "_cache_graph_snapshots")
+        mocker.patch.object(plugin, "_AbstractCcxtPairConverterPlugin__exchange_2_graph_tree", {"Binance.com": AVLTree[datetime, MappedGraph[str]]()})
+
+        plugin._cache_manifest_graph_snapshots("Upbit")  # pylint: disable=protected-access
+
+        # Exchanges that already have snapshots are skipped
+        assert sorted(call.args[0] for call in cache_graph_snapshots.call_args_list) == [TEST_EXCHANGE, "Upbit"]
+
+    def test_cache_manifest_graph_snapshots_errors(self, mocker: Any) -> None:
+        plugin = MockAbstractCcxtPairConverterPlugin(Keyword.HISTORICAL_PRICE_HIGH.value)
+        plugin.optimize(mocker.Mock(exchanges={TEST_EXCHANGE, "Binance.com"}))
+
+        def cache_graph_snapshots(exchange: str) -> None:
+            if exchange == "Binance.com":
+                raise RP2RuntimeError("markets unavailable")
+
+        cache_graph_snapshots_mock = mocker.patch.object(plugin, "_cache_graph_snapshots", side_effect=cache_graph_snapshots)
+
+        # Failing to build the snapshots of an exchange that wasn't requested doesn't abort the run
+        plugin._cache_manifest_graph_snapshots(TEST_EXCHANGE)  # pylint: disable=protected-access
+        assert sorted(call.args[0] for call in cache_graph_snapshots_mock.call_args_list) == ["Binance.com", TEST_EXCHANGE]
+
+        # The requested exchange still needs its snapshots
+        with pytest.raises(RP2RuntimeError):
+            plugin._cache_manifest_graph_snapshots("Binance.com")  # pylint: disable=protected-access
+
+    def test_conversion_route_reused(self, mocker: Any, historical_bars: Dict[str, HistoricalBar]) -> None:
+        plugin = MockAbstractCcxtPairConverterPlugin(Keyword.HISTORICAL_PRICE_HIGH.value)
+        graph = MappedGraph[str](TEST_EXCHANGE)
+        graph.add_neighbor("A", "B", 1.0)
+        graph.add_neighbor("B", "C", 1.0)
+        graph.add_neighbor("C", "A", 1.0)
+        snapshot = graph.clone_with_optimization({"A": {"B": 1.0}, "B": {"C": 1.0}, "C": {"A": 1.0}})
+        exchange_tree: AVLTree[datetime, MappedGraph[str]] = AVLTree[datetime, MappedGraph[str]]()
+        exchange_tree.insert_node(datetime(2023, 1, 2, tzinfo=timezone.utc), snapshot)
+        mocker.patch.object(plugin, "_AbstractCcxtPairConverterPlugin__exchange_2_graph_tree", {TEST_EXCHANGE: exchange_tree})
+        mocker.patch.object(plugin, "_AbstractCcxtPairConverterPlugin__exchange_markets", {TEST_EXCHANGE: TEST_MARKETS})
+        find_historical_bar = mocker.patch.object(plugin, "find_historical_bar", return_value=historical_bars[MARKET_START])
+        get_route = mocker.spy(snapshot, "get_route")
+
+        for day in range(3, 5):
+            bar = plugin.get_historic_bar_from_native_source(datetime(2023, 1, day, tzinfo=timezone.utc), "A", "C", TEST_EXCHANGE)
+            assert bar
+            assert bar.timestamp == datetime(2023, 1, day, tzinfo=timezone.utc)
+            assert bar.high == historical_bars[MARKET_START].high * historical_bars[MARKET_START].high
+
+        assert get_route.call_count == 1
+        assert [call.args[:2] for call in find_historical_bar.call_args_list] == [("A", "B"), ("B", "C")] * 2
+
+    def test_retrieve_historical_bars_threads_per_exchange(self, mocker: Any, historical_bars: Dict[str, HistoricalBar]) -> None:
+        plugin = MockAbstractCcxtPairConverterPlugin(Keyword.HISTORICAL_PRICE_HIGH.value)
+        graph = MappedGraph[str](TEST_EXCHANGE)
+        for neighbor in ["B", "C", "D", "E", "F", "G"]:
+            graph.add_neighbor("A", neighbor, 1.0)
+        graph.add_neighbor("A", "H", 1.0)
+        markets: Dict[str, List[str]] = {f"A{neighbor}": ["Binance.com"] for neighbor in ["B", "C", "D", "E", "F"]}
+        markets["AG"] = [TEST_EXCHANGE]
+        markets["AH"] = ["Coinbase"]
+        mocker.patch.object(plugin, "_AbstractCcxtPairConverterPlugin__exchange_markets", {TEST_EXCHANGE: markets})
+        mocker.patch.object(plugin, "_AbstractCcxtPairConverterPlugin__exchanges", {TEST_EXCHANGE: mocker.Mock()})
+        # Coinbase is priced on Kraken, so it shares the Kraken client
+        plugin._get_exchange_client("Coinbase", TEST_EXCHANGE)  # pylint: disable=protected-access
+        mocker.patch.object(plugin, "find_historical_bars", return_value=[historical_bars[MARKET_START]])
+        find_weekly_bars = mocker.spy(plugin, "_find_weekly_bars")
+
+        child_bars, _ = plugin._retrieve_historical_bars(  # pylint: disable=protected-access
+            {"A"}, set(graph.vertexes), datetime(2023, 1, 1), TEST_EXCHANGE, graph
+        )
+
+        assert sorted(child_bars["A"]) == ["B", "C", "D", "E", "F", "G", "H"]
+        # Kraken has a request delay, so the markets on its client (including the Coinbase one) are fetched by a single thread
+        market_shares = sorted(sorted(exchange for _, _, exchange in call.args[0]) for call in find_weekly_bars.call_args_list)
+        assert market_shares == [["Binance.com"], ["Binance.com"], ["Binance.com"], ["Binance.com", "Binance.com"], ["Coinbase", TEST_EXCHANGE]]
+
+    def test_exchange_request_slots(self, mocker: Any, historical_bars: Dict[str, HistoricalBar]) -> None:
+        plugin = MockAbstractCcxtPairConverterPlugin(Keyword.HISTORICAL_PRICE_HIGH.value)
+        in_flight: List[int] = [0, 0]  # current, maximum
+        in_flight_lock = Lock()
+
+        def find_historical_bars(*_: Any) -> List[HistoricalBar]:
+            with in_flight_lock:
+                in_flight[0] += 1
+                in_flight[1] = max(in_flight)
+            sleep(0.01)
+            with in_flight_lock:
+                in_flight[0] -= 1
+            return [historical_bars[MARKET_START]]
+
+        mocker.patch.object(plugin, "find_historical_bars", side_effect=find_historical_bars)
+        mocker.patch.object(plugin, "_AbstractCcxtPairConverterPlugin__exchanges", {TEST_EXCHANGE: mocker.Mock()})
+        # Coinbase is priced on Kraken, so it shares the Kraken client
+        plugin._get_exchange_client("Coinbase", TEST_EXCHANGE)  # pylint: disable=protected-access
+
+        # Two snapshot builds pricing different markets on the Kraken client at the same time
+        with ThreadPool(2) as pool:
+            pool.map(
+                lambda markets: plugin._find_weekly_bars(markets, datetime(2023, 1, 1)),  # pylint: disable=protected-access
+                [[("A", "B", TEST_EXCHANGE)], [("B", "C", "Coinbase")]],
+            )
+
+        # Kraken has a request delay, so the requests on its client never overlap
+        assert in_flight[1] == 1
+        kraken_slots = plugin._get_exchange_request_slots(TEST_EXCHANGE)  # pylint: disable=protected-access
+        assert plugin._get_exchange_request_slots("Coinbase") is kraken_slots  # pylint: disable=protected-access
+        assert plugin._get_exchange_request_slots("Binance.com") is not kraken_slots  # pylint: disable=protected-access
+
+    def test_week_boundaries(self) -> None:
+        # Wednesday
+        timestamp: datetime = datetime(2023, 1, 4, 15, 30, tzinfo=timezone.utc)
+
+        previous_monday = AbstractCcxtPairConverterPlugin._get_previous_monday(timestamp)  # pylint: disable=protected-access
+        following_monday = AbstractCcxtPairConverterPlugin._find_following_monday(timestamp)  # pylint: disable=protected-access
+        assert previous_monday == datetime(2023, 1, 1, 15, 30, tzinfo=timezone.utc)
+        assert following_monday == datetime(2023, 1, 9, tzinfo=timezone.utc)
+        assert MockAbstractCcxtPairConverterPlugin(Keyword.HISTORICAL_PRICE_HIGH.value)._get_previous_monday(  # pylint: disable=protected-access
+            timestamp
+        ) is AbstractCcxtPairConverterPlugin._get_previous_monday(  # pylint: disable=protected-access
+            timestamp
+        )
+
+    def test_to_decimal(self) -> None:
+        assert _to_decimal(0.1) == RP2Decimal("0.1")
+        assert _to_decimal(16550.5) is _to_decimal(16550.5)
+        # Typed keys: the integer and the float keep their own exponent
+        assert str(_to_decimal(1)) == "1"
+        assert str(_to_decimal(1.0)) == "1.0"
@@ -0,0 +1,63 @@
+# Copyright 2022 Steve Davis
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from typing import NamedTuple
+
+import pytest
+
+from dali.in_transaction import InTransaction
+
+
+class TransactionIdentityTestCase(NamedTuple):
+    plugin: str
+    unique_id: str
+    asset: str
+    is_equal: bool
+
+
+transaction_identity_test_cases = [
+    TransactionIdentityTestCase("plugin", "unique_id", "BTC", True),
+    TransactionIdentityTestCase("other plugin", "unique_id", "BTC", False),
+    TransactionIdentityTestCase("plugin", "unique_id", "ETH", False),
+    TransactionIdentityTestCase("plugin", "other unique_id", "BTC", False),
+]
+
+
+def _in_transaction(plugin: str, unique_id: str, asset: str, raw_data: str) -> InTransaction:
+    return InTransaction(
+        plugin=plugin,
+        unique_id=unique_id,
+        raw_data=raw_data,
+        timestamp="2022-01-01 00:00:00+00:00",
+        asset=asset,
+        exchange="exchange",
+        holder="holder",
+        transaction_type="Buy",
+        spot_price="1000.0",
+        crypto_in="1.0",
+    )
+
+
+@pytest.mark.parametrize("plugin, unique_id, asset, is_equal", transaction_identity_test_cases)
+def test_transaction_identity(plugin: str, unique_id: str, asset: str, is_equal: bool) -> None:
+    """Verify transactions are identified by unique_id, plugin and asset only."""
+    transaction = _in_transaction("plugin", "unique_id", "BTC", "raw_data1")
+    other_transaction = _in_transaction(plugin, unique_id, asset, "raw_data2")
+
+    assert (transaction == other_transaction) is is_equal
+    assert (transaction != other_transaction) is not is_equal
+    if is_equal:
+        assert hash(transaction) == hash(other_transaction)
+        assert len({transaction, other_transaction}) == 1
+    else:
+        assert len({transaction, other_transaction}) == 2
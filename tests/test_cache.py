@@ -13,10 +13,14 @@
 # limitations under the License.
 
 
+import copyreg
 import os
+import pickle  # nosec
 import unittest
+from datetime import timedelta
 from pathlib import Path
-from typing import Dict, List
+from typing import Any, Dict, List, Tuple
+from unittest.mock import patch
 
 from dali.abstract_transaction import AbstractTransaction
 from dali.cache import CACHE_DIR, load_from_cache, save_to_cache
@@ -87,6 +91,34 @@ class TestCache(unittest.TestCase):
                 self.assertEqual(transaction1.crypto_fee, transaction2.crypto_fee)
             self.assertEqual(transaction1.notes, transaction2.notes)
 
+    def test_cache_saved_before_slots(self) -> None:
+        cache_name: str = "test_cache_saved_before_slots"
+        transaction: InTransaction = InTransaction(
+            plugin="my plugin 1",
+            unique_id="my unique_id 1",
+            raw_data="my raw_data 1",
+            timestamp="2021-01-02T08:42:43.882Z",
+            asset="BTC",
+            exchange="BlockFi",
+            holder="Bob",
+            transaction_type="inTerest",
+            spot_price="1000.0",
+            crypto_in="2.0002",
+        )
+        # Transactions without slots were pickled with their attribute dictionary as state, which had no key
+        legacy_state: Dict[str, Any] = {name: getattr(transaction, name) for name in transaction.__getstate__()[1] if name != "_AbstractTransaction__key"}
+
+        legacy_reduce: Tuple[Any, Tuple[Any, ...], Dict[str, Any]] = (copyreg.__newobj__, (InTransaction,), legacy_state)  # type: ignore
+        with patch.object(InTransaction, "__reduce_ex__", lambda _self, _protocol: legacy_reduce):
+            save_to_cache(cache_name, [transaction])
+        loaded_transaction_list: List[AbstractTransaction] = load_from_cache(cache_name)
+        loaded_transaction: AbstractTransaction = loaded_transaction_list[0]
+        self.assertIsInstance(loaded_transaction, InTransaction)
+        self.assertEqual(loaded_transaction, transaction)
+        self.assertEqual(hash(loaded_transaction), hash(transaction))
+        self.assertEqual(repr(loaded_transaction), repr(transaction))
+        (ROOT_PATH / CACHE_DIR / cache_name).unlink()
+
     def test_dict_cache(self) -> None:
         cache_name: str = "test_dict_cache"
         try:
@@ -102,6 +134,72 @@ class TestCache(unittest.TestCase):
         loaded_dictionary: Dict[str, int] = load_from_cache(cache_name)
         self.assertEqual(dictionary, loaded_dictionary)
 
+    def test_interrupted_save_keeps_previous_cache(self) -> None:
+        cache_name: str = "test_interrupted_save_cache"
+        save_to_cache(cache_name, {"a": 1})
+
+        class Unpicklable:
+            def __reduce__(self) -> str:
+                raise RuntimeError("interrupted")
+
+        with self.assertRaises(RuntimeError):
+            save_to_cache(cache_name, {"a": 2, "b": Unpicklable()})
+
+        self.assertEqual(load_from_cache(cache_name), {"a": 1})
+        self.assertEqual([name for name in os.listdir(ROOT_PATH / CACHE_DIR) if name.startswith(cache_name)], [cache_name])
+        (ROOT_PATH / CACHE_DIR / cache_name).unlink()
+
+    def test_time_to_live(self) -> None:
+        cache_name: str = "test_time_to_live_cache"
+        save_to_cache(cache_name, [1, 2, 3])
+
+        self.assertEqual(load_from_cache(cache_name, timedelta(hours=1)), [1, 2, 3])
+        self.assertIsNone(load_from_cache(cache_name, timedelta(0)))
+        # Without a time to live the cache never expires
+        self.assertEqual(load_from_cache(cache_name), [1, 2, 3])
+        (ROOT_PATH / CACHE_DIR / cache_name).unlink()
+
+    def test_unreadable_cache(self) -> None:
+        cache_name: str = "test_unreadable_cache"
+        self.assertIsNone(load_from_cache(cache_name))
+
+        # Truncated file
+        save_to_cache(cache_name, list(range(100)))
+        cache_path: Path = ROOT_PATH / CACHE_DIR / cache_name
+        cache_path.write_bytes(cache_path.read_bytes()[:20])
+        self.assertIsNone(load_from_cache(cache_name))
+
+        # Saved before entries carried their save time
+        with open(cache_path, "wb") as cache_file:
+            pickle.dump({"abc": 12}, cache_file)
+        self.assertEqual(load_from_cache(cache_name), {"abc": 12})
+        self.assertIsNone(load_from_cache(cache_name, timedelta(hours=1)))
+        cache_path.unlink()
+
+    def test_tampered_cache(self) -> None:
+        cache_name: str = "test_tampered_cache"
+        cache_path: Path = ROOT_PATH / CACHE_DIR / cache_name
+
+        class Tampered:
+            def __reduce__(self) -> Tuple[Any, Tuple[Any, ...]]:
+                return (os.getcwd, ())
+
+        os.makedirs(ROOT_PATH / CACHE_DIR, exist_ok=True)
+        with open(cache_path, "wb") as cache_file:
+            pickle.dump({"abc": Tampered()}, cache_file)
+        self.assertIsNone(load_from_cache(cache_name))
+
+        # Dotted names resolve attribute by attribute from an allowed module: dali.cache + os.getcwd would call os.getcwd
+        with open(cache_path, "wb") as cache_file:
+            cache_file.write(b"\x80\x04\x8c\ndali.cache\x94\x8c\tos.getcwd\x94\x93\x94)R\x94.")
+        self.assertIsNone(load_from_cache(cache_name))
+
+        # Functions and modules imported by an allowed module are not classes of the allowed packages
+        with open(cache_path, "wb") as cache_file:
+            cache_file.write(b"\x80\x04\x8c\ndali.cache\x94\x8c\x02os\x94\x93\x94.")
+        self.assertIsNone(load_from_cache(cache_name))
+        cache_path.unlink()
+
 
 if __name__ == "__main__":
     unittest.main()
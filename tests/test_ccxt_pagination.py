@@ -19,6 +19,7 @@ from typing import Dict, List, Union
 import pytest
 
 from dali.ccxt_pagination import (
+    DateBasedPaginationDetailSet,
     IdBasedPaginationDetailSet,
     IdBasedPaginationDetailsIterator,
 )
@@ -67,3 +68,20 @@ class TestCCXTPagination:
         sample_iterator._next_market()
         with pytest.raises(StopIteration):
             next(sample_iterator)
+
+    # Test case for splitting a detail set into independent per-market detail sets
+    def test_split_by_market(self, sample_results: List[Dict[str, Union[str, int]]]) -> None:
+        detail_set = IdBasedPaginationDetailSet(id_param="id", limit=3, markets=["market1", "market2"], params={"type": "spot"})
+        split_sets = detail_set.split_by_market()
+        assert len(split_sets) == 2
+
+        first_iterator = iter(split_sets[0])
+        first_iterator.update_fetched_elements(sample_results)
+        second_details = next(iter(split_sets[1]))
+        assert second_details.symbol == "market2"
+        # Params are not shared between markets
+        assert second_details.params == {"type": "spot", "id": None}
+        assert next(first_iterator).params == {"type": "spot", "id": 3}
+
+        single_market_set = DateBasedPaginationDetailSet(exchange_start_time=0, limit=3, markets=["market1"])
+        assert single_market_set.split_by_market() == [single_market_set]
@@ -0,0 +1,45 @@
+# Copyright 2022 eprbell
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+from multiprocessing.pool import ThreadPool
+from typing import Any, List
+
+from ccxt import binance
+
+from dali.ccxt_throttle import serialize_throttle
+
+_RATE_LIMIT_IN_MS: int = 50
+
+
+def test_serialize_throttle(mocker: Any) -> None:
+    client = binance({"enableRateLimit": True, "rateLimit": _RATE_LIMIT_IN_MS})
+    serialize_throttle(client)
+    request_times: List[float] = []
+
+    def fetch(*_args: Any, **_kwargs: Any) -> Any:
+        request_times.append(time.monotonic())
+        # Responses take longer than the rate limit, so requests of different threads overlap
+        time.sleep(2 * _RATE_LIMIT_IN_MS / 1000)
+        return {}
+
+    mocker.patch.object(client, "fetch", side_effect=fetch)
+
+    with ThreadPool(4) as pool:
+        pool.map(lambda _: [client.fetch2("ping", "public") for _ in range(3)], range(4))
+
+    request_times.sort()
+    assert len(request_times) == 12
+    # Allow for the millisecond resolution of the ccxt timestamps
+    assert min(later - earlier for earlier, later in zip(request_times, request_times[1:])) >= (_RATE_LIMIT_IN_MS - 2) / 1000
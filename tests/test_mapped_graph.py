@@ -135,6 +135,40 @@ class TestMappedGraph:
         pricing_path_list: List[str] = [v.name for v in pricing_path]
         assert pricing_path_list == [micro_first_parent_in_graph.name, first_parent_in_graph.name, first_child_in_graph.name]
 
+    def test_get_route(self) -> None:
+        current_graph = MappedGraph[str]("some exchange")
+        current_graph.add_neighbor("first parent", "first child", 2.0)
+        current_graph.add_neighbor("first parent", "second parent", 1.0)
+        current_graph.add_neighbor("second parent", "first child", 0.5)
+        first_parent_in_graph = current_graph.get_vertex("first parent")
+        first_child_in_graph = current_graph.get_vertex("first child")
+        second_parent_in_graph = current_graph.get_vertex("second parent")
+        assert first_parent_in_graph
+        assert first_child_in_graph
+        assert second_parent_in_graph
+
+        route: Optional[List[str]] = current_graph.get_route(first_parent_in_graph, first_child_in_graph)
+        pricing_path = current_graph.dijkstra(first_parent_in_graph, first_child_in_graph, False)
+        assert pricing_path
+        assert route == [v.name for v in pricing_path] == ["first parent", "second parent", "first child"]
+        assert current_graph.get_route(first_child_in_graph, first_parent_in_graph) is None
+
+        # Adding an edge invalidates the cached routes
+        current_graph.add_neighbor("first child", "first parent", 1.0)
+        assert current_graph.get_route(first_child_in_graph, first_parent_in_graph) == ["first child", "first parent"]
+
+    def test_edges_round_trip(self, basic_graph_with_aliases: MappedGraph[str]) -> None:
+        edges = basic_graph_with_aliases.to_edges()
+        rebuilt_graph = MappedGraph[str].from_edges(edges)
+
+        assert rebuilt_graph.to_edges() == edges
+        assert rebuilt_graph.is_alias("micro first parent", "first parent")
+        micro_first_parent_in_graph = rebuilt_graph.get_vertex("micro first parent")
+        first_child_in_graph = rebuilt_graph.get_vertex("first child")
+        assert micro_first_parent_in_graph
+        assert first_child_in_graph
+        assert rebuilt_graph.get_route(micro_first_parent_in_graph, first_child_in_graph) == ["micro first parent", "first parent", "first child"]
+
     def test_cloned_graph(self, basic_graph: MappedGraph[str], cloned_graph: MappedGraph[str]) -> None:
         first_parent_in_graph = basic_graph.get_vertex("first parent")
         first_child_in_graph = basic_graph.get_vertex("first child")
@@ -154,3 +188,32 @@ class TestMappedGraph:
         assert first_parent_in_clone.get_weight(second_child_in_clone) == 1.0
         assert second_parent_in_clone.get_weight(first_child_in_clone) == 4.0
         assert second_parent_in_clone.get_weight(second_child_in_clone) == 3.0
+
+    def test_get_vertexes_reaching(self) -> None:
+        current_graph = MappedGraph[str]("some exchange")
+        current_graph.add_neighbor("first parent", "first child", 1.0)
+        current_graph.add_neighbor("first child", "USD", 1.0)
+        current_graph.add_neighbor("second parent", "second child", 1.0)
+
+        assert {v.name for v in current_graph.get_vertexes_reaching(["USD", "EUR"])} == {"first parent", "first child", "USD"}
+        assert {v.name for v in current_graph.get_vertexes_reaching(["second child"])} == {"second parent", "second child"}
+        assert not current_graph.get_vertexes_reaching(["EUR"])
+
+    def test_add_fiat_neighbors(self) -> None:
+        current_graph = MappedGraph[str]("some exchange")
+        current_graph.add_neighbor("first parent", "USD", 1.0)
+        first_parent_in_graph = current_graph.get_vertex("first parent")
+        usd_in_graph = current_graph.get_vertex("USD")
+        assert first_parent_in_graph
+        assert usd_in_graph
+        assert current_graph.get_route(first_parent_in_graph, usd_in_graph) == ["first parent", "USD"]
+
+        current_graph.add_fiat_neighbors("USD", ["EUR", "JPY"], 2.0, True)
+
+        eur_in_graph = current_graph.get_vertex("EUR")
+        assert eur_in_graph
+        assert usd_in_graph.get_weight(eur_in_graph) == 2.0
+        assert current_graph.is_optimized("USD")
+        assert "USD" in current_graph.to_edges().fiat_assets
+        # New edges invalidate the cached routes
+        assert current_graph.get_route(first_parent_in_graph, eur_in_graph) == ["first parent", "USD", "EUR"]
@@ -18,10 +18,12 @@ import datetime
 from itertools import chain, repeat
 from typing import Any, Dict, List, Union
 
-from ccxt import Exchange
+import pytest
+from ccxt import DDoSProtection, Exchange, NetworkError
 from dateutil import parser
 from rp2.plugin.country.us import US
 from rp2.rp2_decimal import RP2Decimal
+from rp2.rp2_error import RP2RuntimeError
 
 from dali.configuration import Keyword
 from dali.in_transaction import InTransaction
@@ -887,3 +889,75 @@ class TestBinance:
         assert crypto_withdrawal_transaction.from_exchange == "Binance.com"
         assert crypto_withdrawal_transaction.crypto_received == Keyword.UNKNOWN.value
         assert RP2Decimal(crypto_withdrawal_transaction.crypto_sent) == RP2Decimal("0.00999800")
+
+    def test_markets_cache(self, mocker: Any, tmp_path: Any) -> None:
+        mocker.patch("dali.cache.CACHE_DIR", str(tmp_path))
+        plugin = InputPlugin(
+            account_holder="tester",
+            api_key="a",
+            api_secret="b",
+            native_fiat="USD",
+        )
+        mocker.patch.object(plugin._client, "fetch_markets").return_value = [
+            {"id": "ETHBTC", "type": "spot", "symbol": "ETH/BTC", "base": "ETH", "quote": "BTC"},
+            {"id": "ETHBTC_PERP", "type": "swap", "symbol": "ETH/BTC:BTC", "base": "ETH", "quote": "BTC"},
+        ]
+        assert plugin._get_markets() == ["ETHBTC"]
+
+        # A new run reuses the cached markets instead of querying the exchange again
+        cached_plugin = InputPlugin(
+            account_holder="tester",
+            api_key="a",
+            api_secret="b",
+            native_fiat="USD",
+        )
+        fetch_markets = mocker.patch.object(cached_plugin._client, "fetch_markets")
+        assert cached_plugin._get_markets() == ["ETHBTC"]
+        fetch_markets.assert_not_called()
+
+        # Expired entries are refreshed
+        mocker.patch.object(InputPlugin, "_MARKETS_CACHE_TTL", datetime.timedelta(0))
+        expired_plugin = InputPlugin(
+            account_holder="tester",
+            api_key="a",
+            api_secret="b",
+            native_fiat="USD",
+        )
+        mocker.patch.object(expired_plugin._client, "fetch_markets").return_value = [{"id": "BTCUSDT", "type": "spot"}]
+        assert expired_plugin._get_markets() == ["BTCUSDT"]
+
+    def test_client_throttle(self, mocker: Any) -> None:
+        serialize_throttle = mocker.patch("dali.abstract_ccxt_input_plugin.serialize_throttle")
+        plugin = InputPlugin(
+            account_holder="tester",
+            api_key="a",
+            api_secret="b",
+            native_fiat="USD",
+        )
+
+        # Trades of different markets are fetched concurrently through the same client
+        serialize_throttle.assert_called_once_with(plugin._client)
+        assert plugin._client.enableRateLimit
+
+    def test_rp2_timestamp_from_ms_epoch(self) -> None:
+        assert InputPlugin._rp2_timestamp_from_ms_epoch("1502962946216") == "2017-08-17 09:42:26+0000"
+        assert InputPlugin._rp2_timestamp_from_ms_epoch(1502962946999) == "2017-08-17 09:42:26+0000"
+        assert InputPlugin._rp2_timestamp_from_ms_epoch(0) == "1970-01-01 00:00:00+0000"
+
+    def test_safe_api_call_backoff(self, mocker: Any) -> None:
+        plugin = InputPlugin(
+            account_holder="tester",
+            api_key="a",
+            api_secret="b",
+            native_fiat="USD",
+        )
+        sleep = mocker.patch("dali.abstract_ccxt_input_plugin.sleep")
+        function = mocker.Mock(side_effect=[DDoSProtection("throttled"), NetworkError("down"), [{"id": "1"}]])
+
+        assert plugin._safe_api_call(function, {"since": 0}) == [{"id": "1"}]
+        assert [call.args[0] for call in sleep.call_args_list] == [0.5, 1.0]
+
+        function = mocker.Mock(side_effect=NetworkError("down"))
+        with pytest.raises(RP2RuntimeError):
+            plugin._safe_api_call(function, {})
+        assert function.call_count == 10
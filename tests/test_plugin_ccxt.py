@@ -148,3 +148,10 @@ class TestCcxtPlugin:
 
         # Did it cache an entire year, again? 368 x 2 = 736
         assert plugin._add_bar_to_cache.call_count == 736  # type: ignore # pylint: disable=protected-access, no-member
+
+    def test_session_adapter(self) -> None:
+        plugin: PairConverterPlugin = PairConverterPlugin(Keyword.HISTORICAL_PRICE_HIGH.value)
+        adapter = plugin._PairConverterPlugin__session.get_adapter("https://api.frankfurter.app/currencies")  # type: ignore # pylint: disable=protected-access
+
+        assert adapter.max_retries.total == 3
+        assert 429 in adapter.max_retries.status_forcelist
@@ -14,6 +14,7 @@
 
 import os
 from datetime import datetime, timedelta, timezone
+from json import JSONDecodeError
 from typing import Any, Dict, Generator, List, Union
 
 import pytest
@@ -21,7 +22,9 @@ from ccxt import binance, kraken
 from prezzemolo.avl_tree import AVLTree
 from prezzemolo.vertex import Vertex
 from rp2.rp2_decimal import ZERO, RP2Decimal
+from rp2.rp2_error import RP2ValueError
 
+from dali.abstract_ccxt_pair_converter_plugin import FIAT_PRIORITY
 from dali.abstract_pair_converter_plugin import AssetPairAndTimestamp
 from dali.cache import CACHE_DIR, load_from_cache
 from dali.configuration import Keyword
@@ -247,7 +250,6 @@ class TestCcxtExchangerateHostPlugin:
         mocker.patch.object(plugin, "_AbstractCcxtPairConverterPlugin__exchange_markets", {TEST_EXCHANGE: TEST_MARKETS})
         mocker.patch.object(kraken_csv, "find_historical_bars").return_value = [None]
         mocker.patch.object(plugin, "_AbstractCcxtPairConverterPlugin__exchange_csv_reader", {"Kraken": kraken_csv})
-        mocker.patch.object(plugin, "_get_request_delay").return_value = 0.0
 
         def ohlcv_generator(
             symbol_bar: List[Union[float, int]],
@@ -767,7 +769,6 @@ class TestCcxtExchangerateHostPlugin:
 
         mocker.patch.object(kraken_csv, "find_historical_bar").return_value = None
         mocker.patch.object(plugin, "_AbstractCcxtPairConverterPlugin__exchange_csv_reader", {LOCKED_EXCHANGE: kraken_csv})
-        mocker.patch.object(plugin, "_get_request_delay").return_value = 0.0
         mocker.patch.object(exchange_instance, "fetchOHLCV").return_value = [
             [
                 BTCUSDT_TIMESTAMP.timestamp() * _MS_IN_SECOND,  # UTC timestamp in milliseconds, integer
@@ -883,3 +884,72 @@ class TestCcxtExchangerateHostPlugin:
         assert data.open == BTCUSDT_OPEN * USDTUSD_OPEN * RP2Decimal("0.001")
         assert data.close == BTCUSDT_CLOSE * USDTUSD_CLOSE * RP2Decimal("0.001")
         assert data.volume == BTCUSDT_VOLUME + USDTUSD_VOLUME + RP2Decimal("1")
+
+    def test_fiat_rates_batched_per_day(self, mocker: Any) -> None:
+        plugin: PairConverterPlugin = PairConverterPlugin(Keyword.HISTORICAL_PRICE_HIGH.value, fiat_access_key="BOGUS_KEY")
+        session = mocker.patch.object(plugin, "_PairConverterPlugin__session")
+        session.get.return_value.json.return_value = {"success": True, "quotes": {"USDEUR": 0.8, "USDJPY": 115, "USDGBP": 0.75}}
+        timestamp: datetime = datetime(2019, 3, 5, 10, 30, tzinfo=timezone.utc)
+
+        usd_eur = plugin._get_fiat_exchange_rate(timestamp, "USD", "EUR")  # pylint: disable=protected-access
+        jpy_usd = plugin._get_fiat_exchange_rate(timestamp + timedelta(hours=5), "JPY", "USD")  # pylint: disable=protected-access
+
+        assert usd_eur
+        assert usd_eur.high == RP2Decimal("0.8")
+        assert jpy_usd
+        assert jpy_usd.high == RP2Decimal("1") / JPY_USD_RATE
+        # Reverse bars are derived from the USD ones instead of being cached
+        assert plugin._get_bar_from_cache(AssetPairAndTimestamp(timestamp, "USD", "EUR", "exchangerate.host")) == usd_eur  # pylint: disable=protected-access
+        assert plugin._get_bar_from_cache(AssetPairAndTimestamp(timestamp, "JPY", "USD", "exchangerate.host")) is None  # pylint: disable=protected-access
+        eur_usd = plugin._get_fiat_exchange_rate(timestamp, "EUR", "USD")  # pylint: disable=protected-access
+        assert eur_usd
+        assert eur_usd.high == RP2Decimal("1") / RP2Decimal("0.8")
+        # All the fiat of the day come with the first request
+        session.get.assert_called_once()
+        assert session.get.call_args.kwargs["params"]["currencies"] == "AUD,CAD,CHF,EUR,GBP,JPY,NZD"
+        # Currencies that have no quote aren't requested again for the same day
+        assert plugin._get_fiat_exchange_rate(timestamp, "USD", "CAD") is None  # pylint: disable=protected-access
+        session.get.assert_called_once()
+
+    def test_session_adapter(self) -> None:
+        plugin: PairConverterPlugin = PairConverterPlugin(Keyword.HISTORICAL_PRICE_HIGH.value, fiat_access_key="BOGUS_KEY")
+        adapter = plugin._PairConverterPlugin__session.get_adapter("http://api.exchangerate.host/historical")  # type: ignore # pylint: disable=protected-access
+
+        assert adapter.max_retries.total == 3
+        assert 503 in adapter.max_retries.status_forcelist
+        assert 429 in adapter.max_retries.status_forcelist
+
+    def test_fiat_rates_retry_backoff(self, mocker: Any) -> None:
+        plugin: PairConverterPlugin = PairConverterPlugin(Keyword.HISTORICAL_PRICE_HIGH.value, fiat_access_key="BOGUS_KEY")
+        session = mocker.patch.object(plugin, "_PairConverterPlugin__session")
+        session.get.return_value.json.side_effect = [JSONDecodeError("bad", "", 0), JSONDecodeError("bad", "", 0), {"success": True, "quotes": {"USDEUR": 0.8}}]
+        sleep = mocker.patch("dali.plugin.pair_converter.ccxt_exchangerate_host.sleep")
+
+        usd_eur = plugin._get_fiat_exchange_rate(datetime(2019, 3, 6, tzinfo=timezone.utc), "USD", "EUR")  # pylint: disable=protected-access
+
+        assert usd_eur
+        assert usd_eur.high == RP2Decimal("0.8")
+        assert [call.args[0] for call in sleep.call_args_list] == [0.5, 1.0]
+
+    def test_fiat_priority(self) -> None:
+        plugin: PairConverterPlugin = PairConverterPlugin(Keyword.HISTORICAL_PRICE_HIGH.value, fiat_access_key="BOGUS_KEY", fiat_priority='["EUR", "USD"]')
+        default_plugin: PairConverterPlugin = PairConverterPlugin(Keyword.HISTORICAL_PRICE_HIGH.value, fiat_access_key="BOGUS_KEY")
+
+        assert plugin._fiat_priority == {"EUR": 1, "USD": 2}  # pylint: disable=protected-access
+        # The module-level default is copied, never modified
+        assert default_plugin._fiat_priority == FIAT_PRIORITY  # pylint: disable=protected-access
+        assert default_plugin._fiat_priority is not FIAT_PRIORITY  # pylint: disable=protected-access
+        assert FIAT_PRIORITY["USD"] == 1
+        with pytest.raises(RP2ValueError):
+            PairConverterPlugin(Keyword.HISTORICAL_PRICE_HIGH.value, fiat_access_key="BOGUS_KEY", fiat_priority="EUR, USD")
+
+    def test_is_fiat_pair(self, mocker: Any) -> None:
+        plugin: PairConverterPlugin = PairConverterPlugin(Keyword.HISTORICAL_PRICE_HIGH.value, fiat_access_key="BOGUS_KEY")
+        session = mocker.patch.object(plugin, "_PairConverterPlugin__session")
+        session.get.return_value.json.return_value = {"success": True, "currencies": {"BTC": "Bitcoin", "EUR": "Euro", "USD": "US Dollar"}}
+
+        assert plugin._is_fiat_pair("EUR", "USD")  # pylint: disable=protected-access
+        assert not plugin._is_fiat_pair("BTC", "USD")  # pylint: disable=protected-access
+        assert not plugin._is_fiat_pair("USD", "BTC")  # pylint: disable=protected-access
+        # The symbols are only fetched the first time
+        session.get.assert_called_once()